@@ -0,0 +1,362 @@
+"""
+Incrementally maintained index analytics: rolling statistics and status regimes
+"""
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from api.representation import CachedRepresentation
+from models.fear_greed import VALID_STATUSES
+from scrapers.common import get_status_from_value
+from utils.timeseries import TimeSeries, lookback_target, parse_lookbacks
+
+# Rolling windows, as lookback specs relative to the newest point
+ANALYTICS_WINDOWS = parse_lookbacks(os.getenv("ANALYTICS_WINDOWS", "7d,30d,90d"))
+
+
+class RollingWindow:
+    """
+    Points within a lookback of the newest point, with running sums
+
+    Appending a point evicts the points that fell out of the window, so mean
+    and standard deviation are O(1) per point instead of O(window).
+    """
+
+    __slots__ = ("spec", "points", "total", "total_sq")
+
+    def __init__(self, spec: str):
+        """
+        Initialize window
+
+        Args:
+            spec: Lookback spec of the window length (e.g. "30d")
+        """
+        self.spec = spec
+        self.points = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def append(self, ts: float, value: float) -> None:
+        """
+        Add the newest point and evict points older than the window
+
+        Args:
+            ts: Unix timestamp in seconds (not older than the previous point)
+            value: Point value
+        """
+        self.points.append((ts, value))
+        self.total += value
+        self.total_sq += value * value
+
+        cutoff = lookback_target(ts, self.spec)
+        points = self.points
+        while points[0][0] < cutoff:
+            _, old = points.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+
+    def replace_last(self, ts: float, value: float) -> None:
+        """
+        Replace the newest point with a revision of it
+
+        Points evicted for the old newest point stay evicted, which holds
+        because the revision is not older than it.
+
+        Args:
+            ts: Unix timestamp in seconds (not older than the replaced point)
+            value: Point value
+        """
+        _, old = self.points.pop()
+        self.total -= old
+        self.total_sq -= old * old
+        self.append(ts, value)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get the window statistics
+
+        Returns:
+            Dictionary with point count, mean, volatility (population standard
+            deviation) and the z-score of the newest point
+        """
+        n = len(self.points)
+        if n == 0:
+            return {"points": 0, "mean": None, "volatility": None, "zscore": None}
+
+        mean = self.total / n
+        # Running sums can drift slightly below zero variance
+        std = math.sqrt(max(0.0, self.total_sq / n - mean * mean))
+        latest = self.points[-1][1]
+        return {
+            "points": n,
+            "mean": round(mean, 4),
+            "volatility": round(std, 4),
+            "zscore": round((latest - mean) / std, 4) if std > 1e-9 else 0.0
+        }
+
+
+def _decrement(counts: Dict[str, int], key: str) -> None:
+    """Decrement a count, dropping it at zero"""
+    counts[key] -= 1
+    if not counts[key]:
+        del counts[key]
+
+
+class IndexAnalytics:
+    """
+    Analytics of one source's index history, updated point by point
+
+    Time in each status band is credited to the band of the earlier point of
+    every consecutive pair. A regime is a run of consecutive points in the
+    same band; transitions count changes between bands.
+    """
+
+    def __init__(self, windows: List[str] = ANALYTICS_WINDOWS):
+        """
+        Initialize analytics
+
+        Args:
+            windows: Lookback specs of the rolling windows
+        """
+        self.windows = {spec: RollingWindow(spec) for spec in windows}
+        self.first_ts: Optional[float] = None
+        self.last_ts: Optional[float] = None
+        self.last_value: Optional[float] = None
+        self.status: Optional[str] = None
+        self.regime_start: Optional[float] = None
+        self.band_seconds: Dict[str, float] = {}
+        self.band_regimes: Dict[str, int] = {}
+        self.transitions: Dict[str, int] = {}
+        # (last_ts, last_value, status, regime_start) before the newest point
+        self._previous: Optional[tuple] = None
+        # History fed last
+        self._seen: Optional[TimeSeries] = None
+
+    def append(self, ts: float, value: float) -> bool:
+        """
+        Add a point newer than every point seen so far
+
+        Args:
+            ts: Unix timestamp in seconds
+            value: Index value (0-100)
+
+        Returns:
+            True if the point was added, False if it is not newer than the last point
+        """
+        if self.last_ts is not None and ts <= self.last_ts:
+            return False
+
+        for window in self.windows.values():
+            window.append(ts, value)
+        self._advance(ts, value)
+        return True
+
+    def replace_last(self, ts: float, value: float) -> bool:
+        """
+        Revise the newest point, e.g. an intraday value whose timestamp moves on every refresh
+
+        The newest point's contribution to the windows, band times, regimes
+        and transitions is taken back before the revision is added, so the
+        result equals feeding the revised history in one pass.
+
+        Args:
+            ts: Unix timestamp in seconds (not older than the replaced point)
+            value: Index value (0-100)
+
+        Returns:
+            True if the point was replaced, False if there is no point or ts is older
+        """
+        if self._previous is None or ts < self.last_ts:
+            return False
+
+        for window in self.windows.values():
+            window.replace_last(ts, value)
+        self._rewind()
+        self._advance(ts, value)
+        return True
+
+    def _advance(self, ts: float, value: float) -> None:
+        """Update the band statistics with a new newest point"""
+        # State before this point, for replace_last
+        self._previous = (self.last_ts, self.last_value, self.status, self.regime_start)
+
+        status = get_status_from_value(round(value))
+        if self.status is None:
+            self.first_ts = ts
+            self.regime_start = ts
+            self.band_regimes[status] = 1
+        else:
+            self.band_seconds[self.status] = self.band_seconds.get(self.status, 0.0) + ts - self.last_ts
+            if status != self.status:
+                key = f"{self.status}->{status}"
+                self.transitions[key] = self.transitions.get(key, 0) + 1
+                self.band_regimes[status] = self.band_regimes.get(status, 0) + 1
+                self.regime_start = ts
+
+        self.status = status
+        self.last_ts = ts
+        self.last_value = value
+
+    def _rewind(self) -> None:
+        """Take back the band statistics of the newest point"""
+        last_ts, last_value, status, regime_start = self._previous
+        if status is None:
+            self.first_ts = None
+            _decrement(self.band_regimes, self.status)
+        else:
+            self.band_seconds[status] -= self.last_ts - last_ts
+            if self.status != status:
+                _decrement(self.transitions, f"{status}->{self.status}")
+                _decrement(self.band_regimes, self.status)
+
+        self.last_ts, self.last_value, self.status, self.regime_start = last_ts, last_value, status, regime_start
+        self._previous = None
+
+    def extend(self, series: TimeSeries) -> Optional[int]:
+        """
+        Bring the analytics up to date with a source's merged history
+
+        The history is compared with the one fed last (merged histories are
+        new objects, never modified). Points after it are added, and a
+        revised last point (moved or changed, like CNN's intraday value) is
+        replaced first. Any other difference (an earlier point revised by a
+        resync, or old points dropped by retention) cannot be applied
+        incrementally.
+
+        Args:
+            series: Index history (ascending)
+
+        Returns:
+            Number of points added or revised, or None if the analytics must
+            be rebuilt from the history
+        """
+        seen = self._seen
+        if seen is None:
+            self._seen = series
+            return sum(self.append(ts, value) for ts, value in zip(series.timestamps, series.values))
+
+        n = len(seen) - 1
+        if (
+            len(series) <= n
+            or series.timestamps[:n] != seen.timestamps[:n]
+            or series.values[:n] != seen.values[:n]
+        ):
+            return None
+
+        changed = 0
+        ts, value = series.timestamps[n], series.values[n]
+        if ts != self.last_ts or value != self.last_value:
+            if not self.replace_last(ts, value):
+                return None
+            changed = 1
+        for ts, value in zip(series.timestamps[n + 1:], series.values[n + 1:]):
+            changed += self.append(ts, value)
+        self._seen = series
+        return changed
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get every statistic as a JSON-compatible dict
+
+        Returns:
+            Dictionary with rolling windows, the current regime, time and
+            regime counts per band, and transition counts
+        """
+        bands = {}
+        for status in VALID_STATUSES:
+            if status not in self.band_regimes:
+                continue
+            seconds = self.band_seconds.get(status, 0.0)
+            regimes = self.band_regimes.get(status, 0)
+            bands[status] = {
+                "seconds": int(seconds),
+                "regimes": regimes,
+                "mean_regime_seconds": int(seconds / regimes) if regimes else None
+            }
+
+        return {
+            "first_timestamp": int(self.first_ts) if self.first_ts is not None else None,
+            "last_timestamp": int(self.last_ts) if self.last_ts is not None else None,
+            "latest": round(self.last_value, 4) if self.last_value is not None else None,
+            "windows": {spec: window.summary() for spec, window in self.windows.items()},
+            "current_regime": {
+                "status": self.status,
+                "since": int(self.regime_start),
+                "seconds": int(self.last_ts - self.regime_start)
+            } if self.status is not None else None,
+            "bands": bands,
+            "transitions": dict(sorted(self.transitions.items()))
+        }
+
+
+class AnalyticsStore:
+    """Analytics per source, with the encoded snapshot kept ready to serve"""
+
+    def __init__(self, windows: List[str] = ANALYTICS_WINDOWS):
+        """
+        Initialize empty store
+
+        Args:
+            windows: Lookback specs of the rolling windows
+        """
+        self.windows = windows
+        self._analytics: Dict[str, IndexAnalytics] = {}
+        self._representations: Dict[str, CachedRepresentation] = {}
+
+    def update(self, source: str, series: TimeSeries, ttl: float) -> int:
+        """
+        Bring a source's analytics up to date with its merged history
+
+        Statistics are updated point by point (new points appended, a revised
+        last point replaced); histories that revised earlier points are
+        re-analysed from scratch. The snapshot is encoded here, once per
+        refresh, so requests only send stored bytes.
+
+        Args:
+            source: Index source name
+            series: Index history from the last refresh
+            ttl: Seconds the snapshot stays fresh
+
+        Returns:
+            Number of new or revised points
+        """
+        analytics = self._analytics.get(source)
+        added = analytics.extend(series) if analytics is not None else None
+        if added is None:
+            analytics = self._analytics[source] = IndexAnalytics(self.windows)
+            added = analytics.extend(series)
+        if analytics.last_ts is None:
+            return 0
+
+        now = time.time()
+        previous = self._representations.get(source)
+        self._representations[source] = CachedRepresentation(
+            {"source": source, **analytics.snapshot()},
+            # Unchanged statistics keep their Last-Modified (and, with the same body, their ETag)
+            modified_at=now if added or previous is None else previous.modified_at,
+            expires_at=now + ttl
+        )
+        return added
+
+    def get(self, source: str) -> Optional[CachedRepresentation]:
+        """
+        Get a source's encoded analytics
+
+        Args:
+            source: Index source name
+
+        Returns:
+            CachedRepresentation or None if the source has no history yet
+        """
+        return self._representations.get(source)
+
+    def clear(self) -> None:
+        """Remove all analytics"""
+        self._analytics.clear()
+        self._representations.clear()
+
+
+# Global analytics store instance
+analytics_store = AnalyticsStore()
@@ -1,100 +1,963 @@
 """
 Fear & Greed Index API endpoints
 """
-from fastapi import APIRouter, HTTPException, status
-from models.fear_greed import FearGreedResponse
-from scrapers.cnn_scraper import scrape_fear_greed_index
-from scrapers.crypto_scraper import scrape_crypto_fear_greed_index
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from api.analytics import analytics_store
+from api.representation import CachedRepresentation, JSON_MEDIA_TYPE, build_response, encode_json
+from api.static_snapshots import STATIC_SNAPSHOT_MAX_AGE, static_publisher
+from models.fear_greed import (
+    AllIndexesResponse, AnalyticsResponse, BatchRequest, BatchResponse, FearGreedResponse, HistoryResponse,
+    SeriesResponse
+)
+from scrapers.common import IndexSource, get_status_from_value
+from scrapers.registry import source_registry
+from utils.broadcaster import broadcaster
 from utils.cache import cache
+from utils.circuit_breaker import CircuitOpenError
+from utils.history_store import history_store
+from utils.logging_config import hot_path_log
+from utils.metrics import TimedRoute, refresh_errors
+from utils.single_flight import single_flight
+from utils.timeseries import (
+    LOOKBACK_METHODS, TimeSeries, lookback_target, parse_lookback, parse_lookbacks, resolve_lookback, series_store
+)
+import asyncio
+import functools
 import logging
+import math
+import os
+import time
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/v1", tags=["fear-greed"])
+router = APIRouter(prefix="/api/v1", tags=["fear-greed"], route_class=TimedRoute)
 
-CACHE_KEY_CNN = "fear_greed_data_cnn"
-CACHE_KEY_CRYPTO = "fear_greed_data_crypto"
+# Cache keys of the built-in sources (kept for callers that address the cache directly)
+CACHE_KEY_CNN = source_registry.get("stock").cache_key
+CACHE_KEY_CRYPTO = source_registry.get("crypto").cache_key
 
+# Scheduled refreshes run at 80% of the TTL so entries are renewed before expiry
+REFRESH_FRACTION = 0.8
 
-@router.get("/fear-greed", response_model=FearGreedResponse)
-async def get_fear_greed_index():
+# Source served by /api/v1/fear-greed
+DEFAULT_SOURCE = "stock"
+
+# Default history range when "from" is omitted
+DEFAULT_HISTORY_DAYS = 30
+
+# Cross-worker refresh lock, released automatically if its holder dies mid-refresh
+REFRESH_LOCK_TTL = 60
+
+# How often a worker waiting on another worker's refresh checks the cache
+PEER_POLL_INTERVAL = 0.1
+
+# Upper bound on points per batch request
+MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", "10000"))
+
+# Seconds past a published document's expiry before the snapshots are re-published
+STATIC_EXPIRY_GRACE = 1.0
+
+# Strong references to background refresh tasks so they are not garbage collected
+_background_refreshes = set()
+
+# Pending re-publish for when the earliest static snapshot goes stale
+_static_expiry: Optional[asyncio.Task] = None
+# Number of the latest snapshot publish started; overlapping older ones are skipped
+_static_generation = 0
+
+
+# Query parameters of the index endpoints. They are read from the request
+# directly instead of being declared in the signature, so cached hits skip
+# FastAPI's per-request parameter validation; this keeps them in the docs.
+INDEX_PARAMETERS = [
+    {
+        "name": "lookback",
+        "in": "query",
+        "required": False,
+        "schema": {"type": "string"},
+        "description": "Comma-separated lookbacks to resolve, e.g. 12h,3d,2w,6M,1y (h/d/w or calendar M/y)"
+    },
+    {
+        "name": "method",
+        "in": "query",
+        "required": False,
+        "schema": {"type": "string", "enum": list(LOOKBACK_METHODS), "default": "nearest"},
+        "description": "Lookback resolution: nearest or linear"
+    }
+]
+SOURCE_PARAMETER = {
+    "name": "source",
+    "in": "path",
+    "required": True,
+    "schema": {"type": "string"},
+    "description": "Registered source name, e.g. stock or crypto"
+}
+
+
+@router.get("/fear-greed", response_model=FearGreedResponse, openapi_extra={"parameters": INDEX_PARAMETERS})
+async def get_fear_greed_index(request: Request):
     """
     Get current and historical Fear & Greed Index data (CNN - US Stock Market)
 
+    Supports conditional requests via If-None-Match / If-Modified-Since.
+
     Returns:
         FearGreedResponse with current and historical data
 
     Raises:
         HTTPException: If scraping fails
     """
-    return await get_index_data(CACHE_KEY_CNN, scrape_fear_greed_index, "CNN Fear & Greed")
+    return await index_response(request, DEFAULT_SOURCE, index_name="CNN Fear & Greed")
 
 
-@router.get("/fear-greed/stock", response_model=FearGreedResponse)
-async def get_stock_fear_greed_index():
+@router.get("/fear-greed/all", response_model=AllIndexesResponse)
+async def get_all_fear_greed_indexes(request: Request):
     """
-    Get current and historical Fear & Greed Index data for US Stock Market (CNN)
+    Get every registered index in one round trip
+
+    Sources are fetched concurrently, each bounded by its own timeout. A
+    failing source is reported under "errors" while the others are still
+    returned.
 
     Returns:
-        FearGreedResponse with current and historical data
+        AllIndexesResponse keyed by source name
+
+    Raises:
+        HTTPException: If every source fails
+    """
+    indexes, errors = await gather_index_data(list(source_registry))
+
+    if not indexes:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Unable to fetch any Fear & Greed Index data"
+        )
+
+    # Partial results are not cacheable by clients
+    expires_at = time.time() if errors else min(r.expires_at for r in indexes.values())
+    representation = CachedRepresentation(
+        {"indexes": {name: r.data for name, r in indexes.items()}, "errors": errors},
+        modified_at=max(r.modified_at for r in indexes.values()),
+        expires_at=expires_at,
+        # Built per request; compressing it would cost more than it saves
+        compressed=False
+    )
+    return build_response(request, representation)
+
+
+@router.post("/fear-greed/batch", response_model=BatchResponse)
+async def get_fear_greed_batch(batch: BatchRequest):
+    """
+    Resolve many (source, time) points in one call
+
+    Each query names a source and either an absolute timestamp or an offset
+    relative to the source's newest point (a lookback spec such as "7d").
+    Points are resolved from the cached index history, one pass per source,
+    and returned as parallel columns in query order. A failing source is
+    reported under "errors" and its points are null.
+
+    Args:
+        batch: Queries and resolution method
+
+    Returns:
+        BatchResponse with one column entry per query
+
+    Raises:
+        HTTPException: If the batch is too large, a source is unknown or an offset is invalid
+    """
+    queries = batch.queries
+    if len(queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_QUERIES} queries per batch"
+        )
+    if batch.method not in LOOKBACK_METHODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"method must be one of {list(LOOKBACK_METHODS)}"
+        )
+    for spec in {query.offset for query in queries if query.offset is not None}:
+        try:
+            parse_lookback(spec)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # Query positions per source, in first-seen order
+    positions = {}
+    for i, query in enumerate(queries):
+        positions.setdefault(query.source, []).append(i)
+    sources = [get_source(name) for name in positions]
+
+    # Loads (or refreshes) each source's history alongside its index data
+    indexes, errors = await gather_index_data(sources)
+
+    n = len(queries)
+    targets = [None if query.timestamp is None else to_unix(query.timestamp) for query in queries]
+    timestamps = [None] * n
+    values = [None] * n
+    statuses = [None] * n
+    for source in sources:
+        series = await load_series(source) if source.name in indexes else None
+        if not series:
+            continue
+
+        latest = series.latest()[0]
+        offsets = {}
+        indices = positions[source.name]
+        for i in indices:
+            offset = queries[i].offset
+            if offset is not None:
+                if offset not in offsets:
+                    offsets[offset] = int(lookback_target(latest, offset))
+                targets[i] = offsets[offset]
+
+        source_targets = [targets[i] for i in indices]
+        for i, match in zip(indices, series.values_at(source_targets, batch.method)):
+            if match is not None:
+                value = round(match[1])
+                timestamps[i] = int(match[0])
+                values[i] = value
+                statuses[i] = get_status_from_value(value)
+
+    body = encode_json({
+        "method": batch.method,
+        "sources": [query.source for query in queries],
+        "targets": targets,
+        "timestamps": timestamps,
+        "values": values,
+        "statuses": statuses,
+        "errors": errors
+    })
+    return Response(content=body, media_type=JSON_MEDIA_TYPE)
+
+
+@router.get("/fear-greed/stream")
+async def stream_fear_greed_updates(
+    sources: Optional[str] = Query(None, description="Comma-separated source names (default: all)"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
+):
     """
-    return await get_index_data(CACHE_KEY_CNN, scrape_fear_greed_index, "Stock Market")
+    Server-Sent Events stream of index updates
+
+    An "index" event ({source, value, status, timestamp}) is sent with the
+    current values on connect and then only when a value or status changes.
+    Idle streams get a heartbeat comment. Reconnecting clients send
+    Last-Event-ID and receive the events they missed.
+
+    Returns:
+        text/event-stream response
+
+    Raises:
+        HTTPException: If a requested source is unknown
+    """
+    names = None
+    selected = list(source_registry)
+    if sources:
+        names = [name.strip() for name in sources.split(",") if name.strip()]
+        selected = [get_source(name) for name in names]
+
+    # Seed sources nothing was published for yet (e.g. restored from a snapshot)
+    for source in selected:
+        if broadcaster.latest(source.name) is None:
+            representation, _ = await cache.get_with_staleness(source.cache_key)
+            if representation is not None:
+                publish_update(source, representation)
+
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_id = None
 
+    return StreamingResponse(
+        broadcaster.subscribe(last_id, names),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-@router.get("/fear-greed/crypto", response_model=FearGreedResponse)
-async def get_crypto_fear_greed_index():
+
+@router.get(
+    "/fear-greed/{source}",
+    response_model=FearGreedResponse,
+    openapi_extra={"parameters": [SOURCE_PARAMETER, *INDEX_PARAMETERS]}
+)
+async def get_source_fear_greed_index(request: Request):
     """
-    Get current and historical Fear & Greed Index data for Cryptocurrency (Alternative.me)
+    Get current and historical Fear & Greed Index data for a registered source
+
+    Built-in sources: "stock" (CNN, US Stock Market) and "crypto" (Alternative.me)
 
     Returns:
         FearGreedResponse with current and historical data
+
+    Raises:
+        HTTPException: If the source is unknown or scraping fails
+    """
+    return await index_response(request, request.path_params["source"])
+
+
+async def index_response(request: Request, name: str, index_name: Optional[str] = None) -> Response:
+    """
+    Build the response for an index endpoint
+
+    The cached-hit path constructs no models: the representation was
+    validated and encoded once at refresh time and is sent as raw bytes.
+
+    Args:
+        request: Incoming request (its "lookback" and "method" query
+            parameters select optional lookbacks)
+        name: Index source name
+        index_name: Name of the index for logging (default: source display name)
+
+    Returns:
+        Response with the (possibly lookback-extended) representation
+
+    Raises:
+        HTTPException: If the source or lookback parameters are invalid, or scraping fails
+    """
+    source = get_source(name)
+    specs = []
+    lookback = request.query_params.get("lookback")
+    if lookback:
+        method = request.query_params.get("method", "nearest")
+        try:
+            specs = parse_lookbacks(lookback)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if method not in LOOKBACK_METHODS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"method must be one of {list(LOOKBACK_METHODS)}"
+            )
+
+    representation = await get_index_data(source, index_name)
+
+    if specs:
+        series = await load_series(source)
+        representation = representation.variant(
+            ("lookbacks", tuple(specs), method),
+            lambda: {"lookbacks": resolve_lookbacks(series, specs, method)}
+        )
+
+    return build_response(request, representation)
+
+
+async def gather_index_data(sources: list) -> tuple:
+    """
+    Fetch several sources concurrently, each bounded by its own timeout
+
+    Args:
+        sources: Index sources
+
+    Returns:
+        Tuple of (source name -> CachedRepresentation, source name -> error)
+        covering every source
+    """
+    results = await asyncio.gather(
+        *[asyncio.wait_for(get_index_data(source), timeout=source.timeout) for source in sources],
+        return_exceptions=True
+    )
+
+    indexes = {}
+    errors = {}
+    for source, result in zip(sources, results):
+        if isinstance(result, HTTPException):
+            errors[source.name] = result.detail
+        elif isinstance(result, asyncio.TimeoutError):
+            errors[source.name] = f"Timed out after {source.timeout}s"
+        elif isinstance(result, BaseException):
+            errors[source.name] = f"Unable to fetch {source.display_name} Index data"
+        else:
+            indexes[source.name] = result
+    return indexes, errors
+
+
+def get_source(name: str) -> IndexSource:
+    """
+    Look up a registered source or fail with 404
+
+    Args:
+        name: Source name
+
+    Returns:
+        IndexSource
+
+    Raises:
+        HTTPException: If no source is registered under that name
+    """
+    source = source_registry.get(name)
+    if source is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown index source '{name}'")
+    return source
+
+
+def resolve_lookbacks(series: Optional[TimeSeries], specs: list, method: str) -> dict:
+    """
+    Resolve lookback specs against a source's index history
+
+    Args:
+        series: Index history (None if there is none)
+        specs: Parsed lookback specs
+        method: "nearest" or "linear"
+
+    Returns:
+        Mapping of spec to {"value", "status", "timestamp"} or None
+    """
+    result = {}
+    for spec in specs:
+        match = resolve_lookback(series, spec, method) if series is not None else None
+        if match is None:
+            result[spec] = None
+            continue
+        value = round(match[1])
+        result[spec] = {"value": value, "status": get_status_from_value(value), "timestamp": int(match[0])}
+    return result
+
+
+@router.get("/fear-greed/{source}/history", response_model=HistoryResponse)
+async def get_index_history(
+    source: str,
+    start: Optional[datetime] = Query(None, alias="from", description="Range start (ISO 8601 or unix seconds)"),
+    end: Optional[datetime] = Query(None, alias="to", description="Range end (ISO 8601 or unix seconds)"),
+    resolution: str = Query("auto", description="auto, raw, hour, day or week")
+):
+    """
+    Get stored index history for a time range, downsampled to a resolution
+
+    Args:
+        source: Index source ("stock" or "crypto")
+        start: Range start (default: 30 days before end)
+        end: Range end (default: now)
+        resolution: Downsampling resolution ("auto" targets ~1000 points)
+
+    Returns:
+        HistoryResponse with columnar timestamps and values
+
+    Raises:
+        HTTPException: If the source is unknown or the range is invalid
+    """
+    get_source(source)
+
+    end_ts = to_unix(end) if end else int(datetime.now(timezone.utc).timestamp())
+    start_ts = to_unix(start) if start else end_ts - int(timedelta(days=DEFAULT_HISTORY_DAYS).total_seconds())
+    if start_ts > end_ts:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'from' must not be after 'to'")
+
+    try:
+        result = await asyncio.to_thread(history_store.query, source, start_ts, end_ts, resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    body = encode_json({"source": source, "from": start_ts, "to": end_ts, **result})
+    return Response(content=body, media_type=JSON_MEDIA_TYPE)
+
+
+@router.get("/fear-greed/{source}/series", response_model=SeriesResponse)
+async def get_index_series(
+    source: str,
+    indicator: Optional[str] = Query(None, description="Only return this indicator (default: all)"),
+    start: Optional[datetime] = Query(None, alias="from", description="Range start (ISO 8601 or unix seconds)"),
+    end: Optional[datetime] = Query(None, alias="to", description="Range end (ISO 8601 or unix seconds)")
+):
+    """
+    Get the full upstream history of an index and its sub-indicators
+
+    Series come from the last refresh (the same payload as the index
+    endpoint), so clients need no extra scraping for chart data.
+
+    Args:
+        source: Index source ("stock" or "crypto")
+        indicator: Indicator name filter
+        start: Range start filter
+        end: Range end filter
+
+    Returns:
+        SeriesResponse with columnar series per indicator
+
+    Raises:
+        HTTPException: If the source or indicator is unknown
+    """
+    await get_index_data(get_source(source))
+
+    series = series_store.get(source)
+    if indicator is not None:
+        if indicator not in series:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Unknown indicator '{indicator}' for '{source}'"
+            )
+        series = {indicator: series[indicator]}
+
+    start_ts = to_unix(start) if start else None
+    end_ts = to_unix(end) if end else None
+    body = encode_json({
+        "source": source,
+        "indicators": {name: ts.slice(start_ts, end_ts).to_dict() for name, ts in series.items()}
+    })
+    return Response(content=body, media_type=JSON_MEDIA_TYPE)
+
+
+@router.get("/fear-greed/{source}/analytics", response_model=AnalyticsResponse)
+async def get_index_analytics(
+    request: Request,
+    source: str,
+    window: Optional[str] = Query(None, description="Only return this rolling window, e.g. 30d (default: all)")
+):
+    """
+    Get derived analytics of an index's history
+
+    Rolling mean, volatility and z-score per window, time and regime counts
+    per status band, the current regime and band transition counts. They
+    are updated as new points arrive with each refresh and served
+    pre-encoded, with ETag / Last-Modified validators.
+
+    Args:
+        request: Incoming request
+        source: Index source ("stock" or "crypto")
+        window: Rolling window filter
+
+    Returns:
+        Analytics snapshot for the source
+
+    Raises:
+        HTTPException: If the source or window is unknown, or there is no history yet
+    """
+    index_source = get_source(source)
+    await get_index_data(index_source)
+
+    representation = analytics_store.get(source)
+    if representation is None:
+        await load_series(index_source)
+        representation = analytics_store.get(source)
+    if representation is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No history for '{source}' yet")
+
+    if window is not None:
+        windows = representation.data["windows"]
+        if window not in windows:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"window must be one of {list(windows)}"
+            )
+        representation = representation.variant(("window", window), lambda: {"windows": {window: windows[window]}})
+
+    return build_response(request, representation)
+
+
+def to_unix(value: datetime) -> int:
     """
-    return await get_index_data(CACHE_KEY_CRYPTO, scrape_crypto_fear_greed_index, "Crypto")
+    Convert a datetime to unix seconds, treating naive values as UTC
 
+    Args:
+        value: Datetime to convert
 
-async def get_index_data(cache_key: str, scraper_func, index_name: str):
+    Returns:
+        Unix timestamp in seconds
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+async def get_index_data(source: IndexSource, index_name: Optional[str] = None) -> CachedRepresentation:
     """
     Generic function to fetch index data with caching
 
+    Fresh entries are returned directly. Entries past their TTL but inside the
+    stale window are returned immediately (marked stale) while a single
+    background refresh runs, so no request waits on the upstream.
+
     Args:
-        cache_key: Cache key for this index
-        scraper_func: Async function to scrape data
-        index_name: Name of the index for logging
+        source: Index source
+        index_name: Name of the index for logging (default: source display name)
 
     Returns:
-        FearGreedResponse with current and historical data
+        CachedRepresentation with the encoded response and its validators
 
     Raises:
         HTTPException: If scraping fails
     """
+    index_name = index_name or source.display_name
     try:
         # Check cache first
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            logger.info(f"Returning cached {index_name} data")
+        cached_data, is_stale = await cache.get_with_staleness(source.cache_key)
+        if cached_data and not is_stale:
+            hot_path_log.log(logger, logging.INFO, ("cached", source.name), "Returning cached %s data", index_name)
             return cached_data
 
-        # Cache miss - scrape fresh data
-        logger.info(f"Cache miss - scraping fresh {index_name} data")
-        data = await scraper_func()
-
-        # Validate with Pydantic model
-        response = FearGreedResponse(**data)
-
-        # Cache the response (use model_dump for Pydantic v2)
-        cache.set(cache_key, response.model_dump(), ttl=1800)  # 30 minutes
+        if cached_data:
+            # Serve stale data right away and revalidate in the background
+            hot_path_log.log(
+                logger, logging.INFO, ("stale", source.name),
+                "Returning stale %s data, refreshing in background", index_name
+            )
+            schedule_refresh(source)
+            return cached_data.stale_variant()
 
-        return response
+        # Cache miss - concurrent misses share a single upstream fetch. The
+        # request gives up after the source timeout (the shared fetch goes on).
+        logger.info(f"Cache miss - scraping fresh {index_name} data")
+        deadline = time.monotonic() + source.timeout
+        return await asyncio.wait_for(refresh_index(source, deadline), source.timeout)
 
+    except asyncio.TimeoutError:
+        refresh_errors.inc(source.name, "request")
+        logger.warning(f"Timed out after {source.timeout}s fetching {index_name} Index")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Timed out after {source.timeout}s fetching {index_name} Index data"
+        )
+    except CircuitOpenError as e:
+        refresh_errors.inc(source.name, "request")
+        logger.warning(f"Not fetching {index_name} Index: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Unable to fetch {index_name} Index data",
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
     except ValueError as e:
+        refresh_errors.inc(source.name, "request")
         logger.error(f"Data validation error for {index_name}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to parse {index_name} Index data"
         )
     except Exception as e:
+        refresh_errors.inc(source.name, "request")
         logger.error(f"Error fetching {index_name} Index: {e}")
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"Unable to fetch {index_name} Index data"
         )
+
+
+def schedule_refresh(source: IndexSource) -> None:
+    """
+    Start a background refresh unless one is already running for this source
+
+    Args:
+        source: Index source
+    """
+    if single_flight.in_flight(source.cache_key):
+        return
+
+    task = asyncio.ensure_future(refresh_index(source))
+    _background_refreshes.add(task)
+
+    def _on_done(t: asyncio.Task) -> None:
+        _background_refreshes.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            refresh_errors.inc(source.name, "background")
+            logger.warning(
+                f"Background refresh failed for {source.display_name}, keeping stale data: {t.exception()}"
+            )
+
+    task.add_done_callback(_on_done)
+
+
+async def fetch_and_cache(source: IndexSource, deadline: Optional[float] = None) -> CachedRepresentation:
+    """
+    Scrape fresh index data, validate it and store it in the cache
+
+    Args:
+        source: Index source
+        deadline: time.monotonic() by which a waiting request needs the data
+            (None for background refreshes)
+
+    Returns:
+        CachedRepresentation of the validated response
+    """
+    data = await source.scrape(deadline)
+    series = data.pop("series", None)
+
+    # Validate with Pydantic model once, then cache the encoded bytes
+    response = FearGreedResponse(**data)
+    # Longer while the source's market is closed; also sent as Cache-Control max-age
+    ttl = source.current_ttl()
+    representation = CachedRepresentation.from_model(response, ttl=ttl)
+    await cache.set(source.cache_key, representation, ttl=ttl)
+    publish_update(source, representation)
+    schedule_static_publish()
+
+    if series:
+        store_series(source, series)
+        # Shared so workers that did not scrape can serve lookbacks too
+        await cache.set(series_cache_key(source), series, ttl=ttl)
+    await record_history(source.name, response, series)
+
+    return representation
+
+
+def publish_update(source: IndexSource, representation: CachedRepresentation) -> None:
+    """Notify stream subscribers if the current value or status changed"""
+    current = representation.data["current"]
+    broadcaster.publish(source.name, current["value"], current["status"], current["timestamp"])
+
+
+async def static_documents() -> Dict[str, CachedRepresentation]:
+    """
+    Collect the fresh index documents, keyed by the URL path that serves them
+
+    Returns:
+        Mapping of URL path to representation (sources without fresh data are left out)
+    """
+    documents = {}
+    for source in source_registry:
+        representation = await cache.get(source.cache_key)
+        if representation is not None:
+            documents[f"{router.prefix}/fear-greed/{source.name}"] = representation
+    default = documents.get(f"{router.prefix}/fear-greed/{DEFAULT_SOURCE}")
+    if default is not None:
+        documents[f"{router.prefix}/fear-greed"] = default
+    return documents
+
+
+def schedule_static_publish() -> None:
+    """Publish the static snapshots in the background, so no request waits on compression or file writes"""
+    if not static_publisher.enabled:
+        return
+
+    task = asyncio.ensure_future(publish_static_snapshots())
+    _background_refreshes.add(task)
+
+    def _on_done(t: asyncio.Task) -> None:
+        _background_refreshes.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            static_publisher.errors += 1
+            logger.warning(f"Failed to publish static snapshots: {t.exception()}")
+
+    task.add_done_callback(_on_done)
+
+
+async def publish_static_snapshots() -> None:
+    """
+    Publish the fresh index documents for the reverse proxy (no-op unless configured)
+
+    Also schedules a re-publish for when the earliest published document goes
+    stale, so documents no refresh replaced in time drop out of the snapshots
+    and nginx hands them back to the API.
+    """
+    global _static_expiry, _static_generation
+    if not static_publisher.enabled:
+        return
+    _static_generation += 1
+    generation = _static_generation
+    documents = await static_documents()
+    # Compression and file writes stay off the event loop
+    await asyncio.to_thread(static_publisher.publish, documents, generation)
+
+    if _static_expiry is not None and _static_expiry is not asyncio.current_task():
+        _static_expiry.cancel()
+    _static_expiry = None
+    if documents:
+        expires_at = min(representation.expires_at for representation in documents.values())
+        _static_expiry = asyncio.ensure_future(_expire_static_snapshots(expires_at))
+
+
+async def _expire_static_snapshots(expires_at: float) -> None:
+    """Re-publish once the cache no longer returns a published document as fresh"""
+    # The cache entry expires a moment after the representation it holds
+    await asyncio.sleep(max(0.0, expires_at - time.time()) + STATIC_EXPIRY_GRACE)
+    try:
+        await publish_static_snapshots()
+    except Exception as e:
+        logger.warning(f"Failed to expire static snapshots: {e}")
+
+
+async def start_static_snapshots() -> None:
+    """Write the nginx config fragment and publish what is already cached (no-op unless configured)"""
+    if not static_publisher.enabled:
+        return
+    try:
+        path = static_publisher.write_nginx_config(
+            f"{router.prefix}/fear-greed",
+            # Never longer than the shortest TTL the API sends
+            max_age=min(STATIC_SNAPSHOT_MAX_AGE, *(source.ttl for source in source_registry))
+        )
+    except OSError as e:
+        logger.warning(f"Failed to write nginx config to {static_publisher.directory}: {e}")
+        path = None
+    logger.info(f"Publishing static snapshots to {static_publisher.directory} (nginx config: {path})")
+    await publish_static_snapshots()
+
+
+async def stop_static_snapshots() -> None:
+    """Cancel the pending snapshot expiry"""
+    global _static_expiry
+    if _static_expiry is not None:
+        _static_expiry.cancel()
+        try:
+            await _static_expiry
+        except asyncio.CancelledError:
+            pass
+        _static_expiry = None
+
+
+async def load_series(source: IndexSource):
+    """
+    Get a source's index history, falling back to the copy in the shared cache
+
+    Workers that did not run the last refresh (or started from a cache
+    snapshot) have no local series until they read the shared one.
+
+    Args:
+        source: Index source
+
+    Returns:
+        "fear_and_greed" TimeSeries, or None if there is no history
+    """
+    series = series_store.get(source.name)
+    if not series:
+        series = await cache.get(series_cache_key(source))
+        if series:
+            store_series(source, series)
+    return (series or {}).get("fear_and_greed")
+
+
+def store_series(source: IndexSource, series: dict) -> None:
+    """
+    Keep a source's parsed series and feed its new index points to the analytics
+
+    Args:
+        source: Index source
+        series: Mapping of indicator name to TimeSeries
+    """
+    series_store.set(source.name, series)
+    if "fear_and_greed" in series:
+        analytics_store.update(source.name, series["fear_and_greed"], ttl=source.current_ttl())
+
+
+def series_cache_key(source: IndexSource) -> str:
+    """Cache key of a source's parsed series"""
+    return f"{source.cache_key}:series"
+
+
+async def record_history(source: str, response: FearGreedResponse, series=None) -> None:
+    """
+    Append the scraped current value (and any upstream history) to the history store
+
+    History is best effort: a storage failure never fails the refresh.
+
+    Args:
+        source: Index source name
+        response: Validated FearGreedResponse
+        series: Optional parsed series; its "fear_and_greed" history is backfilled
+    """
+    points = [(to_unix(response.current.timestamp), response.current.value)]
+    if series and "fear_and_greed" in series:
+        history = series["fear_and_greed"]
+        points.extend(zip(history.timestamps, history.values))
+
+    try:
+        await asyncio.to_thread(history_store.append_many, source, points)
+    except Exception as e:
+        logger.warning(f"Failed to record {source} history: {e}")
+
+
+async def refresh_index(source: IndexSource, deadline: Optional[float] = None) -> CachedRepresentation:
+    """
+    Refresh an index cache entry, joining any fetch already in flight
+
+    Args:
+        source: Index source
+        deadline: time.monotonic() by which a waiting request needs the data
+            (None for background refreshes; a joined fetch keeps its own)
+
+    Returns:
+        CachedRepresentation of the validated response
+    """
+    return await single_flight.do(source.cache_key, refresh_with_lock, source, deadline)
+
+
+async def refresh_with_lock(source: IndexSource, deadline: Optional[float] = None) -> CachedRepresentation:
+    """
+    Fetch under the cache backend's lock so only one worker refreshes a key
+
+    Single-flight already coalesces callers inside a process; with a shared
+    cache backend the lock extends that across worker processes and replicas.
+    Workers that lose the lock wait for the holder's result instead of
+    scraping, and fetch directly only if the holder does not deliver in time.
+
+    Args:
+        source: Index source
+        deadline: time.monotonic() by which a waiting request needs the data
+
+    Returns:
+        CachedRepresentation of the validated response
+    """
+    try:
+        token = await cache.acquire_lock(source.cache_key, ttl=REFRESH_LOCK_TTL)
+    except Exception as e:
+        logger.warning(f"Refresh lock unavailable for {source.display_name}, fetching directly: {e}")
+        return await fetch_and_cache(source, deadline)
+
+    if token is None:
+        representation = await wait_for_peer_refresh(source)
+        if representation is not None:
+            return representation
+        logger.warning(f"Peer refresh of {source.display_name} did not finish in time, fetching directly")
+        return await fetch_and_cache(source, deadline)
+
+    try:
+        return await fetch_and_cache(source, deadline)
+    finally:
+        await cache.release_lock(source.cache_key, token)
+
+
+async def wait_for_peer_refresh(source: IndexSource) -> Optional[CachedRepresentation]:
+    """
+    Wait for a fresh entry written by the worker holding the refresh lock
+
+    Args:
+        source: Index source
+
+    Returns:
+        Fresh CachedRepresentation, or None if none appeared within the source timeout
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + source.timeout
+    while True:
+        representation = await cache.get(source.cache_key)
+        if representation is not None:
+            series = await cache.get(series_cache_key(source))
+            if series:
+                store_series(source, series)
+            publish_update(source, representation)
+            return representation
+        if loop.time() >= deadline:
+            return None
+        await asyncio.sleep(PEER_POLL_INTERVAL)
+
+
+def register_refresh_jobs(scheduler) -> None:
+    """
+    Register a pre-warm job for every registered source
+
+    Args:
+        scheduler: RefreshScheduler to register the jobs with
+    """
+    for source in source_registry:
+        scheduler.register(
+            source.name,
+            functools.partial(refresh_index, source),
+            interval=source.ttl * REFRESH_FRACTION,
+            interval_func=functools.partial(refresh_interval, source)
+        )
+
+
+def refresh_interval(source: IndexSource) -> float:
+    """
+    Seconds until a source's next pre-warm: shortly before the entry cached now expires
+
+    With a fixed TTL this is REFRESH_FRACTION of it; while a market is
+    closed the next refresh waits until just before it reopens.
+
+    Args:
+        source: Index source
+
+    Returns:
+        Delay in seconds
+    """
+    return source.current_ttl() - source.ttl * (1 - REFRESH_FRACTION)
@@ -0,0 +1,342 @@
+"""
+Pre-serialized index responses with ETag / Last-Modified validators and
+pre-compressed bodies
+"""
+import hashlib
+import math
+import os
+import sys
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+
+from models.fear_greed import FearGreedResponse
+from utils import cache_codec
+from utils.cache_backends import estimate_size
+from utils.compression import ENCODINGS, compress
+
+JSON_MEDIA_TYPE = "application/json"
+
+# Maximum query-parameter variants memoized per representation
+MAX_VARIANTS = 32
+
+# Bodies smaller than this are always sent uncompressed
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+
+
+def encode_json(data: Dict[str, Any]) -> bytes:
+    """
+    Encode a JSON-compatible dict to compact UTF-8 bytes
+
+    orjson matters for endpoints that encode per request (history, series),
+    since index responses are encoded once. Every ETag derives from these
+    bytes, so there is deliberately no fallback encoder.
+
+    Args:
+        data: Dictionary produced by model_dump(mode="json")
+
+    Returns:
+        Encoded JSON body
+    """
+    return orjson.dumps(data)
+
+
+class CachedRepresentation:
+    """Encoded response body plus validators, computed once per refresh"""
+
+    __slots__ = (
+        "data", "body", "etag", "encoded", "last_modified", "modified_at", "expires_at",
+        "_stale", "_variants", "_memo_bytes"
+    )
+
+    def __init__(self, data: Dict[str, Any], modified_at: float, expires_at: float, compressed: bool = True):
+        """
+        Initialize representation
+
+        Args:
+            data: Validated response data in JSON mode
+            modified_at: Unix time the data was refreshed
+            expires_at: Unix time the data stops being fresh
+            compressed: Pre-compress the body in every available content
+                coding (disable for representations built per request)
+        """
+        self.data = data
+        self.body = encode_json(data)
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=16).hexdigest() + '"'
+        # Content coding -> (compressed body, ETag of that coding)
+        self.encoded: Dict[str, Tuple[bytes, str]] = {}
+        if compressed and len(self.body) >= COMPRESSION_MIN_BYTES:
+            for encoding in ENCODINGS:
+                body = compress(self.body, encoding)
+                if len(body) < len(self.body):
+                    self.encoded[encoding] = (body, f'{self.etag[:-1]}-{encoding}"')
+        self.modified_at = modified_at
+        self.last_modified = formatdate(modified_at, usegmt=True)
+        self.expires_at = expires_at
+        self._stale: Optional["CachedRepresentation"] = None
+        self._variants: Optional[Dict[Hashable, "CachedRepresentation"]] = None
+        # Estimated bytes of the variants memoized directly on this representation
+        self._memo_bytes = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Memoized variants are rebuilt on demand, not persisted or shipped to shared backends
+        return {name: getattr(self, name) for name in self.__slots__ if not name.startswith("_")}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._stale = None
+        self._variants = None
+        self._memo_bytes = 0
+
+    @classmethod
+    def from_model(cls, response: FearGreedResponse, ttl: float) -> "CachedRepresentation":
+        """
+        Build a representation from a validated response model
+
+        Args:
+            response: Validated FearGreedResponse
+            ttl: Seconds until the data stops being fresh
+
+        Returns:
+            CachedRepresentation
+        """
+        now = time.time()
+        return cls(response.model_dump(mode="json"), modified_at=now, expires_at=now + ttl)
+
+    def stale_variant(self) -> "CachedRepresentation":
+        """
+        Get the same data marked stale (encoded once, then reused)
+
+        Returns:
+            CachedRepresentation with stale=true and no remaining freshness
+        """
+        if self._stale is None:
+            self._stale = CachedRepresentation(
+                {**self.data, "stale": True},
+                modified_at=self.modified_at,
+                expires_at=self.modified_at
+            )
+            self._memo_bytes += self._variant_size(self._stale)
+        return self._stale
+
+    def variant(self, key: Hashable, extra: Callable[[], Dict[str, Any]]) -> "CachedRepresentation":
+        """
+        Get this data extended with extra fields, encoded once per key
+
+        Variants share this representation's lifetime, so they are dropped
+        with it on the next refresh.
+
+        Args:
+            key: Hashable variant key (e.g. normalized query parameters)
+            extra: Builds the fields to add; called only on the first request
+
+        Returns:
+            CachedRepresentation with the extra fields
+        """
+        if self._variants is None:
+            self._variants = {}
+
+        representation = self._variants.get(key)
+        if representation is None:
+            if len(self._variants) >= MAX_VARIANTS:
+                # Drop the oldest variant
+                self._memo_bytes -= self._variant_size(self._variants.pop(next(iter(self._variants))))
+            representation = CachedRepresentation(
+                {**self.data, **extra()},
+                modified_at=self.modified_at,
+                expires_at=self.expires_at
+            )
+            self._variants[key] = representation
+            self._memo_bytes += self._variant_size(representation)
+        return representation
+
+    def _variant_size(self, variant: "CachedRepresentation") -> int:
+        """Estimated bytes a variant adds: its bodies and the fields it does not share with this data"""
+        own = [value for name, value in variant.data.items() if self.data.get(name) is not value]
+        return (
+            sys.getsizeof(variant) + sys.getsizeof(variant.data) + estimate_size(own)
+            + sys.getsizeof(variant.body) + sum(sys.getsizeof(body) for body, _ in variant.encoded.values())
+        )
+
+    @property
+    def memoized_bytes(self) -> int:
+        """Estimated bytes held by memoized variants (and their own variants), for cache accounting"""
+        total = self._memo_bytes
+        if self._stale is not None:
+            total += self._stale.memoized_bytes
+        if self._variants:
+            total += sum(variant.memoized_bytes for variant in self._variants.values())
+        return total
+
+    def max_age(self, now: Optional[float] = None) -> int:
+        """
+        Seconds of freshness left, for Cache-Control
+
+        Args:
+            now: Current unix time (defaults to time.time())
+
+        Returns:
+            Non-negative remaining TTL in whole seconds
+        """
+        now = time.time() if now is None else now
+        return max(0, math.floor(self.expires_at - now))
+
+
+def _encode_representation(representation: CachedRepresentation) -> Tuple[Dict[str, Any], List[bytes]]:
+    """Shared-cache form: validators and data as JSON, body and compressed bodies as blobs"""
+    state = {
+        "data": representation.data,
+        "etag": representation.etag,
+        "last_modified": representation.last_modified,
+        "modified_at": representation.modified_at,
+        "expires_at": representation.expires_at,
+        "encoded": {encoding: etag for encoding, (_, etag) in representation.encoded.items()}
+    }
+    return state, [representation.body] + [body for body, _ in representation.encoded.values()]
+
+
+def _decode_representation(state: Dict[str, Any], blobs: List[bytes]) -> CachedRepresentation:
+    """Rebuild a representation from its shared-cache form without re-encoding or recompressing"""
+    body, *compressed = blobs
+    representation = CachedRepresentation.__new__(CachedRepresentation)
+    representation.__setstate__({
+        "data": state["data"],
+        "body": body,
+        "etag": state["etag"],
+        "encoded": {encoding: (blob, etag) for (encoding, etag), blob in zip(state["encoded"].items(), compressed)},
+        "last_modified": state["last_modified"],
+        "modified_at": state["modified_at"],
+        "expires_at": state["expires_at"]
+    })
+    return representation
+
+
+cache_codec.register(
+    "representation",
+    lambda value: isinstance(value, CachedRepresentation),
+    _encode_representation,
+    _decode_representation
+)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _not_modified_since(if_modified_since: str, modified_at: float) -> bool:
+    """Check an If-Modified-Since header against the modification time"""
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have one-second resolution
+    return int(modified_at) <= since
+
+
+@lru_cache(maxsize=256)
+def select_encoding(accept_encoding: str, available: Tuple[str, ...]) -> Optional[str]:
+    """
+    Pick a content coding from an Accept-Encoding header
+
+    The highest q-value wins; ties go to the earliest available coding.
+    Results are memoized, since clients send a handful of distinct headers.
+
+    Args:
+        accept_encoding: Accept-Encoding header value
+        available: Codings the body is available in, most preferred first
+
+    Returns:
+        Chosen coding, or None to send the body uncompressed
+    """
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        name = name.strip()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_not_modified(request: Request, representation: CachedRepresentation, etag: Optional[str] = None) -> bool:
+    """
+    Evaluate conditional request headers
+
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110).
+
+    Args:
+        request: Incoming request
+        representation: Representation that would be sent
+        etag: ETag of the content coding being sent (default: uncompressed)
+
+    Returns:
+        True if a 304 Not Modified should be sent
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag or representation.etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        return _not_modified_since(if_modified_since, representation.modified_at)
+
+    return False
+
+
+def build_response(request: Request, representation: CachedRepresentation) -> Response:
+    """
+    Build the HTTP response for a cached representation
+
+    Args:
+        request: Incoming request (for conditional headers)
+        representation: Representation to send
+
+    Returns:
+        200 with the pre-encoded body (pre-compressed if the client accepts
+        one of its codings), or 304 with validators only
+    """
+    body, etag = representation.body, representation.etag
+    headers = {
+        "Last-Modified": representation.last_modified,
+        "Cache-Control": f"public, max-age={representation.max_age()}"
+    }
+    if representation.encoded:
+        headers["Vary"] = "Accept-Encoding"
+        accept_encoding = request.headers.get("accept-encoding")
+        encoding = select_encoding(accept_encoding, tuple(representation.encoded)) if accept_encoding else None
+        if encoding is not None:
+            body, etag = representation.encoded[encoding]
+            headers["Content-Encoding"] = encoding
+    headers["ETag"] = etag
+
+    if is_not_modified(request, representation, etag):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,229 @@
+"""
+Static snapshots of the index documents for a reverse proxy to serve
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Optional
+
+from api.representation import CachedRepresentation
+from utils.compression import ENCODINGS, compress
+
+logger = logging.getLogger(__name__)
+
+# Directory the snapshots are published to ("" disables publishing)
+STATIC_SNAPSHOT_DIR = os.getenv("STATIC_SNAPSHOT_DIR", "")
+# Published versions kept on disk (older ones are removed)
+STATIC_SNAPSHOT_KEEP = int(os.getenv("STATIC_SNAPSHOT_KEEP", "3"))
+# Where nginx forwards requests it cannot answer from the snapshots
+STATIC_BACKEND_URL = os.getenv("STATIC_BACKEND_URL", "http://127.0.0.1:8000")
+# Seconds clients may reuse a snapshot before revalidating with nginx
+STATIC_SNAPSHOT_MAX_AGE = int(os.getenv("STATIC_SNAPSHOT_MAX_AGE", "60"))
+
+# File suffix per content coding, as expected by nginx gzip_static / brotli_static
+_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+NGINX_TEMPLATE = """\
+# Generated by the Fear & Greed Index API on startup; do not edit.
+# Include inside a server block:  include {config_path};
+#
+# Parameterless GET/HEAD requests for published documents are answered from
+# the snapshot files; everything else (query strings, history, stream,
+# unpublished sources) goes to the API.
+#
+# Staleness: the API re-publishes when a published document's TTL (which
+# follows market hours) runs out, leaving out documents that were not
+# refreshed. Their paths then fall through to the API, which serves them
+# with "stale": true and its own Cache-Control while refreshing. Clients
+# get a short max-age here and revalidate (If-Modified-Since against the
+# file mtime), so they never keep a snapshot longer than the API would.
+location {location} {{
+    error_page 418 = @fear_greed_api;
+    if ($args != "") {{ return 418; }}
+    if ($request_method !~ ^(GET|HEAD)$) {{ return 418; }}
+
+    root {root};
+    default_type application/json;
+    gzip_static on;
+    # brotli_static on;  # requires the ngx_brotli module
+    add_header Vary Accept-Encoding;
+    # Short and fixed: the API expires snapshots, nginx only revalidates
+    expires {max_age}s;
+    try_files $uri.json @fear_greed_api;
+}}
+
+location @fear_greed_api {{
+    proxy_pass {backend};
+    proxy_http_version 1.1;
+    proxy_set_header Host $host;
+    proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+    proxy_set_header X-Forwarded-Proto $scheme;
+    # Server-sent events must not be buffered
+    proxy_buffering off;
+}}
+"""
+
+
+class StaticPublisher:
+    """
+    Writes versioned snapshots of pre-encoded documents, plus an nginx config serving them
+
+    Every publish writes all documents (plain, and pre-compressed in each
+    available coding) to a new version directory, then repoints the
+    "current" symlink at it with an atomic rename, so the proxy never sees
+    a partially written version. Worker processes sharing the directory
+    name versions after their pid and prune only their own.
+    """
+
+    def __init__(
+        self,
+        directory: str = STATIC_SNAPSHOT_DIR,
+        keep: int = STATIC_SNAPSHOT_KEEP,
+        backend_url: str = STATIC_BACKEND_URL
+    ):
+        """
+        Initialize publisher
+
+        Args:
+            directory: Snapshot directory ("" disables publishing)
+            keep: Number of versions kept on disk
+            backend_url: API address nginx falls back to
+        """
+        self.directory = directory or None
+        self.keep = max(1, keep)
+        self.backend_url = backend_url
+        self.published = 0
+        self.errors = 0
+        self.version: Optional[str] = None
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a snapshot directory is configured"""
+        return self.directory is not None
+
+    @property
+    def current_path(self) -> str:
+        """Symlink to the live version; the proxy's document root"""
+        return os.path.join(self.directory, "current")
+
+    def publish(self, documents: Dict[str, CachedRepresentation], generation: Optional[int] = None) -> Optional[str]:
+        """
+        Publish a new version
+
+        Args:
+            documents: Mapping of URL path (e.g. "/api/v1/fear-greed/stock")
+                to its representation
+            generation: Increasing number of the collected documents; a
+                publish older than the last one is skipped, so overlapping
+                publishes never bring back older documents
+
+        Returns:
+            Version name, or None if publishing is disabled, skipped or failed
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            with self._lock:
+                if generation is not None:
+                    if generation <= self.generation:
+                        return None
+                    self.generation = generation
+                return self._write_version(documents)
+        except OSError as e:
+            # The previous version stays live
+            self.errors += 1
+            logger.warning(f"Failed to publish static snapshots to {self.directory}: {e}")
+            return None
+
+    def _write_version(self, documents: Dict[str, CachedRepresentation]) -> str:
+        """Write a version directory and make it live"""
+        versions = os.path.join(self.directory, "versions")
+        os.makedirs(versions, exist_ok=True)
+        # Names sort in publish order; the pid keeps workers' names apart
+        version = f"{time.time_ns() // 1_000_000:015d}-{os.getpid()}-{self.published:06d}"
+        target = os.path.join(versions, version)
+        os.makedirs(target)
+
+        for url_path, representation in documents.items():
+            base = os.path.join(target, url_path.strip("/")) + ".json"
+            os.makedirs(os.path.dirname(base), exist_ok=True)
+            bodies = {"": representation.body}
+            for encoding in ENCODINGS:
+                # Reuse the bodies compressed at refresh time; small bodies are compressed here
+                encoded = representation.encoded.get(encoding)
+                bodies[_SUFFIXES[encoding]] = encoded[0] if encoded else compress(representation.body, encoding)
+            for suffix, body in bodies.items():
+                with open(base + suffix, "wb") as f:
+                    f.write(body)
+                # Last-Modified and the expiry nginx sends count from the refresh time
+                os.utime(base + suffix, (representation.modified_at, representation.modified_at))
+
+        # Atomically repoint "current" at the new version
+        link = os.path.join(self.directory, f".current-{version}")
+        os.symlink(os.path.join("versions", version), link)
+        os.replace(link, self.current_path)
+
+        self.version = version
+        self.published += 1
+        self._prune(versions, version)
+        return version
+
+    def _prune(self, versions: str, current: str) -> None:
+        """Remove all but this worker's newest versions (other workers' versions are theirs to prune)"""
+        own = f"-{os.getpid()}-"
+        names = sorted(name for name in os.listdir(versions) if own in name)
+        for name in names[:-self.keep]:
+            if name != current:
+                shutil.rmtree(os.path.join(versions, name), ignore_errors=True)
+
+    def write_nginx_config(self, location: str, max_age: int = STATIC_SNAPSHOT_MAX_AGE) -> Optional[str]:
+        """
+        Write the nginx config fragment serving the snapshots
+
+        Args:
+            location: URL prefix to serve (e.g. "/api/v1/fear-greed")
+            max_age: Seconds clients may reuse a snapshot before revalidating
+
+        Returns:
+            Path of the fragment, or None if publishing is disabled
+        """
+        if not self.enabled:
+            return None
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(os.path.abspath(self.directory), "fear-greed.nginx.conf")
+        config = NGINX_TEMPLATE.format(
+            config_path=path,
+            location=location,
+            root=os.path.abspath(self.current_path),
+            max_age=max_age,
+            backend=self.backend_url
+        )
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(config)
+        os.replace(tmp_path, path)
+        return path
+
+    def get_stats(self) -> Dict[str, object]:
+        """
+        Get publisher statistics
+
+        Returns:
+            Dictionary with directory, live version, publish and error counts
+        """
+        return {
+            'directory': self.directory,
+            'version': self.version,
+            'published': self.published,
+            'errors': self.errors
+        }
+
+
+# Global publisher instance
+static_publisher = StaticPublisher()
@@ -0,0 +1,312 @@
+"""
+Load test: API hot paths against local stub upstreams
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_api [--requests 1000] [--concurrency 20]
+        [--latency 0.05] [--failure-rate 0] [--scenarios cached_hit,cold_miss]
+        [--output results.json] [--compare previous.json]
+
+Drives the FastAPI app in-process through httpx's ASGI transport, with the
+CNN and Alternative.me scrapers pointed at a StubUpstream (configurable
+latency and failure rate). Scenarios:
+
+    cached_hit     fresh cache entries, no upstream traffic
+    cold_miss      cache cleared before every request, one at a time
+    expiry_storm   entries hard-expired, then a burst of concurrent requests
+    stale_outage   upstream failing, TTL-expired entries served stale
+    cold_outage    upstream failing with nothing cached
+
+Each scenario reports throughput, p50/p99 latency, response status counts
+and the number of upstream requests it caused. Results are printed as
+JSON; --output saves them with the commit they were measured on and
+--compare reports the change against an earlier results file.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Keep the benchmark's history and cache snapshots out of the working tree
+os.environ.setdefault("HISTORY_DB_PATH", ":memory:")
+os.environ.setdefault("CACHE_SNAPSHOT_PATH", "")
+os.environ.setdefault("CACHE_BACKEND", "memory")
+
+import httpx  # noqa: E402
+
+from benchmarks.stub_upstream import CNN_PATH, CRYPTO_PATH, StubUpstream  # noqa: E402
+from main import app  # noqa: E402
+from scrapers import cnn_scraper, crypto_scraper  # noqa: E402
+from scrapers.registry import source_registry  # noqa: E402
+from utils.cache import cache  # noqa: E402
+from utils.circuit_breaker import circuit_breakers  # noqa: E402
+from utils.http_client import http_clients  # noqa: E402
+from utils.single_flight import single_flight  # noqa: E402
+
+# Endpoints exercised by every scenario, one per built-in source
+PATHS = ("/api/v1/fear-greed", "/api/v1/fear-greed/crypto")
+
+# Metrics compared by --compare, and whether higher is better
+COMPARED = {"throughput_rps": True, "p50_ms": False, "p99_ms": False}
+
+
+def _summary(latencies: List[float], statuses: Counter, elapsed: float) -> Dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "status": dict(sorted(statuses.items()))
+    }
+
+
+def point_scrapers_at(stub: StubUpstream) -> None:
+    """Send the built-in scrapers' upstream requests to the stub server"""
+    cnn_scraper.CNN_API_URL = stub.base_url + CNN_PATH
+    crypto_scraper.CRYPTO_API_URL = stub.base_url + CRYPTO_PATH
+
+
+async def expire_entries(stale: bool) -> None:
+    """
+    Move every source's cache entry past its TTL
+
+    Args:
+        stale: Keep the entry inside its stale window (served stale) instead
+            of expiring it outright
+    """
+    now = time.time()
+    for source in source_registry:
+        entry = await cache.backend.get(source.cache_key)
+        if entry is None:
+            continue
+        entry.expiry = now - 1
+        if not stale:
+            entry.stale_until = now - 1
+        await cache.backend.set(source.cache_key, entry)
+
+
+async def settle() -> None:
+    """Wait for background refreshes started by a scenario to finish"""
+    while single_flight.get_stats()["in_flight"]:
+        await asyncio.sleep(0.01)
+
+
+async def send_requests(
+    client: httpx.AsyncClient,
+    n: int,
+    concurrency: int,
+    before_each: Optional[Callable[[], Awaitable[None]]] = None
+) -> Tuple[List[float], Counter]:
+    """
+    Send n requests across PATHS from concurrency workers
+
+    Args:
+        client: Client bound to the app
+        n: Total number of requests
+        concurrency: Number of concurrent workers
+        before_each: Awaited before every request (e.g. to clear the cache)
+
+    Returns:
+        Tuple of (per-request latencies in seconds, response status counts)
+    """
+    latencies = []
+    statuses = Counter()
+    counter = itertools.count()
+
+    async def worker() -> None:
+        for i in counter:
+            if i >= n:
+                return
+            if before_each is not None:
+                await before_each()
+            start = time.perf_counter()
+            response = await client.get(PATHS[i % len(PATHS)])
+            latencies.append(time.perf_counter() - start)
+            statuses[str(response.status_code)] += 1
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies, statuses
+
+
+async def run_requests(client: httpx.AsyncClient, n: int, concurrency: int, **kwargs) -> Dict:
+    """Send requests (see send_requests) and summarize them"""
+    start = time.perf_counter()
+    latencies, statuses = await send_requests(client, n, concurrency, **kwargs)
+    return _summary(latencies, statuses, time.perf_counter() - start)
+
+
+async def prime(client: httpx.AsyncClient, stub: StubUpstream) -> None:
+    """Fill the cache from a healthy upstream"""
+    failure_rate, stub.failure_rate = stub.failure_rate, 0.0
+    await cache.clear()
+    for path in PATHS:
+        (await client.get(path)).raise_for_status()
+    stub.failure_rate = failure_rate
+
+
+async def bench_cached_hit(client, stub, args) -> Dict:
+    return await run_requests(client, args.requests, args.concurrency)
+
+
+async def bench_cold_miss(client, stub, args) -> Dict:
+    await cache.clear()
+    return await run_requests(client, args.cold_requests, 1, before_each=cache.clear)
+
+
+async def bench_expiry_storm(client, stub, args) -> Dict:
+    latencies = []
+    statuses = Counter()
+    start = time.perf_counter()
+    for _ in range(args.bursts):
+        # Every request in the burst arrives while the entries are expired
+        await expire_entries(stale=False)
+        burst_latencies, burst_statuses = await send_requests(client, args.concurrency, args.concurrency)
+        latencies.extend(burst_latencies)
+        statuses.update(burst_statuses)
+    return _summary(latencies, statuses, time.perf_counter() - start)
+
+
+async def bench_stale_outage(client, stub, args) -> Dict:
+    await expire_entries(stale=True)
+    stub.failure_rate = 1.0
+    return await run_requests(client, args.requests, args.concurrency)
+
+
+async def bench_cold_outage(client, stub, args) -> Dict:
+    await cache.clear()
+    stub.failure_rate = 1.0
+    return await run_requests(client, args.requests, args.concurrency)
+
+
+# Scenario -> (starts from a primed cache, benchmark)
+BENCHMARKS = {
+    "cached_hit": (True, bench_cached_hit),
+    "cold_miss": (False, bench_cold_miss),
+    "expiry_storm": (True, bench_expiry_storm),
+    "stale_outage": (True, bench_stale_outage),
+    "cold_outage": (False, bench_cold_outage)
+}
+
+
+def git_revision() -> Optional[str]:
+    """Commit the results were measured on (suffixed with -dirty for local changes)"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True)
+        return commit + ("-dirty" if dirty.stdout.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict, previous: Dict) -> Dict:
+    """
+    Change of the headline metrics against an earlier results file
+
+    Args:
+        current: Results of this run
+        previous: Results loaded from --compare
+
+    Returns:
+        Per scenario and metric: before, after and change in percent
+        (positive means better)
+    """
+    changes = {}
+    for name, result in current["scenarios"].items():
+        before = previous.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        changes[name] = {}
+        for metric, higher_is_better in COMPARED.items():
+            if not before.get(metric) or metric not in result:
+                continue
+            change = (result[metric] / before[metric] - 1) * 100
+            changes[name][metric] = {
+                "before": before[metric],
+                "after": result[metric],
+                "change_pct": round(change if higher_is_better else -change, 2)
+            }
+    return {"baseline_revision": previous.get("revision"), "scenarios": changes}
+
+
+async def main(args) -> Dict:
+    results = {
+        "revision": git_revision(),
+        "measured_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "requests": args.requests,
+            "cold_requests": args.cold_requests,
+            "bursts": args.bursts,
+            "concurrency": args.concurrency,
+            "latency": args.latency,
+            "failure_rate": args.failure_rate
+        },
+        "scenarios": {}
+    }
+
+    with StubUpstream(latency=args.latency, failure_rate=args.failure_rate) as stub:
+        point_scrapers_at(stub)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            try:
+                for name in args.scenarios:
+                    primed, benchmark = BENCHMARKS[name]
+                    stub.failure_rate = args.failure_rate
+                    circuit_breakers.reset()
+                    if primed:
+                        await prime(client, stub)
+                    upstream_before = stub.requests
+                    result = await benchmark(client, stub, args)
+                    await settle()
+                    result["upstream_requests"] = stub.requests - upstream_before
+                    results["scenarios"][name] = result
+            finally:
+                await cache.clear()
+                await http_clients.aclose()
+
+    return results
+
+
+def parse_scenarios(value: str) -> List[str]:
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(BENCHMARKS))
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown scenarios: {', '.join(unknown)}")
+    return names
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=1000, help="requests per warm/outage scenario")
+    parser.add_argument("--cold-requests", type=int, default=50, help="requests in the cold_miss scenario")
+    parser.add_argument("--bursts", type=int, default=20, help="bursts in the expiry_storm scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub upstream latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of upstream requests failing")
+    parser.add_argument("--scenarios", type=parse_scenarios, default=list(BENCHMARKS))
+    parser.add_argument("--output", help="save results to this JSON file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    results = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            results["comparison"] = compare(results, json.load(f))
+    print(json.dumps(results, indent=2))
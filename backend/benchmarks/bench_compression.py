@@ -0,0 +1,153 @@
+"""
+Benchmark: CPU per request and bytes on the wire, per-request vs pre-compressed responses
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_compression [--requests 2000] [--rounds 7] [--lookbacks 365]
+
+Serves cached documents in-process (no sockets) through build_response:
+
+    identity            no Accept-Encoding: uncompressed body
+    gzip_per_request    Starlette's GZipMiddleware compressing every response
+                        (what a compression middleware would cost)
+    gzip_precompressed  body compressed once when the representation is built
+    br_precompressed    same with brotli
+
+for two documents: the plain index response and the index extended with a
+year of daily lookbacks (the size history-style payloads reach). CPU time is
+process time per request; wire bytes are response headers plus body.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from fastapi import FastAPI, Request
+from starlette.middleware.gzip import GZipMiddleware
+
+from api.representation import COMPRESSION_MIN_BYTES, CachedRepresentation, build_response
+from benchmarks.bench_fast_path import SAMPLE
+
+
+def documents(lookbacks: int) -> dict:
+    """Documents to serve, keyed by name"""
+    extended = {
+        **SAMPLE,
+        "lookbacks": {
+            f"{days}d": {"value": round(50 + 40 * ((days * 37) % 100 - 50) / 50, 2), "status": "Neutral",
+                         "timestamp": "2024-01-02T00:00:00Z"}
+            for days in range(1, lookbacks + 1)
+        }
+    }
+    return {"index": SAMPLE, f"lookbacks_{lookbacks}": extended}
+
+
+def make_app(representations: dict) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/doc/{name}")
+    async def doc(request: Request, name: str):
+        return build_response(request, representations[name])
+
+    return app
+
+
+def make_scope(path: str, accept_encoding: str = None) -> dict:
+    headers = [(b"host", b"bench"), (b"accept", b"application/json")]
+    if accept_encoding:
+        headers.append((b"accept-encoding", accept_encoding.encode()))
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 50000),
+    }
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+class WireCounter:
+    """ASGI send callable counting response bytes"""
+
+    def __init__(self):
+        self.bytes = 0
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            if message["status"] != 200:
+                raise RuntimeError(f"Unexpected status {message['status']}")
+            # Status line plus "name: value\r\n" per header
+            self.bytes += 17 + sum(len(k) + len(v) + 4 for k, v in message["headers"])
+        elif message["type"] == "http.response.body":
+            self.bytes += len(message.get("body", b""))
+
+
+async def run_round(asgi_app, scope: dict, n: int) -> tuple:
+    """Serve n requests; returns (CPU microseconds per request, wire bytes per request)"""
+    counter = WireCounter()
+    start = time.process_time()
+    for _ in range(n):
+        await asgi_app(dict(scope), _receive, counter)
+    return (time.process_time() - start) / n * 1e6, counter.bytes / n
+
+
+async def main(n: int, rounds: int, lookbacks: int) -> dict:
+    now = time.time()
+    docs = documents(lookbacks)
+    representations = {name: CachedRepresentation(data, now, now + 3600) for name, data in docs.items()}
+    precompressed = make_app(representations)
+    # The middleware compresses bodies of at least the same minimum size on every request
+    per_request = GZipMiddleware(
+        make_app({name: CachedRepresentation(data, now, now + 3600, compressed=False) for name, data in docs.items()}),
+        minimum_size=COMPRESSION_MIN_BYTES
+    )
+
+    results = {"requests_per_round": n, "rounds": rounds, "min_bytes": COMPRESSION_MIN_BYTES}
+    for name in docs:
+        path = f"/doc/{name}"
+        variants = {
+            "identity": (precompressed, make_scope(path)),
+            "gzip_per_request": (per_request, make_scope(path, "gzip")),
+            "gzip_precompressed": (precompressed, make_scope(path, "gzip")),
+            "br_precompressed": (precompressed, make_scope(path, "br"))
+        }
+
+        for asgi_app, scope in variants.values():
+            await run_round(asgi_app, scope, 100)
+
+        samples = {variant: [] for variant in variants}
+        wire = {}
+        for i in range(rounds):
+            names = list(variants)
+            names = names[i % len(names):] + names[:i % len(names)]
+            for variant in names:
+                cpu_us, wire[variant] = await run_round(*variants[variant], n)
+                samples[variant].append(cpu_us)
+
+        doc_results = {"body_bytes": len(representations[name].body)}
+        for variant, cpu in samples.items():
+            doc_results[variant] = {"cpu_us_per_request": round(statistics.median(cpu), 1), "wire_bytes": round(wire[variant])}
+        doc_results["cpu_saved_vs_per_request"] = round(
+            doc_results["gzip_per_request"]["cpu_us_per_request"] / doc_results["gzip_precompressed"]["cpu_us_per_request"], 2
+        )
+        results[name] = doc_results
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--lookbacks", type=int, default=365)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.requests, args.rounds, args.lookbacks)), indent=2))
@@ -0,0 +1,155 @@
+"""
+Benchmark: requests/sec on the cached-hit path, before and after the lean fast path
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_fast_path [--requests 2000] [--rounds 15]
+
+Calls ASGI apps in-process (no sockets) for a cached crypto index hit:
+
+    response_model   cached model serialized through response_model on every
+                     hit (the original endpoint)
+    declared_params  lookback/method declared as FastAPI query parameters,
+                     pre-encoded body (the endpoint before the fast path)
+    fast_path        the app's endpoint: parameters read from the request,
+                     pre-encoded body, no models constructed
+
+Metrics recording is disabled so only the endpoint paths differ.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+from typing import Optional
+
+from fastapi import FastAPI, Query, Request
+from fastapi.middleware.cors import CORSMiddleware
+
+from api.fear_greed import CACHE_KEY_CRYPTO, get_index_data
+from api.representation import CachedRepresentation, build_response
+from main import app
+from models.fear_greed import FearGreedResponse
+from scrapers.registry import source_registry
+from utils.cache import cache
+from utils.metrics import metrics
+
+SAMPLE = {
+    "current": {"value": 42, "status": "Fear", "timestamp": "2024-01-02T00:00:00Z"},
+    "historical": {
+        "previous_close": {"value": 40, "status": "Fear"},
+        "one_week_ago": {"value": 35, "status": "Fear"},
+        "one_month_ago": {"value": 55, "status": "Neutral"},
+        "one_year_ago": {"value": 70, "status": "Greed"}
+    },
+    "source_url": "https://alternative.me/crypto/fear-and-greed-index/",
+    "last_scraped": "2024-01-02T00:00:00Z"
+}
+
+PATH = "/api/v1/fear-greed/crypto"
+
+
+def reference_app(model: FearGreedResponse) -> FastAPI:
+    """Endpoints shaped like the earlier implementations of the index route"""
+    reference = FastAPI()
+    # Same middleware as the app, so only the endpoint paths differ
+    reference.add_middleware(
+        CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"]
+    )
+
+    @reference.get("/response-model/{source}", response_model=FearGreedResponse)
+    async def response_model_endpoint(source: str):
+        return model
+
+    @reference.get("/declared-params/{source}", response_model=FearGreedResponse)
+    async def declared_params_endpoint(
+        request: Request,
+        source: str,
+        lookback: Optional[str] = Query(None),
+        method: str = Query("nearest")
+    ):
+        representation = await get_index_data(source_registry.get(source))
+        return build_response(request, representation)
+
+    return reference
+
+
+def make_scope(path: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"accept", b"application/json")],
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 50000),
+    }
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    if message["type"] == "http.response.start" and message["status"] != 200:
+        raise RuntimeError(f"Unexpected status {message['status']}")
+
+
+async def run_round(asgi_app, scope: dict, n: int) -> float:
+    """Serve n requests; returns requests per second"""
+    start = time.perf_counter()
+    for _ in range(n):
+        await asgi_app(dict(scope), _receive, _send)
+    return n / (time.perf_counter() - start)
+
+
+async def main(n: int, rounds: int) -> dict:
+    model = FearGreedResponse(**SAMPLE)
+    await cache.set(CACHE_KEY_CRYPTO, CachedRepresentation.from_model(model, ttl=3600), ttl=3600)
+    reference = reference_app(model)
+    variants = {
+        "response_model": (reference, make_scope("/response-model/crypto")),
+        "declared_params": (reference, make_scope("/declared-params/crypto")),
+        "fast_path": (app, make_scope(PATH))
+    }
+
+    metrics.enabled = False
+    try:
+        for asgi_app, scope in variants.values():
+            await run_round(asgi_app, scope, 200)
+
+        samples = {name: [] for name in variants}
+        for i in range(rounds):
+            # Rotate the order so drift is spread across variants
+            names = list(variants)
+            names = names[i % len(names):] + names[:i % len(names)]
+            for name in names:
+                samples[name].append(await run_round(*variants[name], n))
+    finally:
+        metrics.enabled = True
+
+    results = {"requests_per_round": n, "rounds": rounds}
+    for name, rates in samples.items():
+        results[name] = {
+            "median_rps": round(statistics.median(rates)),
+            "best_rps": round(max(rates))
+        }
+    for name in ("response_model", "declared_params"):
+        results[f"speedup_vs_{name}"] = round(
+            results["fast_path"]["median_rps"] / results[name]["median_rps"], 2
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=15)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    print(json.dumps(asyncio.run(main(args.requests, args.rounds)), indent=2))
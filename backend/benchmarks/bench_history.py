@@ -0,0 +1,70 @@
+"""
+Benchmark: history range query latency over several years of data
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_history [--years 5] [--interval 1440]
+
+Fills a temporary store with one point per interval (default: every 24
+minutes, the scheduled refresh cadence) and times range queries.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from utils.history_store import HistoryStore
+
+DAY = 86400
+
+
+def main(years: int, interval: int, repeats: int = 50) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(os.path.join(tmp, "history.db"))
+        end = int(time.time())
+        start = end - years * 365 * DAY
+
+        rng = random.Random(1)
+        value = 50.0
+        points = []
+        for ts in range(start, end, interval):
+            value = min(100.0, max(0.0, value + rng.uniform(-1, 1)))
+            points.append((ts, round(value, 2)))
+
+        load_start = time.perf_counter()
+        store.append_many("stock", points)
+        load_seconds = time.perf_counter() - load_start
+
+        results = {}
+        cases = {
+            "all_years_auto": (start, end, "auto"),
+            "one_year_day": (end - 365 * DAY, end, "day"),
+            "one_month_hour": (end - 30 * DAY, end, "hour"),
+            "one_day_raw": (end - DAY, end, "raw"),
+        }
+        for name, (lo, hi, resolution) in cases.items():
+            samples = []
+            for _ in range(repeats):
+                t = time.perf_counter()
+                result = store.query("stock", lo, hi, resolution)
+                samples.append(time.perf_counter() - t)
+            samples.sort()
+            results[name] = {
+                "resolution": result["resolution"],
+                "points": len(result["timestamps"]),
+                "p50_ms": round(statistics.median(samples) * 1000, 3),
+                "max_ms": round(samples[-1] * 1000, 3)
+            }
+
+        store.close()
+        return {"stored_points": len(points), "load_seconds": round(load_seconds, 2), "queries": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--interval", type=int, default=1440, help="Seconds between stored points")
+    args = parser.parse_args()
+    print(json.dumps(main(args.years, args.interval), indent=2))
@@ -0,0 +1,78 @@
+"""
+Microbenchmark: cold (client per call) vs warm (shared pooled client) fetch latency
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_http_client [--requests 200]
+
+Runs against a local stub server, so it shows TCP connect and client setup
+cost only; DNS and TLS handshakes against real upstreams add more on top.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from benchmarks.stub_upstream import CRYPTO_PATH, StubUpstream
+from utils.http_client import UpstreamClients
+
+
+def _summary(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p99_ms": round(samples[int(len(samples) * 0.99) - 1] * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3)
+    }
+
+
+async def bench_cold(url: str, n: int) -> list:
+    """Previous scraper behaviour: a new AsyncClient for every fetch"""
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        async with httpx.AsyncClient(timeout=15.0) as client:
+            response = await client.get(url)
+            response.raise_for_status()
+            response.json()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def bench_warm(url: str, n: int) -> tuple:
+    """Shared pooled client reusing keep-alive connections"""
+    clients = UpstreamClients()
+    samples = []
+    try:
+        for _ in range(n):
+            start = time.perf_counter()
+            response = await clients.get_client(url).get(url)
+            response.raise_for_status()
+            response.json()
+            samples.append(time.perf_counter() - start)
+        return samples, clients.get_stats()
+    finally:
+        await clients.aclose()
+
+
+async def main(n: int) -> dict:
+    with StubUpstream() as stub:
+        url = stub.base_url + CRYPTO_PATH
+        cold = await bench_cold(url, n)
+        warm, pool_stats = await bench_warm(url, n)
+        return {
+            "requests": n,
+            "cold": _summary(cold),
+            "warm": _summary(warm),
+            "upstream_connections": stub.connections,
+            "pool": pool_stats
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.requests)), indent=2))
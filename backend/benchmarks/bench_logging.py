@@ -0,0 +1,138 @@
+"""
+Benchmark: requests/sec on the cached-hit path under different logging setups
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_logging [--requests 2000] [--rounds 15]
+
+Calls the app in-process (no sockets) for a cached crypto index hit, with
+log records going to a temporary file and (in place of the console) to
+os.devnull:
+
+    sync_every_hit    FileHandler + StreamHandler on the root logger, every
+                      hit logged at INFO (the original setup)
+    queued_every_hit  records queued to the background writer (JSON lines,
+                      rotating file), every hit logged
+    queued_sampled    queued writer with hot-path sampling (the app's setup)
+
+Metrics recording is disabled so only the logging setups differ.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import logging.handlers
+import os
+import statistics
+import tempfile
+
+from benchmarks.bench_fast_path import PATH, SAMPLE, make_scope, run_round
+from api.fear_greed import CACHE_KEY_CRYPTO
+from api.representation import CachedRepresentation
+from main import app
+from models.fear_greed import FearGreedResponse
+from utils.cache import cache
+from utils.logging_config import JSONFormatter, TEXT_FORMAT, configure_logging, hot_path_log, stop_listener
+from utils.metrics import metrics
+
+
+def sync_handlers(directory: str, console) -> list:
+    handlers = [logging.FileHandler(os.path.join(directory, "sync.log")), logging.StreamHandler(console)]
+    for handler in handlers:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    return handlers
+
+
+def queued_handlers(directory: str, console) -> list:
+    handlers = [
+        logging.handlers.RotatingFileHandler(
+            os.path.join(directory, "queued.log"), maxBytes=10 * 1024 * 1024, backupCount=2
+        ),
+        logging.StreamHandler(console)
+    ]
+    for handler in handlers:
+        handler.setFormatter(JSONFormatter())
+    return handlers
+
+
+def use_setup(name: str, directory: str, console):
+    """Install a logging setup on the root logger; returns a function undoing it"""
+    root = logging.getLogger()
+    saved_handlers, saved_level, saved_limit = list(root.handlers), root.level, hot_path_log.limit
+    for handler in saved_handlers:
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+    hot_path_log.reset()
+
+    listener = None
+    if name == "sync_every_hit":
+        handlers = sync_handlers(directory, console)
+        for handler in handlers:
+            root.addHandler(handler)
+        hot_path_log.limit = -1
+    else:
+        handlers = queued_handlers(directory, console)
+        listener = configure_logging("INFO", handlers=handlers, logger=root)
+        if name == "queued_every_hit":
+            hot_path_log.limit = -1
+
+    def restore():
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        if listener is not None:
+            stop_listener(listener)
+        else:
+            for handler in handlers:
+                handler.close()
+        for handler in saved_handlers:
+            root.addHandler(handler)
+        root.setLevel(saved_level)
+        hot_path_log.limit = saved_limit
+        hot_path_log.reset()
+
+    return restore
+
+
+async def main(n: int, rounds: int) -> dict:
+    model = FearGreedResponse(**SAMPLE)
+    await cache.set(CACHE_KEY_CRYPTO, CachedRepresentation.from_model(model, ttl=3600), ttl=3600)
+    scope = make_scope(PATH)
+    setups = ["sync_every_hit", "queued_every_hit", "queued_sampled"]
+    samples = {name: [] for name in setups}
+
+    metrics.enabled = False
+    try:
+        with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as console:
+            for i in range(rounds + 1):
+                # Rotate the order so drift is spread across setups
+                names = setups[i % len(setups):] + setups[:i % len(setups)]
+                for name in names:
+                    restore = use_setup(name, directory, console)
+                    try:
+                        rate = await run_round(app, scope, n)
+                    finally:
+                        restore()
+                    # The first pass is a warm-up
+                    if i:
+                        samples[name].append(rate)
+    finally:
+        metrics.enabled = True
+
+    results = {"requests_per_round": n, "rounds": rounds}
+    for name, rates in samples.items():
+        results[name] = {
+            "median_rps": round(statistics.median(rates)),
+            "best_rps": round(max(rates))
+        }
+    for name in ("sync_every_hit", "queued_every_hit"):
+        results[f"speedup_vs_{name}"] = round(
+            results["queued_sampled"]["median_rps"] / results[name]["median_rps"], 2
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=15)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.requests, args.rounds)), indent=2))
@@ -0,0 +1,106 @@
+"""
+Benchmark: parse time and peak memory of streamed vs whole-body upstream parsing
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_parse [--days 365] [--rounds 20] [--chunk-size 65536]
+        [--fixture cnn=captured_cnn.json] [--fixture crypto=captured_crypto.json]
+
+For each payload, compares:
+
+    full_body   response.json() on the whole body, then history extraction
+                (the scrapers before streaming)
+    streamed    JSONStream over the body in chunks, history decoded straight
+                into TimeSeries (the scrapers now)
+
+Payloads are generated with the stub upstream's generators (--days of
+history) unless captured upstream bodies are given with --fixture.
+Peak memory is measured with tracemalloc, excluding the body bytes.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+from benchmarks.stub_upstream import make_cnn_payload, make_crypto_payload
+from scrapers.cnn_scraper import parse_indicator_series, read_cnn_payload
+from scrapers.crypto_scraper import parse_crypto_series, read_crypto_payload
+from utils.json_stream import JSONStream
+
+
+def full_cnn(body: bytes):
+    return parse_indicator_series(json.loads(body))
+
+
+def full_crypto(body: bytes):
+    payload = json.loads(body)
+    return payload["data"][0], parse_crypto_series(payload["data"])
+
+
+def streamed(reader: Callable, chunk_size: int) -> Callable[[bytes], object]:
+    async def chunks(body: bytes):
+        for i in range(0, len(body), chunk_size):
+            yield body[i:i + chunk_size]
+
+    def run(body: bytes):
+        return asyncio.run(reader(JSONStream(chunks(body), max_bytes=len(body))))
+    return run
+
+
+def measure(fn: Callable[[bytes], object], body: bytes, rounds: int) -> Dict:
+    """Median parse time and peak traced memory of fn(body)"""
+    fn(body)
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(body)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = fn(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"median_ms": round(statistics.median(times) * 1000, 3), "peak_kib": round(peak / 1024, 1)}
+
+
+def main(args) -> Dict:
+    bodies = {
+        "cnn": json.dumps(make_cnn_payload(args.days)).encode(),
+        "crypto": json.dumps(make_crypto_payload(args.days)).encode()
+    }
+    for fixture in args.fixture:
+        name, _, path = fixture.partition("=")
+        with open(path, "rb") as f:
+            bodies[name] = f.read()
+
+    variants = {
+        "cnn": (full_cnn, streamed(read_cnn_payload, args.chunk_size)),
+        "crypto": (full_crypto, streamed(read_crypto_payload, args.chunk_size))
+    }
+
+    results = {"days": args.days, "rounds": args.rounds, "chunk_size": args.chunk_size}
+    for name, body in bodies.items():
+        full, stream = variants[name]
+        full_result = measure(full, body, args.rounds)
+        stream_result = measure(stream, body, args.rounds)
+        results[name] = {
+            "body_kib": round(len(body) / 1024, 1),
+            "full_body": full_result,
+            "streamed": stream_result,
+            "peak_memory_ratio": round(full_result["peak_kib"] / stream_result["peak_kib"], 2),
+            "time_ratio": round(stream_result["median_ms"] / full_result["median_ms"], 2)
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=365, help="days of history in generated payloads")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=65536, help="bytes per streamed chunk")
+    parser.add_argument("--fixture", action="append", default=[], help="name=path of a captured body (cnn or crypto)")
+    args = parser.parse_args()
+    print(json.dumps(main(args), indent=2))
@@ -0,0 +1,247 @@
+"""
+Local stub upstream server for benchmarks
+Serves CNN DataViz and Alternative.me shaped payloads over HTTP/1.1 keep-alive
+"""
+import asyncio
+import calendar
+import json
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+
+CNN_PATH = "/index/fearandgreed/graphdata"
+CRYPTO_PATH = "/fng/"
+
+
+def _rating(value: float) -> str:
+    """Map a value to the lowercase rating strings CNN uses"""
+    if value <= 25:
+        return "extreme fear"
+    elif value <= 45:
+        return "fear"
+    elif value <= 55:
+        return "neutral"
+    elif value <= 75:
+        return "greed"
+    return "extreme greed"
+
+
+def make_cnn_payload(days: int = 365, seed: int = 1) -> Dict:
+    """
+    Build a CNN graphdata-shaped payload with a random-walk history
+
+    Args:
+        days: Number of daily historical points
+        seed: Random seed for reproducible payloads
+
+    Returns:
+        Payload dictionary
+    """
+    rng = random.Random(seed)
+    now_ms = int(time.time() // 86400 * 86400 * 1000)
+    value = 50.0
+    points = []
+    for i in range(days, -1, -1):
+        value = min(100.0, max(0.0, value + rng.uniform(-5, 5)))
+        points.append({"x": float(now_ms - i * 86400000), "y": round(value, 6), "rating": _rating(value)})
+
+    def lookback(days_ago: int) -> float:
+        return points[max(0, len(points) - 1 - days_ago)]["y"]
+
+    indicator = {
+        "timestamp": float(now_ms),
+        "score": points[-1]["y"],
+        "rating": _rating(points[-1]["y"]),
+        "data": [{"x": p["x"], "y": p["y"], "rating": p["rating"]} for p in points]
+    }
+
+    return {
+        "fear_and_greed": {
+            "score": points[-1]["y"],
+            "rating": _rating(points[-1]["y"]),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(now_ms / 1000)),
+            "previous_close": lookback(1),
+            "previous_1_week": lookback(7),
+            "previous_1_month": lookback(30),
+            "previous_1_year": lookback(365)
+        },
+        "fear_and_greed_historical": {
+            "timestamp": float(now_ms),
+            "score": points[-1]["y"],
+            "rating": _rating(points[-1]["y"]),
+            "data": points
+        },
+        "market_momentum_sp500": indicator,
+        "market_volatility_vix": indicator
+    }
+
+
+def make_crypto_payload(days: int = 365, seed: int = 2) -> Dict:
+    """
+    Build an Alternative.me /fng/ shaped payload (newest first)
+
+    Args:
+        days: Number of daily points
+        seed: Random seed for reproducible payloads
+
+    Returns:
+        Payload dictionary
+    """
+    rng = random.Random(seed)
+    now = int(time.time() // 86400 * 86400)
+    value = 50
+    data = []
+    for i in range(days):
+        value = min(100, max(0, value + rng.randint(-5, 5)))
+        data.append({
+            "value": str(value),
+            "value_classification": _rating(value).title(),
+            "timestamp": str(now - i * 86400),
+            "time_until_update": "3600" if i == 0 else None
+        })
+    for item in data:
+        if item["time_until_update"] is None:
+            del item["time_until_update"]
+
+    return {"name": "Fear and Greed Index", "data": data, "metadata": {"error": None}}
+
+
+class StubUpstream:
+    """Minimal keep-alive HTTP server running on its own thread and event loop"""
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, history_days: int = 365):
+        """
+        Initialize stub server
+
+        Args:
+            latency: Seconds to wait before answering each request
+            failure_rate: Fraction of requests answered with HTTP 503
+            history_days: Days of history in the generated payloads
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self.connections = 0
+        self.port: Optional[int] = None
+        self.payloads = {
+            CNN_PATH: make_cnn_payload(history_days),
+            CRYPTO_PATH: make_crypto_payload(history_days)
+        }
+        self.bytes_sent = 0
+        self._bodies: Dict[str, Optional[bytes]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        """Base URL of the running server"""
+        return f"http://127.0.0.1:{self.port}"
+
+    def body(self, target: str) -> Optional[bytes]:
+        """
+        Encoded response body for a request target, like the real upstreams
+
+        /fng/?limit=N returns the newest N records; graphdata/<YYYY-MM-DD>
+        returns history from that date on.
+
+        Args:
+            target: Request path with query string
+
+        Returns:
+            Body bytes, or None for an unknown path
+        """
+        if target not in self._bodies:
+            path, _, query = target.partition("?")
+            payload = None
+            if path == CRYPTO_PATH:
+                payload = dict(self.payloads[CRYPTO_PATH])
+                limit = parse_qs(query).get("limit")
+                if limit:
+                    payload["data"] = payload["data"][:int(limit[0])]
+            elif path == CNN_PATH:
+                payload = self.payloads[CNN_PATH]
+            elif path.startswith(CNN_PATH + "/"):
+                start_ms = calendar.timegm(time.strptime(path[len(CNN_PATH) + 1:], "%Y-%m-%d")) * 1000
+                payload = {
+                    key: {**section, "data": [p for p in section["data"] if p["x"] >= start_ms]}
+                    if isinstance(section, dict) and "data" in section else section
+                    for key, section in self.payloads[CNN_PATH].items()
+                }
+            self._bodies[target] = json.dumps(payload).encode() if payload is not None else None
+        return self._bodies[target]
+
+    def start(self) -> "StubUpstream":
+        """Start the server thread and wait until it is listening"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server thread"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "StubUpstream":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, "127.0.0.1", 0)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            # Let open connection handlers close their sockets before the loop goes
+            handlers = asyncio.all_tasks(self._loop)
+            for task in handlers:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*handlers, return_exceptions=True))
+            self._loop.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+
+                body = self.body(request_line.split()[1].decode())
+                if body is None:
+                    status, body = "404 Not Found", b"{}"
+                elif self.failure_rate and random.random() < self.failure_rate:
+                    status, body = "503 Service Unavailable", b"{}"
+                else:
+                    status = "200 OK"
+                    self.bytes_sent += len(body)
+
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
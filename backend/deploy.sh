@@ -57,9 +57,9 @@ fi
 # Navigate to backend directory
 cd backend
 
-# Create logs directory
-print_info "Creating logs directory..."
-mkdir -p logs
+# Create logs and data directories
+print_info "Creating logs and data directories..."
+mkdir -p logs data
 
 # Check if Docker is installed
 if ! command -v docker &> /dev/null; then
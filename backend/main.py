@@ -4,25 +4,27 @@ FastAPI server for scraping CNN Fear & Greed Index data
 """
 import logging
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from api.fear_greed import router as fear_greed_router
+from api.fear_greed import (
+    router as fear_greed_router, register_refresh_jobs, start_static_snapshots, stop_static_snapshots
+)
+from api.static_snapshots import static_publisher
+from scrapers.registry import source_registry
+from utils.broadcaster import broadcaster
 from utils.cache import cache
+from utils.circuit_breaker import circuit_breakers
+from utils.history_store import history_store
+from utils.http_client import http_clients
+from utils.logging_config import configure_logging
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, TimedRoute, metrics
+from utils.scheduler import scheduler
+from utils.single_flight import single_flight
 from datetime import datetime
 
-# Ensure logs directory exists
-os.makedirs('logs', exist_ok=True)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/backend.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging: records are written by a background thread, off the event loop
+configure_logging()
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +33,30 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     logger.info("Starting Fear & Greed Index API server")
+
+    # Start warm from the last snapshot; stale entries are served while refreshing
+    await cache.load()
+    await cache.start()
+    await broadcaster.start()
+    # Hand cached documents to the reverse proxy before the first refresh
+    await start_static_snapshots()
+
+    # Pre-warm index caches in the background so requests rarely hit the scrapers
+    scheduler_enabled = os.getenv("REFRESH_SCHEDULER_ENABLED", "true").lower() == "true"
+    if scheduler_enabled:
+        register_refresh_jobs(scheduler)
+        await scheduler.start()
+
     yield
+
+    if scheduler_enabled:
+        await scheduler.stop()
+    await broadcaster.stop()
+    await stop_static_snapshots()
+    await cache.stop()
+    await http_clients.aclose()
+    history_store.close()
+    await cache.close()
     logger.info("Shutting down Fear & Greed Index API server")
 
 
@@ -52,6 +77,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Time every route handler by its path template
+app.router.route_class = TimedRoute
+
+# Gauges read at scrape time
+metrics.gauge(
+    "single_flight_in_flight", "Upstream fetches currently shared by coalesced callers",
+    callback=lambda: {(): single_flight.get_stats()["in_flight"]}
+)
+metrics.gauge(
+    "stream_subscribers", "Open update streams",
+    callback=lambda: {(): broadcaster.subscribers}
+)
+metrics.gauge(
+    "circuit_breaker_open", "1 unless the upstream's circuit breaker is closed",
+    ("upstream",),
+    callback=lambda: {
+        (name,): int(status["state"] != "closed") for name, status in circuit_breakers.get_status().items()
+    }
+)
+
 # Include routers
 app.include_router(fear_greed_router)
 
@@ -62,17 +107,34 @@ async def health_check():
     Health check endpoint
     Returns service status and basic info
     """
-    cache_stats = cache.get_stats()
+    cache_stats = await cache.get_stats()
 
     return {
         "status": "healthy",
         "service": "Fear & Greed Index API",
         "version": "1.0.0",
         "timestamp": datetime.utcnow().isoformat() + "Z",
-        "cache": cache_stats
+        "cache": cache_stats,
+        "single_flight": single_flight.get_stats(),
+        "scheduler": scheduler.get_status(),
+        "http_pool": http_clients.get_stats(),
+        "circuit_breakers": {
+            source.name: circuit_breakers.get(source.name).get_status() for source in source_registry
+        },
+        "stream": broadcaster.get_stats(),
+        "static_snapshots": static_publisher.get_stats()
     }
 
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """
+    Prometheus metrics endpoint
+    Returns request, upstream, cache and refresh metrics in text format
+    """
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
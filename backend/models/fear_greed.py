@@ -1,9 +1,12 @@
 """
 Pydantic models for Fear & Greed Index data
 """
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
+
+# Status labels, checked once when scraped data is validated (cached hits are not revalidated)
+VALID_STATUSES = ('Extreme Fear', 'Fear', 'Neutral', 'Greed', 'Extreme Greed')
 
 
 class HistoricalValue(BaseModel):
@@ -14,9 +17,8 @@ class HistoricalValue(BaseModel):
     @field_validator('status')
     @classmethod
     def validate_status(cls, v):
-        valid_statuses = ['Extreme Fear', 'Fear', 'Neutral', 'Greed', 'Extreme Greed']
-        if v not in valid_statuses:
-            raise ValueError(f'Status must be one of {valid_statuses}')
+        if v not in VALID_STATUSES:
+            raise ValueError(f'Status must be one of {list(VALID_STATUSES)}')
         return v
 
 
@@ -29,18 +31,24 @@ class CurrentValue(BaseModel):
     @field_validator('status')
     @classmethod
     def validate_status(cls, v):
-        valid_statuses = ['Extreme Fear', 'Fear', 'Neutral', 'Greed', 'Extreme Greed']
-        if v not in valid_statuses:
-            raise ValueError(f'Status must be one of {valid_statuses}')
+        if v not in VALID_STATUSES:
+            raise ValueError(f'Status must be one of {list(VALID_STATUSES)}')
         return v
 
 
 class HistoricalData(BaseModel):
-    """Collection of historical data points"""
-    previous_close: HistoricalValue
-    one_week_ago: HistoricalValue
-    one_month_ago: HistoricalValue
-    one_year_ago: HistoricalValue
+    """Collection of historical data points (None if upstream has no data for that time)"""
+    previous_close: Optional[HistoricalValue] = None
+    one_week_ago: Optional[HistoricalValue] = None
+    one_month_ago: Optional[HistoricalValue] = None
+    one_year_ago: Optional[HistoricalValue] = None
+
+
+class LookbackValue(BaseModel):
+    """Value resolved for an arbitrary lookback"""
+    value: int = Field(..., ge=0, le=100, description="Index value (0-100)")
+    status: str = Field(..., description="Status label")
+    timestamp: int = Field(..., description="Time of the matched point, or the target for interpolation (unix seconds)")
 
 
 class FearGreedResponse(BaseModel):
@@ -49,3 +57,102 @@ class FearGreedResponse(BaseModel):
     historical: HistoricalData
     source_url: str = "https://edition.cnn.com/markets/fear-and-greed"
     last_scraped: datetime = Field(default_factory=datetime.utcnow)
+    stale: bool = Field(False, description="True if served past its TTL while a refresh is pending or upstream is failing")
+    lookbacks: Optional[Dict[str, Optional[LookbackValue]]] = Field(
+        None,
+        description="Values for the requested ?lookback= specs (None where there is no data)"
+    )
+
+
+class HistoryResponse(BaseModel):
+    """Downsampled index history in columnar form"""
+    source: str
+    resolution: str = Field(..., description="Resolution used: raw, hour, day or week")
+    start: int = Field(..., alias="from", description="Range start (unix seconds)")
+    end: int = Field(..., alias="to", description="Range end (unix seconds)")
+    timestamps: List[int] = Field(..., description="Point or bucket start times (unix seconds)")
+    values: List[float] = Field(..., description="Point values or bucket means")
+    mins: List[float] = Field(..., description="Bucket minimums")
+    maxs: List[float] = Field(..., description="Bucket maximums")
+
+
+class SeriesData(BaseModel):
+    """Columnar time series"""
+    timestamps: List[int] = Field(..., description="Point times (unix seconds)")
+    values: List[float]
+
+
+class SeriesResponse(BaseModel):
+    """Full upstream history per indicator"""
+    source: str
+    indicators: Dict[str, SeriesData]
+
+
+class WindowStats(BaseModel):
+    """Rolling statistics over one lookback window"""
+    points: int
+    mean: Optional[float] = None
+    volatility: Optional[float] = Field(None, description="Population standard deviation")
+    zscore: Optional[float] = Field(None, description="Newest value relative to the window mean, in standard deviations")
+
+
+class RegimeInfo(BaseModel):
+    """Current run of points in one status band"""
+    status: str
+    since: int = Field(..., description="First point of the regime (unix seconds)")
+    seconds: int = Field(..., description="Time from the first to the newest point of the regime")
+
+
+class BandStats(BaseModel):
+    """Time spent in a status band"""
+    seconds: int
+    regimes: int = Field(..., description="Number of separate runs in the band")
+    mean_regime_seconds: Optional[int] = None
+
+
+class AnalyticsResponse(BaseModel):
+    """Derived analytics of an index's history"""
+    source: str
+    first_timestamp: Optional[int] = None
+    last_timestamp: Optional[int] = None
+    latest: Optional[float] = None
+    windows: Dict[str, WindowStats] = Field(..., description="Lookback spec -> rolling statistics")
+    current_regime: Optional[RegimeInfo] = None
+    bands: Dict[str, BandStats] = Field(..., description="Status label -> time and regimes in that band")
+    transitions: Dict[str, int] = Field(..., description="\"From->To\" status label pair -> count")
+
+
+class AllIndexesResponse(BaseModel):
+    """Every registered index, with per-source errors for partial results"""
+    indexes: Dict[str, FearGreedResponse]
+    errors: Dict[str, str] = Field(default_factory=dict, description="Source name -> error for sources that failed")
+
+
+class BatchQuery(BaseModel):
+    """One point to resolve: a source at an absolute time or a lookback offset"""
+    source: str = Field(..., description="Registered source name, e.g. stock or crypto")
+    timestamp: Optional[datetime] = Field(None, description="Absolute time (ISO 8601 or unix seconds)")
+    offset: Optional[str] = Field(None, description="Lookback from the newest point, e.g. 12h, 7d, 3M")
+
+    @model_validator(mode='after')
+    def validate_target(self):
+        if (self.timestamp is None) == (self.offset is None):
+            raise ValueError('Exactly one of timestamp or offset is required')
+        return self
+
+
+class BatchRequest(BaseModel):
+    """Points to resolve in one call"""
+    queries: List[BatchQuery]
+    method: str = Field("nearest", description="Resolution: nearest or linear")
+
+
+class BatchResponse(BaseModel):
+    """Resolved points in columnar form, one entry per query in request order"""
+    method: str
+    sources: List[str]
+    targets: List[Optional[int]] = Field(..., description="Target times (unix seconds), None if the offset could not be resolved")
+    timestamps: List[Optional[int]] = Field(..., description="Matched point times, or the target for interpolation")
+    values: List[Optional[int]] = Field(..., description="Index values (None where there is no data)")
+    statuses: List[Optional[str]]
+    errors: Dict[str, str] = Field(default_factory=dict, description="Source name -> error for sources that failed")
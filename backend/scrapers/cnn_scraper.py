@@ -4,15 +4,40 @@ Fetches Fear & Greed Index data from CNN DataViz API
 """
 import httpx
 import logging
-from typing import Dict
-from datetime import datetime
+import os
+from typing import Dict, Optional
+from datetime import datetime, timezone
+from scrapers.common import IndexSource, get_status_from_value
+from scrapers.freshness import MarketHoursPolicy
+from utils.http_client import http_clients
+from utils.json_stream import JSONStream
+from utils.timeseries import IncrementalHistory, TimeSeries
 
 logger = logging.getLogger(__name__)
 
 # CNN's official DataViz API endpoint
 CNN_API_URL = "https://production.dataviz.cnn.io/index/fearandgreed/graphdata"
 CNN_PAGE_URL = "https://edition.cnn.com/markets/fear-and-greed"
-TIMEOUT = 15.0
+TIMEOUT = float(os.getenv("CNN_TIMEOUT", "15.0"))
+
+CACHE_KEY = "fear_greed_data_cnn"
+CACHE_TTL = int(os.getenv("CACHE_TTL_MINUTES", "30")) * 60
+
+# Payload section holding the headline index history (exposed as "fear_and_greed")
+HISTORICAL_KEY = "fear_and_greed_historical"
+
+# Days of history kept (the full payload covers about a year)
+HISTORY_DAYS = 400
+
+# Hours between full history downloads; refreshes in between fetch only recent days
+HISTORY_RESYNC_HOURS = float(os.getenv("HISTORY_RESYNC_HOURS", "24"))
+
+# Ingested history, so refreshes request the payload from the newest point on
+HISTORY = IncrementalHistory(
+    "fear_and_greed",
+    retention=HISTORY_DAYS * 86400,
+    resync_interval=HISTORY_RESYNC_HOURS * 3600
+)
 
 
 def normalize_rating(rating: str) -> str:
@@ -28,26 +53,198 @@ def normalize_rating(rating: str) -> str:
     return rating.title()
 
 
-def get_status_from_value(value: float) -> str:
+def parse_indicator_series(api_data: Dict) -> Dict[str, TimeSeries]:
+    """
+    Parse every historical series in the graphdata payload into TimeSeries
+
+    The payload holds the headline index history plus one section per
+    sub-indicator (market momentum, VIX, junk bond demand, ...), each with a
+    "data" list of {"x": epoch millis, "y": value} points (or a TimeSeries
+    when the payload was streamed).
+
+    Args:
+        api_data: Decoded CNN graphdata payload
+
+    Returns:
+        Mapping of indicator name to TimeSeries (timestamps in seconds)
+    """
+    series = {}
+    for key, section in api_data.items():
+        if not isinstance(section, dict):
+            continue
+
+        name = "fear_and_greed" if key == HISTORICAL_KEY else key
+        if isinstance(section.get("data"), TimeSeries):
+            # Already decoded by read_cnn_payload
+            series[name] = section["data"]
+            continue
+        if not isinstance(section.get("data"), list):
+            continue
+
+        ts = TimeSeries()
+        for point in section["data"]:
+            try:
+                ts.append(point["x"] / 1000.0, float(point["y"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+        series[name] = ts.sort()
+
+    return series
+
+
+async def fetch_cnn_payload() -> Dict:
+    """
+    Fetch the graphdata payload from the CNN DataViz API, streaming the body
+
+    Returns:
+        Decoded payload with history sections as TimeSeries (see read_cnn_payload)
+
+    Raises:
+        httpx.HTTPError: If the request fails
+        ValueError: If the body is not valid JSON or exceeds UPSTREAM_MAX_BYTES
+    """
+    logger.info(f"Fetching Fear & Greed Index from CNN API: {CNN_API_URL}")
+
+    # Required headers to avoid bot detection
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Referer': CNN_PAGE_URL,
+        'Accept': 'application/json'
+    }
+
+    client = http_clients.get_client(CNN_API_URL)
+    async with client.stream("GET", fetch_url(), headers=headers, timeout=TIMEOUT) as response:
+        response.raise_for_status()
+        return await read_cnn_payload(JSONStream.from_response(response))
+
+
+async def read_cnn_payload(stream: JSONStream) -> Dict:
+    """
+    Read a graphdata payload, decoding history points straight into TimeSeries
+
+    Each section's "data" list is read a chunk at a time, so the points are
+    never held as one list of dicts.
+
+    Args:
+        stream: JSON stream positioned at the payload
+
+    Returns:
+        Payload with the same sections, each "data" list replaced by a TimeSeries
+        (timestamps in seconds)
+
+    Raises:
+        ValueError: If the payload is not valid JSON or too large
+    """
+    payload = {}
+    async for key in stream.items():
+        if await stream.peek() != "{":
+            payload[key] = await stream.value()
+            continue
+
+        section = {}
+        async for field in stream.items():
+            if field != "data" or await stream.peek() != "[":
+                section[field] = await stream.value()
+                continue
+            ts = TimeSeries()
+            async for points in stream.batches():
+                for point in points:
+                    try:
+                        ts.append(point["x"] / 1000.0, float(point["y"]))
+                    except (KeyError, TypeError, ValueError):
+                        continue
+            section["data"] = ts.sort()
+        payload[key] = section
+    return payload
+
+
+def fetch_url(now: Optional[float] = None) -> str:
+    """
+    URL of the graphdata payload to request
+
+    graphdata/<YYYY-MM-DD> returns the same payload with history from that
+    date on. Incremental fetches start the day before the newest ingested
+    point, so the response overlaps the stored history and gaps can be
+    detected.
+
+    Args:
+        now: Current unix time (defaults to time.time())
+
+    Returns:
+        Full graphdata URL, or the URL with a start date
+    """
+    since = HISTORY.plan_fetch(now)
+    if since is None:
+        return CNN_API_URL
+    start = datetime.fromtimestamp(since - 86400, tz=timezone.utc).date()
+    return f"{CNN_API_URL}/{start.isoformat()}"
+
+
+def parse_cnn_payload(api_data: Dict) -> Dict:
     """
-    Map index value to status label
+    Parse the CNN graphdata payload into response data
 
     Args:
-        value: Index value (0-100)
+        api_data: Decoded CNN graphdata payload
 
     Returns:
-        Status label string
+        Dictionary with current and historical data, plus "series" with the
+        full history of the index and its sub-indicators
+
+    Raises:
+        ValueError: If the payload has no fear_and_greed section
     """
-    if value <= 25:
-        return "Extreme Fear"
-    elif value <= 45:
-        return "Fear"
-    elif value <= 55:
-        return "Neutral"
-    elif value <= 75:
-        return "Greed"
-    else:
-        return "Extreme Greed"
+    # Extract fear_and_greed data
+    fg_data = api_data.get("fear_and_greed", {})
+
+    if not fg_data:
+        raise ValueError("No fear_and_greed data in API response")
+
+    # Extract current value
+    current_score = fg_data.get("score", 0)
+    current_rating = fg_data.get("rating", "")
+    timestamp = fg_data.get("timestamp", datetime.utcnow().isoformat() + "Z")
+
+    # Round score to integer for consistency
+    current_value = round(current_score)
+
+    # Extract historical values
+    previous_close = round(fg_data.get("previous_close", 50))
+    one_week_ago = round(fg_data.get("previous_1_week", 50))
+    one_month_ago = round(fg_data.get("previous_1_month", 50))
+    one_year_ago = round(fg_data.get("previous_1_year", 50))
+
+    data = {
+        "current": {
+            "value": current_value,
+            "status": normalize_rating(current_rating) or get_status_from_value(current_value),
+            "timestamp": timestamp
+        },
+        "historical": {
+            "previous_close": {
+                "value": previous_close,
+                "status": get_status_from_value(previous_close)
+            },
+            "one_week_ago": {
+                "value": one_week_ago,
+                "status": get_status_from_value(one_week_ago)
+            },
+            "one_month_ago": {
+                "value": one_month_ago,
+                "status": get_status_from_value(one_month_ago)
+            },
+            "one_year_ago": {
+                "value": one_year_ago,
+                "status": get_status_from_value(one_year_ago)
+            }
+        },
+        "source_url": CNN_PAGE_URL,
+        "last_scraped": datetime.utcnow().isoformat() + "Z",
+        "series": HISTORY.merge(parse_indicator_series(api_data))
+    }
+
+    logger.info(f"Successfully fetched data from API: current value = {current_value} ({normalize_rating(current_rating)})")
+    return data
 
 
 async def scrape_fear_greed_index() -> Dict:
@@ -55,76 +252,14 @@ async def scrape_fear_greed_index() -> Dict:
     Fetch Fear & Greed Index data from CNN DataViz API
 
     Returns:
-        Dictionary with current and historical data
+        Dictionary with current and historical data, plus "series" with the
+        full history of the index and its sub-indicators
 
     Raises:
         Exception: If API request fails
     """
     try:
-        logger.info(f"Fetching Fear & Greed Index from CNN API: {CNN_API_URL}")
-
-        # Required headers to avoid bot detection
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Referer': CNN_PAGE_URL,
-            'Accept': 'application/json'
-        }
-
-        async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-            response = await client.get(CNN_API_URL, headers=headers)
-            response.raise_for_status()
-            api_data = response.json()
-
-        # Extract fear_and_greed data
-        fg_data = api_data.get("fear_and_greed", {})
-
-        if not fg_data:
-            raise ValueError("No fear_and_greed data in API response")
-
-        # Extract current value
-        current_score = fg_data.get("score", 0)
-        current_rating = fg_data.get("rating", "")
-        timestamp = fg_data.get("timestamp", datetime.utcnow().isoformat() + "Z")
-
-        # Round score to integer for consistency
-        current_value = round(current_score)
-
-        # Extract historical values
-        previous_close = round(fg_data.get("previous_close", 50))
-        one_week_ago = round(fg_data.get("previous_1_week", 50))
-        one_month_ago = round(fg_data.get("previous_1_month", 50))
-        one_year_ago = round(fg_data.get("previous_1_year", 50))
-
-        data = {
-            "current": {
-                "value": current_value,
-                "status": normalize_rating(current_rating) or get_status_from_value(current_value),
-                "timestamp": timestamp
-            },
-            "historical": {
-                "previous_close": {
-                    "value": previous_close,
-                    "status": get_status_from_value(previous_close)
-                },
-                "one_week_ago": {
-                    "value": one_week_ago,
-                    "status": get_status_from_value(one_week_ago)
-                },
-                "one_month_ago": {
-                    "value": one_month_ago,
-                    "status": get_status_from_value(one_month_ago)
-                },
-                "one_year_ago": {
-                    "value": one_year_ago,
-                    "status": get_status_from_value(one_year_ago)
-                }
-            },
-            "source_url": CNN_PAGE_URL,
-            "last_scraped": datetime.utcnow().isoformat() + "Z"
-        }
-
-        logger.info(f"Successfully fetched data from API: current value = {current_value} ({normalize_rating(current_rating)})")
-        return data
+        return parse_cnn_payload(await fetch_cnn_payload())
 
     except httpx.HTTPError as e:
         logger.error(f"HTTP error while fetching from CNN API: {e}")
@@ -135,3 +270,17 @@ async def scrape_fear_greed_index() -> Dict:
     except Exception as e:
         logger.error(f"Error fetching Fear & Greed Index: {e}")
         raise
+
+
+SOURCE = IndexSource(
+    name="stock",
+    display_name="Stock Market",
+    fetcher=fetch_cnn_payload,
+    parser=parse_cnn_payload,
+    ttl=CACHE_TTL,
+    page_url=CNN_PAGE_URL,
+    cache_key=CACHE_KEY,
+    timeout=TIMEOUT,
+    # The index only moves while US markets trade
+    freshness=MarketHoursPolicy(CACHE_TTL)
+)
@@ -0,0 +1,142 @@
+"""
+Shared scraper helpers and the index source definition
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from scrapers.freshness import FreshnessPolicy
+from utils.circuit_breaker import CircuitOpenError, circuit_breakers
+from utils.metrics import upstream_fetch_duration
+from utils.retry import (
+    MAX_RETRIES, RETRY_BASE_DELAY, RETRY_MAX_DELAY, RetryBudget, is_retryable, is_retryable_fast,
+    retry_with_backoff
+)
+
+
+def get_status_from_value(value: float) -> str:
+    """
+    Map index value to status label
+
+    Args:
+        value: Index value (0-100)
+
+    Returns:
+        Status label string
+    """
+    if value <= 25:
+        return "Extreme Fear"
+    elif value <= 45:
+        return "Fear"
+    elif value <= 55:
+        return "Neutral"
+    elif value <= 75:
+        return "Greed"
+    else:
+        return "Extreme Greed"
+
+
+@dataclass
+class IndexSource:
+    """
+    A Fear & Greed index source
+
+    Attributes:
+        name: URL name of the source (e.g. "stock")
+        display_name: Human readable name for logs and errors
+        fetcher: Async function returning the raw upstream payload
+        parser: Function turning the payload into response data
+        ttl: Base cache time-to-live in seconds
+        page_url: Public page of the index
+        cache_key: Cache key for the source's response
+        timeout: Upper bound in seconds for serving this source in multi-index requests
+        retry_budget: Retry budget shared by all fetches of this source
+        freshness: Policy varying the TTL over time (default: ttl around the clock)
+    """
+    name: str
+    display_name: str
+    fetcher: Callable[[], Awaitable[Any]]
+    parser: Callable[[Any], Dict]
+    ttl: int
+    page_url: str
+    cache_key: str
+    timeout: float = 15.0
+    retry_budget: RetryBudget = field(default_factory=RetryBudget, repr=False)
+    freshness: Optional[FreshnessPolicy] = None
+
+    def current_ttl(self, now: Optional[float] = None) -> int:
+        """
+        Get the TTL of data scraped now
+
+        Args:
+            now: Unix timestamp (defaults to time.time())
+
+        Returns:
+            Time-to-live in seconds
+        """
+        if self.freshness is None:
+            return self.ttl
+        return self.freshness.ttl_at(now)
+
+    async def scrape(self, deadline: Optional[float] = None) -> Dict:
+        """
+        Fetch and parse the source
+
+        Args:
+            deadline: time.monotonic() by which a waiting request needs the
+                data (None for background refreshes)
+
+        Returns:
+            Dictionary with current and historical data (plus optional "series")
+        """
+        return self.parser(await self.fetch(deadline))
+
+    async def fetch(self, deadline: Optional[float] = None) -> Any:
+        """
+        Fetch the raw upstream payload, recording its latency and outcome
+
+        Each attempt goes through the source's circuit breaker, and transient
+        failures are retried with jittered backoff while the source's retry
+        budget allows. An open breaker fails immediately instead of waiting
+        for the upstream to time out. With a deadline (a request is waiting)
+        timeouts are not retried and the whole fetch ends at the deadline.
+
+        Args:
+            deadline: time.monotonic() by which the fetch must finish
+                (None for background refreshes)
+
+        Returns:
+            Raw payload from the fetcher
+
+        Raises:
+            CircuitOpenError: If the source's breaker is open
+            asyncio.TimeoutError: If the deadline passes
+        """
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            payload = await retry_with_backoff(
+                circuit_breakers.get(self.name).wrap(self.fetcher),
+                MAX_RETRIES,
+                RETRY_BASE_DELAY,
+                RETRY_MAX_DELAY,
+                retry_on=is_retryable if deadline is None else is_retryable_fast,
+                budget=self.retry_budget,
+                deadline=deadline
+            )
+            outcome = "ok"
+            return payload
+        except CircuitOpenError:
+            outcome = "circuit_open"
+            raise
+        except httpx.HTTPStatusError as e:
+            outcome = str(e.response.status_code)
+            raise
+        except (httpx.TimeoutException, asyncio.TimeoutError):
+            outcome = "timeout"
+            raise
+        finally:
+            upstream_fetch_duration.observe(time.perf_counter() - start, self.name, outcome)
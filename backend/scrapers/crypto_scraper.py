@@ -4,37 +4,221 @@ Fetches Fear & Greed Index data from Alternative.me API
 """
 import httpx
 import logging
-from typing import Dict
+import math
+import os
+import time
+from typing import Dict, Optional
 from datetime import datetime
+from scrapers.common import IndexSource, get_status_from_value
+from scrapers.freshness import FreshnessPolicy
+from utils.http_client import http_clients
+from utils.json_stream import JSONStream
+from utils.timeseries import IncrementalHistory, TimeSeries, resolve_lookback
 
 logger = logging.getLogger(__name__)
 
 # Alternative.me Crypto Fear & Greed Index API
 CRYPTO_API_URL = "https://api.alternative.me/fng/"
 CRYPTO_PAGE_URL = "https://alternative.me/crypto/fear-and-greed-index/"
-TIMEOUT = 15.0
+TIMEOUT = float(os.getenv("CRYPTO_TIMEOUT", "15.0"))
 
+CACHE_KEY = "fear_greed_data_crypto"
+CACHE_TTL = int(os.getenv("CACHE_TTL_MINUTES", "30")) * 60
 
-def get_status_from_value(value: int) -> str:
+# Days of history to request (more than a year, so "1y" resolves)
+HISTORY_DAYS = 400
+
+# Hours between full history downloads; refreshes in between fetch only new days
+HISTORY_RESYNC_HOURS = float(os.getenv("HISTORY_RESYNC_HOURS", "24"))
+
+# Ingested history, so refreshes request only the days since the newest point
+HISTORY = IncrementalHistory(
+    "fear_and_greed",
+    retention=HISTORY_DAYS * 86400,
+    resync_interval=HISTORY_RESYNC_HOURS * 3600
+)
+
+# Response field -> lookback spec
+HISTORICAL_LOOKBACKS = {
+    "previous_close": "1d",
+    "one_week_ago": "7d",
+    "one_month_ago": "1M",
+    "one_year_ago": "1y"
+}
+
+
+def parse_crypto_series(data_array: list) -> TimeSeries:
     """
-    Map index value to status label
+    Convert the Alternative.me data array into a sorted TimeSeries
+
+    The payload is newest-first and may skip days, so points are indexed by
+    their timestamps rather than by position.
 
     Args:
-        value: Index value (0-100)
+        data_array: List of {"value", "timestamp", ...} records
+
+    Returns:
+        TimeSeries in ascending time order
+    """
+    series = TimeSeries()
+    for item in reversed(data_array):
+        try:
+            series.append(float(item["timestamp"]), float(item["value"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return series.sort()
+
+
+def get_historical_value(series: TimeSeries, lookback: str) -> Optional[Dict]:
+    """
+    Resolve a lookback to a historical value/status pair
+
+    Args:
+        series: Index history
+        lookback: Lookback spec (e.g. "7d", "1M")
+
+    Returns:
+        {"value", "status"} or None if there is no data near the target
+    """
+    match = resolve_lookback(series, lookback)
+    if match is None:
+        logger.warning(f"No crypto data point near lookback {lookback}")
+        return None
+
+    value = round(match[1])
+    return {"value": value, "status": get_status_from_value(value)}
+
+
+async def fetch_crypto_payload() -> Dict:
+    """
+    Fetch the /fng/ payload from the Alternative.me API, streaming the body
 
     Returns:
-        Status label string
+        Decoded payload with the history as a TimeSeries (see read_crypto_payload)
+
+    Raises:
+        httpx.HTTPError: If the request fails
+        ValueError: If the body is not valid JSON or exceeds UPSTREAM_MAX_BYTES
     """
-    if value <= 25:
-        return "Extreme Fear"
-    elif value <= 45:
-        return "Fear"
-    elif value <= 55:
-        return "Neutral"
-    elif value <= 75:
-        return "Greed"
-    else:
-        return "Extreme Greed"
+    logger.info(f"Fetching Crypto Fear & Greed Index from Alternative.me API: {CRYPTO_API_URL}")
+
+    client = http_clients.get_client(CRYPTO_API_URL)
+    async with client.stream("GET", f"{CRYPTO_API_URL}?limit={fetch_limit()}", timeout=TIMEOUT) as response:
+        response.raise_for_status()
+        return await read_crypto_payload(JSONStream.from_response(response))
+
+
+async def read_crypto_payload(stream: JSONStream) -> Dict:
+    """
+    Read a /fng/ payload, decoding records straight into a TimeSeries
+
+    Records are read a chunk at a time; only the newest (the first) is kept
+    as a dict, for the current value and its classification.
+
+    Args:
+        stream: JSON stream positioned at the payload
+
+    Returns:
+        Payload whose "data" holds only the newest record, plus "series"
+        with the history in ascending time order
+
+    Raises:
+        ValueError: If the payload is not valid JSON or too large
+    """
+    payload = {}
+    async for key in stream.items():
+        if key != "data" or await stream.peek() != "[":
+            payload[key] = await stream.value()
+            continue
+
+        newest = []
+        series = TimeSeries()
+        async for items in stream.batches():
+            if not newest:
+                newest.append(items[0])
+            for item in items:
+                try:
+                    series.append(float(item["timestamp"]), float(item["value"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        # Records arrive newest first
+        series.timestamps.reverse()
+        series.values.reverse()
+        payload["data"] = newest
+        payload["series"] = series.sort()
+    return payload
+
+
+def fetch_limit(now: Optional[float] = None) -> int:
+    """
+    Number of daily records to request
+
+    A full download covers a calendar year of lookbacks. Otherwise the limit
+    covers the days since the newest ingested point plus that point itself,
+    so the response overlaps the stored history and gaps can be detected.
+
+    Args:
+        now: Current unix time (defaults to time.time())
+
+    Returns:
+        Value for the ?limit= parameter
+    """
+    now = time.time() if now is None else now
+    since = HISTORY.plan_fetch(now)
+    if since is None:
+        return HISTORY_DAYS
+    return min(HISTORY_DAYS, max(2, math.ceil((now - since) / 86400) + 1))
+
+
+def parse_crypto_payload(api_data: Dict) -> Dict:
+    """
+    Parse the Alternative.me payload into response data
+
+    Args:
+        api_data: Decoded /fng/ payload, raw or as returned by read_crypto_payload
+
+    Returns:
+        Dictionary with current and historical data, plus "series" with the
+        full index history
+
+    Raises:
+        ValueError: If the payload has no data
+    """
+    # Extract data array
+    data_array = api_data.get("data", [])
+
+    if not data_array:
+        raise ValueError("No data in API response")
+
+    # Current data is first element
+    current = data_array[0]
+    current_value = int(current.get("value", 0))
+    current_status = current.get("value_classification", "")
+
+    # Resolve historical points by timestamp, so gaps in the data are handled
+    series = api_data.get("series")
+    if series is None:
+        series = parse_crypto_series(data_array)
+    series = HISTORY.merge({"fear_and_greed": series})["fear_and_greed"]
+    historical = {
+        name: get_historical_value(series, lookback)
+        for name, lookback in HISTORICAL_LOOKBACKS.items()
+    }
+
+    data = {
+        "current": {
+            "value": current_value,
+            "status": current_status or get_status_from_value(current_value),
+            "timestamp": datetime.utcfromtimestamp(int(current.get("timestamp", 0))).isoformat() + "Z"
+        },
+        "historical": historical,
+        "source_url": CRYPTO_PAGE_URL,
+        "last_scraped": datetime.utcnow().isoformat() + "Z",
+        "series": {"fear_and_greed": series}
+    }
+
+    logger.info(f"Successfully fetched crypto data from API: current value = {current_value} ({current_status})")
+    return data
 
 
 async def scrape_crypto_fear_greed_index() -> Dict:
@@ -42,69 +226,14 @@ async def scrape_crypto_fear_greed_index() -> Dict:
     Fetch Crypto Fear & Greed Index data from Alternative.me API
 
     Returns:
-        Dictionary with current and historical data
+        Dictionary with current and historical data, plus "series" with the
+        full index history
 
     Raises:
         Exception: If API request fails
     """
     try:
-        logger.info(f"Fetching Crypto Fear & Greed Index from Alternative.me API: {CRYPTO_API_URL}")
-
-        async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-            # Fetch current + last 30 days for historical data
-            response = await client.get(f"{CRYPTO_API_URL}?limit=365")
-            response.raise_for_status()
-            api_data = response.json()
-
-        # Extract data array
-        data_array = api_data.get("data", [])
-
-        if not data_array:
-            raise ValueError("No data in API response")
-
-        # Current data is first element
-        current = data_array[0]
-        current_value = int(current.get("value", 0))
-        current_status = current.get("value_classification", "")
-
-        # Find historical data points (approximate days)
-        historical_data = {
-            "previous_close": get_historical_value(data_array, 1),
-            "one_week_ago": get_historical_value(data_array, 7),
-            "one_month_ago": get_historical_value(data_array, 30),
-            "one_year_ago": get_historical_value(data_array, 365)
-        }
-
-        data = {
-            "current": {
-                "value": current_value,
-                "status": current_status or get_status_from_value(current_value),
-                "timestamp": datetime.fromtimestamp(int(current.get("timestamp", 0))).isoformat() + "Z"
-            },
-            "historical": {
-                "previous_close": {
-                    "value": historical_data["previous_close"],
-                    "status": get_status_from_value(historical_data["previous_close"])
-                },
-                "one_week_ago": {
-                    "value": historical_data["one_week_ago"],
-                    "status": get_status_from_value(historical_data["one_week_ago"])
-                },
-                "one_month_ago": {
-                    "value": historical_data["one_month_ago"],
-                    "status": get_status_from_value(historical_data["one_month_ago"])
-                },
-                "one_year_ago": {
-                    "value": historical_data["one_year_ago"],
-                    "status": get_status_from_value(historical_data["one_year_ago"])
-                }
-            },
-            "source_url": CRYPTO_PAGE_URL,
-            "last_scraped": datetime.utcnow().isoformat() + "Z"
-        }
-
-        logger.info(f"Successfully fetched crypto data from API: current value = {current_value} ({current_status})")
-        return data
+        return parse_crypto_payload(await fetch_crypto_payload())
 
     except httpx.HTTPError as e:
         logger.error(f"HTTP error while fetching from Alternative.me API: {e}")
@@ -117,23 +246,15 @@ async def scrape_crypto_fear_greed_index() -> Dict:
         raise
 
 
-def get_historical_value(data_array: list, days_ago: int) -> int:
-    """
-    Get historical value from data array
-
-    Args:
-        data_array: Array of historical data points
-        days_ago: Number of days ago to fetch
-
-    Returns:
-        Historical value (0-100)
-    """
-    try:
-        # Data is sorted by date descending, so index corresponds to days ago
-        if days_ago < len(data_array):
-            return int(data_array[days_ago].get("value", 50))
-        else:
-            # If not enough historical data, return neutral
-            return 50
-    except (IndexError, ValueError, TypeError):
-        return 50
+SOURCE = IndexSource(
+    name="crypto",
+    display_name="Crypto",
+    fetcher=fetch_crypto_payload,
+    parser=parse_crypto_payload,
+    ttl=CACHE_TTL,
+    page_url=CRYPTO_PAGE_URL,
+    cache_key=CACHE_KEY,
+    timeout=TIMEOUT,
+    # Crypto markets trade around the clock
+    freshness=FreshnessPolicy(CACHE_TTL)
+)
@@ -0,0 +1,85 @@
+"""
+Freshness policies: how long a source's scraped data stays fresh
+"""
+import os
+import time
+from typing import Optional
+
+from utils import market_calendar
+
+# Freshness in pre- and post-market hours, when few CNN indicators move
+EXTENDED_HOURS_TTL = int(os.getenv("EXTENDED_HOURS_TTL_MINUTES", "60")) * 60
+# Upper bound on freshness while the market is closed (covers long weekends)
+MARKET_CLOSED_MAX_TTL = int(os.getenv("MARKET_CLOSED_MAX_TTL_HOURS", "96")) * 3600
+
+
+class FreshnessPolicy:
+    """Same TTL around the clock, for sources that update 24/7"""
+
+    def __init__(self, ttl: int):
+        """
+        Initialize policy
+
+        Args:
+            ttl: Time-to-live in seconds
+        """
+        self.ttl = ttl
+
+    def ttl_at(self, now: Optional[float] = None) -> int:
+        """
+        Get the TTL of data scraped at a point in time
+
+        Args:
+            now: Unix timestamp (defaults to time.time())
+
+        Returns:
+            Time-to-live in seconds
+        """
+        return self.ttl
+
+
+class MarketHoursPolicy(FreshnessPolicy):
+    """
+    TTL following the NYSE session calendar
+
+    Data scraped during regular hours uses the base TTL and data scraped in
+    pre- and post-market hours the extended-hours TTL, cut short at the end
+    of the phase (never below the base TTL). Data scraped while the
+    exchange is closed (nights, weekends, holidays) stays fresh until the
+    next pre-market open, capped at max_closed_ttl.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        extended_ttl: int = EXTENDED_HOURS_TTL,
+        max_closed_ttl: int = MARKET_CLOSED_MAX_TTL
+    ):
+        """
+        Initialize policy
+
+        Args:
+            ttl: Time-to-live in seconds during regular hours
+            extended_ttl: Time-to-live in seconds during pre- and post-market hours
+            max_closed_ttl: Maximum time-to-live in seconds while the market is closed
+        """
+        super().__init__(ttl)
+        self.extended_ttl = max(ttl, extended_ttl)
+        self.max_closed_ttl = max(ttl, max_closed_ttl)
+
+    def ttl_at(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        phase = market_calendar.phase(now)
+        if phase == market_calendar.REGULAR:
+            return self.ttl
+        if phase != market_calendar.CLOSED:
+            # Pre-market data must not outlive the regular open, nor post-market data the close
+            phase_end = market_calendar.phase_end(now)
+            if phase_end is None:
+                return self.extended_ttl
+            return int(min(self.extended_ttl, max(self.ttl, phase_end - now)))
+
+        next_open = market_calendar.next_session_open(now)
+        if next_open is None:
+            return self.max_closed_ttl
+        return int(min(self.max_closed_ttl, max(self.ttl, next_open - now)))
@@ -0,0 +1,60 @@
+"""
+Registry of Fear & Greed index sources
+"""
+from typing import Dict, Iterator, List, Optional
+
+from scrapers import cnn_scraper, crypto_scraper
+from scrapers.common import IndexSource
+
+
+class SourceRegistry:
+    """Ordered collection of index sources, looked up by name"""
+
+    def __init__(self, sources: Optional[List[IndexSource]] = None):
+        """
+        Initialize registry
+
+        Args:
+            sources: Sources to register
+        """
+        self._sources: Dict[str, IndexSource] = {}
+        for source in sources or []:
+            self.register(source)
+
+    def register(self, source: IndexSource) -> None:
+        """
+        Register a source (replacing any source with the same name)
+
+        Args:
+            source: Index source
+        """
+        self._sources[source.name] = source
+
+    def get(self, name: str) -> Optional[IndexSource]:
+        """
+        Look up a source by name
+
+        Args:
+            name: Source name
+
+        Returns:
+            IndexSource or None if not registered
+        """
+        return self._sources.get(name)
+
+    def names(self) -> List[str]:
+        """Names of all registered sources"""
+        return list(self._sources)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sources
+
+    def __iter__(self) -> Iterator[IndexSource]:
+        return iter(list(self._sources.values()))
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+
+# Global registry with the built-in sources
+source_registry = SourceRegistry([cnn_scraper.SOURCE, crypto_scraper.SOURCE])
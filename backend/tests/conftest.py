@@ -0,0 +1,11 @@
+"""
+Shared test configuration
+"""
+import os
+
+# Keep scraped history and cache snapshots out of the working tree during tests
+os.environ.setdefault("HISTORY_DB_PATH", ":memory:")
+os.environ.setdefault("CACHE_SNAPSHOT_PATH", "")
+
+# Fail upstream fetches immediately; retry behaviour is tested with explicit arguments
+os.environ.setdefault("MAX_RETRIES", "0")
@@ -0,0 +1,118 @@
+"""
+Local stand-in for a Redis server, speaking just enough RESP2 for RedisBackend
+"""
+import fnmatch
+import socket
+import socketserver
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Read RESP command arrays and answer them from the server's dict"""
+
+    def _read_command(self) -> Optional[list]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = []
+        for _ in range(count):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self) -> None:
+        self.server.clients.add(self.request)
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            self.server.commands += 1
+            with self.server.lock:
+                reply = self.server.dispatch(args[0].decode().upper(), args[1:])
+            self.wfile.write(reply)
+
+
+def _bulk(value: Optional[bytes]) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class StubRedis(socketserver.ThreadingTCPServer):
+    """Threaded in-memory server for GET/SET (NX, PX)/DEL/SCAN and the lock release script"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.lock = threading.Lock()
+        self.commands = 0
+        self.clients = set()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """redis:// URL of the running server"""
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= time.time():
+            del self.data[key]
+            return None
+        return item[0]
+
+    def dispatch(self, name: str, args: list) -> bytes:
+        if name in ("PING", "SELECT", "AUTH"):
+            return b"+OK\r\n"
+        if name == "GET":
+            return _bulk(self._get(args[0]))
+        if name == "SET":
+            key, value, options = args[0], args[1], [a.decode().upper() for a in args[2:]]
+            if "NX" in options and self._get(key) is not None:
+                return b"$-1\r\n"
+            expires = None
+            if "PX" in options:
+                expires = time.time() + int(options[options.index("PX") + 1]) / 1000
+            self.data[key] = (value, expires)
+            return b"+OK\r\n"
+        if name == "DEL":
+            removed = sum(1 for key in args if self.data.pop(key, None) is not None)
+            return b":%d\r\n" % removed
+        if name == "SCAN":
+            pattern = args[args.index(b"MATCH") + 1].decode()
+            keys = [k for k in list(self.data) if self._get(k) is not None and fnmatch.fnmatchcase(k.decode(), pattern)]
+            return b"*2\r\n" + _bulk(b"0") + b"*%d\r\n" % len(keys) + b"".join(_bulk(k) for k in keys)
+        if name == "EVAL":
+            # Only the compare-and-delete lock release script is supported
+            key, token = args[2], args[3]
+            if self._get(key) == token:
+                del self.data[key]
+                return b":1\r\n"
+            return b":0\r\n"
+        return b"-ERR unknown command '%s'\r\n" % name.encode()
+
+    def drop_clients(self) -> None:
+        """Close every client connection, as a server restart would"""
+        for sock in list(self.clients):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.clients.clear()
+
+    def __enter__(self) -> "StubRedis":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,123 @@
+"""
+Tests for incrementally maintained index analytics
+"""
+import random
+import statistics
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.analytics import AnalyticsStore, IndexAnalytics, RollingWindow, analytics_store
+from main import app
+from utils.timeseries import TimeSeries, series_store
+
+client = TestClient(app)
+
+DAY = 86400
+
+
+def test_rolling_window_matches_full_recompute():
+    """Test running sums give the same statistics as recomputing the window"""
+    window = RollingWindow("7d")
+    points = [(d * DAY, random.uniform(0, 100)) for d in range(40)]
+    for ts, value in points:
+        window.append(ts, value)
+
+    expected = [v for ts, v in points if ts >= points[-1][0] - 7 * DAY]
+    summary = window.summary()
+    assert summary["points"] == len(expected) == 8
+    assert abs(summary["mean"] - statistics.fmean(expected)) < 1e-3
+    assert abs(summary["volatility"] - statistics.pstdev(expected)) < 1e-3
+    zscore = (expected[-1] - statistics.fmean(expected)) / statistics.pstdev(expected)
+    assert abs(summary["zscore"] - zscore) < 1e-3
+
+
+def test_incremental_updates_equal_single_pass():
+    """Test feeding growing histories only adds new points and ends where one pass would"""
+    values = [random.uniform(0, 100) for _ in range(120)]
+    full = TimeSeries([d * DAY for d in range(120)], values)
+
+    incremental = IndexAnalytics(["7d", "30d"])
+    assert incremental.extend(full.slice(None, 59 * DAY)) == 60
+    assert incremental.extend(full.slice(None, 59 * DAY)) == 0
+    assert incremental.extend(full) == 60
+
+    single = IndexAnalytics(["7d", "30d"])
+    single.extend(full)
+    assert incremental.snapshot() == single.snapshot()
+
+
+def test_revised_last_point_is_replaced():
+    """Test a moving intraday last point is replaced, not kept as an extra sample"""
+    daily = [d * DAY for d in range(40)]
+    values = [random.uniform(0, 100) for _ in range(40)]
+
+    store = AnalyticsStore(["7d", "30d"])
+    assert store.update("stock", TimeSeries(daily + [40 * DAY + 3600], values + [30]), ttl=60) == 41
+    # The next refresh moves the intraday point forward and into another band
+    series = TimeSeries(daily + [40 * DAY + 7200], values + [80])
+    assert store.update("stock", series, ttl=60) == 1
+
+    single = IndexAnalytics(["7d", "30d"])
+    single.extend(series)
+    assert store._analytics["stock"].snapshot() == single.snapshot()
+    assert single.snapshot()["windows"]["7d"]["points"] == 7
+
+    # A revised earlier point rebuilds from the merged history
+    values[-5] = 99.0
+    revised = TimeSeries(daily + [40 * DAY + 7200], values + [80])
+    assert store._analytics["stock"].extend(revised) is None
+    store.update("stock", revised, ttl=60)
+    rebuilt = IndexAnalytics(["7d", "30d"])
+    rebuilt.extend(revised)
+    assert store._analytics["stock"].snapshot() == rebuilt.snapshot()
+
+
+def test_bands_regimes_and_transitions():
+    """Test time per band, regime counts and transitions follow the status labels"""
+    analytics = IndexAnalytics(["7d"])
+    # Fear, Fear, Greed, Fear, Fear over five days
+    analytics.extend(TimeSeries([0, DAY, 2 * DAY, 3 * DAY, 5 * DAY], [30, 40, 70, 35, 36]))
+    snapshot = analytics.snapshot()
+
+    assert snapshot["bands"]["Fear"] == {"seconds": 4 * DAY, "regimes": 2, "mean_regime_seconds": 2 * DAY}
+    assert snapshot["bands"]["Greed"] == {"seconds": DAY, "regimes": 1, "mean_regime_seconds": DAY}
+    assert snapshot["transitions"] == {"Fear->Greed": 1, "Greed->Fear": 1}
+    assert snapshot["current_regime"] == {"status": "Fear", "since": 3 * DAY, "seconds": 2 * DAY}
+
+
+@pytest.mark.asyncio
+async def test_analytics_endpoint():
+    """Test analytics are served pre-encoded with a window filter and validators"""
+    from api.fear_greed import CACHE_KEY_CRYPTO, store_series
+    from api.representation import CachedRepresentation
+    from models.fear_greed import FearGreedResponse
+    from scrapers.registry import source_registry
+    from tests.test_api_endpoints import SAMPLE_DATA
+    from utils.cache import cache
+
+    analytics_store.clear()
+    await cache.set(CACHE_KEY_CRYPTO, CachedRepresentation.from_model(FearGreedResponse(**SAMPLE_DATA), ttl=60), ttl=60)
+    assert client.get("/api/v1/fear-greed/crypto/analytics").status_code == 404
+
+    store_series(source_registry.get("crypto"), {
+        "fear_and_greed": TimeSeries([d * DAY for d in range(30)], [20 + d for d in range(30)])
+    })
+    response = client.get("/api/v1/fear-greed/crypto/analytics")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["source"] == "crypto"
+    assert data["latest"] == 49
+    assert set(data["windows"]) == {"7d", "30d", "90d"}
+    assert data["windows"]["7d"]["points"] == 8
+
+    filtered = client.get("/api/v1/fear-greed/crypto/analytics?window=7d").json()
+    assert list(filtered["windows"]) == ["7d"]
+    assert client.get("/api/v1/fear-greed/crypto/analytics?window=1y").status_code == 400
+
+    etag = response.headers["etag"]
+    assert client.get("/api/v1/fear-greed/crypto/analytics", headers={"If-None-Match": etag}).status_code == 304
+
+    await cache.clear()
+    series_store.clear()
+    analytics_store.clear()
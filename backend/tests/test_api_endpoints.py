@@ -2,6 +2,7 @@
 Tests for API endpoints and caching
 """
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
 from main import app
 from utils.cache import cache
@@ -9,12 +10,12 @@ from utils.cache import cache
 client = TestClient(app)
 
 
-@pytest.fixture(autouse=True)
-def clear_cache():
+@pytest_asyncio.fixture(autouse=True)
+async def clear_cache():
     """Clear cache before each test"""
-    cache.clear()
+    await cache.clear()
     yield
-    cache.clear()
+    await cache.clear()
 
 
 def test_health_check_with_cache_stats():
@@ -50,47 +51,486 @@ def test_cors_headers_present():
     assert "CORSMiddleware" in middleware_classes
 
 
-def test_cache_set_and_get():
+@pytest.mark.asyncio
+async def test_cache_set_and_get():
     """Test cache stores and retrieves data"""
     from utils.cache import SimpleCache
 
     test_cache = SimpleCache(default_ttl=60)
-    test_cache.set("test_key", {"value": 42}, ttl=60)
+    await test_cache.set("test_key", {"value": 42}, ttl=60)
 
-    result = test_cache.get("test_key")
+    result = await test_cache.get("test_key")
     assert result == {"value": 42}
 
     # Test cache stats
-    stats = test_cache.get_stats()
+    stats = await test_cache.get_stats()
     assert stats["hits"] == 1
     assert stats["misses"] == 0
 
 
-def test_cache_expiration():
+@pytest.mark.asyncio
+async def test_cache_expiration():
     """Test cache entries expire after TTL"""
     from utils.cache import SimpleCache
     import time
 
     test_cache = SimpleCache(default_ttl=1)
-    test_cache.set("test_key", "value", ttl=1)
+    await test_cache.set("test_key", "value", ttl=1)
 
     # Should be available immediately
-    assert test_cache.get("test_key") == "value"
+    assert await test_cache.get("test_key") == "value"
 
     # Wait for expiration
     time.sleep(1.1)
 
     # Should be expired
-    assert test_cache.get("test_key") is None
+    assert await test_cache.get("test_key") is None
 
 
-def test_cache_invalidation():
+@pytest.mark.asyncio
+async def test_cache_invalidation():
     """Test cache invalidation works"""
     from utils.cache import SimpleCache
 
     test_cache = SimpleCache()
-    test_cache.set("test_key", "value")
-    assert test_cache.get("test_key") == "value"
+    await test_cache.set("test_key", "value")
+    assert await test_cache.get("test_key") == "value"
 
-    test_cache.invalidate("test_key")
-    assert test_cache.get("test_key") is None
+    await test_cache.invalidate("test_key")
+    assert await test_cache.get("test_key") is None
+
+
+SAMPLE_DATA = {
+    "current": {"value": 42, "status": "Fear", "timestamp": "2024-01-02T00:00:00Z"},
+    "historical": {
+        "previous_close": {"value": 40, "status": "Fear"},
+        "one_week_ago": {"value": 60, "status": "Greed"},
+        "one_month_ago": {"value": 50, "status": "Neutral"},
+        "one_year_ago": {"value": 20, "status": "Extreme Fear"}
+    },
+    "source_url": "https://example.com",
+    "last_scraped": "2024-01-02T00:00:00Z"
+}
+
+
+def _test_source(cache_key, fetcher):
+    """Build an ad-hoc index source whose fetcher returns response data directly"""
+    from scrapers.common import IndexSource
+
+    return IndexSource(
+        name=cache_key,
+        display_name="Test",
+        fetcher=fetcher,
+        parser=dict,
+        ttl=1800,
+        page_url="https://example.com",
+        cache_key=cache_key
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_single_fetch():
+    """Test concurrent cache misses trigger only one upstream scrape"""
+    import asyncio
+    from api.fear_greed import get_index_data
+    from utils.single_flight import single_flight
+
+    single_flight.clear()
+    calls = 0
+
+    async def slow_scraper():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return SAMPLE_DATA
+
+    results = await asyncio.gather(
+        *[get_index_data(_test_source("test_single_flight", slow_scraper)) for _ in range(10)]
+    )
+
+    assert calls == 1
+    assert all(r.data["current"]["value"] == 42 for r in results)
+    stats = single_flight.get_stats()
+    assert stats["coalesced_waiters"] == 9
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_error_reaches_all_waiters():
+    """Test a failed shared fetch is reported to every waiter"""
+    import asyncio
+    from fastapi import HTTPException
+    from api.fear_greed import get_index_data
+
+    async def failing_scraper():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        *[get_index_data(_test_source("test_single_flight_err", failing_scraper)) for _ in range(5)],
+        return_exceptions=True
+    )
+
+    assert all(isinstance(r, HTTPException) and r.status_code == 503 for r in results)
+
+
+def test_health_reports_single_flight_stats():
+    """Test health check exposes coalescing counters"""
+    response = client.get("/health")
+    data = response.json()
+    assert "coalesced_waiters" in data["single_flight"]
+
+
+@pytest.mark.asyncio
+async def test_cache_serves_stale_within_stale_window():
+    """Test entries past TTL are kept as stale until the stale window ends"""
+    from utils.cache import SimpleCache
+    import time
+
+    test_cache = SimpleCache(default_ttl=1, default_stale_ttl=60)
+    await test_cache.set("test_key", "value", ttl=1)
+    time.sleep(1.1)
+
+    # Plain get treats a stale entry as a miss
+    assert await test_cache.get("test_key") is None
+    assert await test_cache.get_with_staleness("test_key") == ("value", True)
+    assert (await test_cache.get_stats())["stale_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_returned_immediately_and_refreshed():
+    """Test stale data is served at once while one background refresh runs"""
+    import asyncio
+    from api.fear_greed import get_index_data
+    from api.representation import CachedRepresentation
+    from models.fear_greed import FearGreedResponse
+
+    stale = CachedRepresentation.from_model(FearGreedResponse(**SAMPLE_DATA), ttl=1)
+    await cache.set("test_swr", stale, ttl=1, stale_ttl=60)
+    cache.backend._entries["test_swr"].expiry = 0  # force past the soft TTL
+
+    calls = 0
+    fresh = {**SAMPLE_DATA, "current": {**SAMPLE_DATA["current"], "value": 80, "status": "Extreme Greed"}}
+
+    async def scraper():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return fresh
+
+    results = await asyncio.gather(*[get_index_data(_test_source("test_swr", scraper)) for _ in range(5)])
+    assert all(r.data["stale"] and r.data["current"]["value"] == 42 for r in results)
+
+    await asyncio.sleep(0.1)
+    assert calls == 1
+    refreshed = await get_index_data(_test_source("test_swr", scraper))
+    assert refreshed.data["current"]["value"] == 80
+    assert refreshed.data["stale"] is False
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_survives_upstream_failure():
+    """Test stale data keeps being served while the upstream is failing"""
+    import asyncio
+    from api.fear_greed import get_index_data
+    from api.representation import CachedRepresentation
+    from models.fear_greed import FearGreedResponse
+
+    representation = CachedRepresentation.from_model(FearGreedResponse(**SAMPLE_DATA), ttl=1)
+    await cache.set("test_swr_fail", representation, ttl=1, stale_ttl=60)
+    cache.backend._entries["test_swr_fail"].expiry = 0
+
+    async def failing_scraper():
+        raise RuntimeError("upstream down")
+
+    first = await get_index_data(_test_source("test_swr_fail", failing_scraper))
+    await asyncio.sleep(0.01)
+    second = await get_index_data(_test_source("test_swr_fail", failing_scraper))
+
+    assert first.data["stale"] and second.data["stale"]
+    assert second.data["current"]["value"] == 42
+
+
+async def _cache_sample(cache_key, ttl=1800):
+    """Store SAMPLE_DATA in the cache as a fresh representation"""
+    from api.representation import CachedRepresentation
+    from models.fear_greed import FearGreedResponse
+
+    representation = CachedRepresentation.from_model(FearGreedResponse(**SAMPLE_DATA), ttl=ttl)
+    await cache.set(cache_key, representation, ttl=ttl)
+    return representation
+
+
+@pytest.mark.asyncio
+async def test_cached_response_has_validators():
+    """Test cached hits send pre-encoded bytes with ETag, Last-Modified and max-age"""
+    from api.fear_greed import CACHE_KEY_CRYPTO
+
+    representation = await _cache_sample(CACHE_KEY_CRYPTO)
+    response = client.get("/api/v1/fear-greed/crypto")
+
+    assert response.status_code == 200
+    assert response.content == representation.body
+    assert response.headers["etag"] == representation.etag
+    assert response.headers["last-modified"] == representation.last_modified
+    max_age = int(response.headers["cache-control"].split("max-age=")[1])
+    assert 1790 <= max_age <= 1800
+    assert response.json()["current"]["value"] == 42
+
+
+@pytest.mark.asyncio
+async def test_cached_hit_constructs_no_models(monkeypatch):
+    """Test cached hits are served without validating or building response models"""
+    from api.fear_greed import CACHE_KEY_CRYPTO
+    from models.fear_greed import FearGreedResponse
+
+    representation = await _cache_sample(CACHE_KEY_CRYPTO)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("response model constructed on a cached hit")
+
+    monkeypatch.setattr(FearGreedResponse, "__init__", fail)
+    monkeypatch.setattr(FearGreedResponse, "model_validate", fail)
+    response = client.get("/api/v1/fear-greed/crypto")
+
+    assert response.status_code == 200
+    assert response.content == representation.body
+
+
+def test_index_query_parameters_documented():
+    """Test lookback/method stay in the OpenAPI schema though they are read from the request"""
+    paths = client.get("/openapi.json").json()["paths"]
+    for path in ("/api/v1/fear-greed", "/api/v1/fear-greed/{source}"):
+        names = {param["name"] for param in paths[path]["get"]["parameters"]}
+        assert {"lookback", "method"} <= names
+    assert "source" in {param["name"] for param in paths["/api/v1/fear-greed/{source}"]["get"]["parameters"]}
+
+
+@pytest.mark.asyncio
+async def test_if_none_match_returns_304():
+    """Test a matching If-None-Match gets an empty 304"""
+    from api.fear_greed import CACHE_KEY_CRYPTO
+
+    representation = await _cache_sample(CACHE_KEY_CRYPTO)
+    response = client.get("/api/v1/fear-greed/crypto", headers={"If-None-Match": representation.etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == representation.etag
+
+    response = client.get("/api/v1/fear-greed/crypto", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_if_modified_since_returns_304():
+    """Test If-Modified-Since at or after the refresh time gets a 304"""
+    from api.fear_greed import CACHE_KEY_CNN
+
+    representation = await _cache_sample(CACHE_KEY_CNN)
+    response = client.get("/api/v1/fear-greed/stock", headers={"If-Modified-Since": representation.last_modified})
+    assert response.status_code == 304
+
+    response = client.get("/api/v1/fear-greed/stock", headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_stale_variant_has_own_etag():
+    """Test the stale representation is encoded once with a distinct ETag"""
+    representation = await _cache_sample("test_stale_variant")
+    stale = representation.stale_variant()
+
+    assert stale is representation.stale_variant()
+    assert stale.etag != representation.etag
+    assert stale.data["stale"] is True
+    assert stale.max_age() == 0
+
+
+def test_select_encoding_honours_q_values():
+    """Test Accept-Encoding negotiation: q-values first, then server preference"""
+    from api.representation import select_encoding
+
+    assert select_encoding("gzip, deflate, br", ("br", "gzip")) == "br"
+    assert select_encoding("gzip, deflate", ("br", "gzip")) == "gzip"
+    assert select_encoding("br;q=0.5, gzip", ("br", "gzip")) == "gzip"
+    assert select_encoding("gzip;q=0, *;q=0.1", ("gzip",)) is None
+    assert select_encoding("*", ("br", "gzip")) == "br"
+    assert select_encoding("identity", ("gzip",)) is None
+
+
+@pytest.mark.asyncio
+async def test_large_bodies_served_precompressed():
+    """Test bodies above the threshold are compressed once and picked per Accept-Encoding"""
+    import gzip
+    import brotli
+    import time as _time
+    from api.fear_greed import CACHE_KEY_CRYPTO
+    from api.representation import CachedRepresentation
+
+    now = _time.time()
+    lookbacks = {f"{days}d": {"value": days % 100, "status": "Fear"} for days in range(1, 200)}
+    representation = CachedRepresentation({**SAMPLE_DATA, "lookbacks": lookbacks}, now, now + 60)
+    await cache.set(CACHE_KEY_CRYPTO, representation, ttl=60)
+    compressed, etag = representation.encoded["gzip"]
+    assert gzip.decompress(compressed) == representation.body
+
+    response = client.get("/api/v1/fear-greed/crypto", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == etag != representation.etag
+    assert int(response.headers["content-length"]) == len(compressed)
+    assert response.json()["lookbacks"]["7d"]["value"] == 7
+
+    response = client.get("/api/v1/fear-greed/crypto", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = client.get("/api/v1/fear-greed/crypto", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.content == representation.body
+
+    # Brotli is preferred when the client accepts both
+    compressed, etag = representation.encoded["br"]
+    response = client.get("/api/v1/fear-greed/crypto", headers={"Accept-Encoding": "gzip, deflate, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["etag"] == etag == f'{representation.etag[:-1]}-br"'
+    assert int(response.headers["content-length"]) == len(compressed)
+    assert brotli.decompress(compressed) == representation.body
+
+    # Small bodies are never compressed
+    small = await _cache_sample(CACHE_KEY_CRYPTO)
+    assert small.encoded == {}
+    response = client.get("/api/v1/fear-greed/crypto", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+
+
+def test_source_registry_lists_builtin_sources():
+    """Test the registry exposes the built-in sources in order"""
+    from scrapers.registry import source_registry
+
+    assert source_registry.names() == ["stock", "crypto"]
+    assert "crypto" in source_registry
+    assert source_registry.get("unknown") is None
+
+
+def test_unknown_source_returns_404():
+    """Test the generic index route rejects unregistered sources"""
+    response = client.get("/api/v1/fear-greed/unknown")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_all_indexes_returns_every_source():
+    """Test /all combines every cached source with a combined validator"""
+    from api.fear_greed import CACHE_KEY_CNN, CACHE_KEY_CRYPTO
+
+    await _cache_sample(CACHE_KEY_CNN)
+    await _cache_sample(CACHE_KEY_CRYPTO)
+    response = client.get("/api/v1/fear-greed/all")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data["indexes"]) == {"stock", "crypto"}
+    assert data["errors"] == {}
+    assert int(response.headers["cache-control"].split("max-age=")[1]) > 0
+
+    response = client.get("/api/v1/fear-greed/all", headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_all_indexes_returns_partial_results(monkeypatch):
+    """Test /all still answers when one source fails"""
+    from api.fear_greed import CACHE_KEY_CNN
+    from scrapers.registry import source_registry
+
+    async def failing_fetcher():
+        raise RuntimeError("upstream down")
+
+    crypto = source_registry.get("crypto")
+    monkeypatch.setattr(crypto, "fetcher", failing_fetcher)
+    await _cache_sample(CACHE_KEY_CNN)
+
+    response = client.get("/api/v1/fear-greed/all")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["indexes"]["stock"]["current"]["value"] == 42
+    assert "crypto" in data["errors"]
+    assert response.headers["cache-control"] == "public, max-age=0"
+
+
+@pytest.mark.asyncio
+async def test_cold_request_fails_within_deadline(monkeypatch):
+    """Test a cold request to a hanging upstream fails after the source timeout, without retrying"""
+    import asyncio
+    import time as _time
+    from fastapi import HTTPException
+    from api.fear_greed import get_index_data
+
+    monkeypatch.setattr("scrapers.common.MAX_RETRIES", 3)
+    monkeypatch.setattr("scrapers.common.RETRY_BASE_DELAY", 0)
+    calls = 0
+
+    async def hanging_fetcher():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(60)
+
+    source = _test_source("test_cold_deadline", hanging_fetcher)
+    source.timeout = 0.2
+    await cache.invalidate(source.cache_key)
+
+    start = _time.monotonic()
+    with pytest.raises(HTTPException) as exc_info:
+        await get_index_data(source)
+    assert _time.monotonic() - start < 0.5
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.detail.startswith("Timed out")
+    await asyncio.sleep(0.05)
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_retries_timeouts(monkeypatch):
+    """Test refreshes nobody waits on still retry upstream timeouts"""
+    import asyncio
+    from api.fear_greed import refresh_index
+
+    monkeypatch.setattr("scrapers.common.MAX_RETRIES", 3)
+    monkeypatch.setattr("scrapers.common.RETRY_BASE_DELAY", 0)
+    calls = 0
+
+    async def flaky_fetcher():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise asyncio.TimeoutError()
+        return SAMPLE_DATA
+
+    source = _test_source("test_background_retry", flaky_fetcher)
+    representation = await refresh_index(source)
+    assert representation.data["current"]["value"] == 42
+    assert calls == 2
+    await cache.invalidate(source.cache_key)
+
+
+@pytest.mark.asyncio
+async def test_all_indexes_times_out_slow_source(monkeypatch):
+    """Test a source exceeding its timeout is reported as an error"""
+    import asyncio
+    from api.fear_greed import CACHE_KEY_CRYPTO
+    from scrapers.registry import source_registry
+
+    async def slow_fetcher():
+        await asyncio.sleep(1)
+
+    stock = source_registry.get("stock")
+    monkeypatch.setattr(stock, "fetcher", slow_fetcher)
+    monkeypatch.setattr(stock, "timeout", 0.05)
+    await _cache_sample(CACHE_KEY_CRYPTO)
+
+    data = client.get("/api/v1/fear-greed/all").json()
+
+    assert "crypto" in data["indexes"]
+    assert data["errors"]["stock"].startswith("Timed out")
@@ -0,0 +1,206 @@
+"""
+Tests for cache snapshots on disk
+"""
+import os
+import pickle
+import time
+
+import pytest
+
+from utils.cache import SimpleCache
+
+
+@pytest.mark.asyncio
+async def test_snapshot_round_trip_keeps_expiry(tmp_path):
+    """Test a new cache loads entries with their original expiry times"""
+    path = str(tmp_path / "cache.snapshot")
+    first = SimpleCache(default_ttl=60, default_stale_ttl=600, persist_path=path)
+    await first.set("key", {"value": 42})
+    await first.flush()
+    expiry = first.backend._entries["key"].expiry
+
+    second = SimpleCache(default_ttl=60, default_stale_ttl=600, persist_path=path)
+    assert await second.load() == 1
+    assert second.backend._entries["key"].expiry == expiry
+    assert await second.get("key") == {"value": 42}
+    assert (await first.get_stats())["backend"]["snapshot"]["writes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_snapshot_writes_are_debounced(tmp_path):
+    """Test changes are written by flush() and stop(), not on every set"""
+    path = str(tmp_path / "cache.snapshot")
+    test_cache = SimpleCache(persist_path=path)
+    for i in range(5):
+        await test_cache.set(f"key{i}", i)
+    await test_cache.invalidate("key0")
+    assert not os.path.exists(path)
+
+    assert await test_cache.flush() is True
+    assert await test_cache.flush() is False
+    await test_cache.start()
+    await test_cache.set("key5", 5)
+    await test_cache.stop()
+    assert (await test_cache.get_stats())["backend"]["snapshot"]["writes"] == 2
+
+    restored = SimpleCache(persist_path=path)
+    assert await restored.load() == 5
+
+
+@pytest.mark.asyncio
+async def test_snapshot_restores_expired_entries_as_stale(tmp_path):
+    """Test entries past their TTL come back as stale, past the stale window not at all"""
+    path = str(tmp_path / "cache.snapshot")
+    first = SimpleCache(default_ttl=60, default_stale_ttl=600, persist_path=path)
+    await first.set("stale", "old")
+    await first.set("gone", "older")
+    first.backend._entries["stale"].expiry = time.time() - 1
+    gone = first.backend._entries["gone"]
+    gone.expiry, gone.stale_until = time.time() - 700, time.time() - 100
+    first.backend._snapshot()
+
+    second = SimpleCache(persist_path=path)
+    assert await second.load() == 1
+    assert await second.get_with_staleness("stale") == ("old", True)
+    assert await second.get_with_staleness("gone") == (None, False)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_write_is_atomic(tmp_path, monkeypatch):
+    """Test a failed write keeps the previous snapshot and leaves no temp files"""
+    path = str(tmp_path / "cache.snapshot")
+    test_cache = SimpleCache(persist_path=path)
+    await test_cache.set("key", "first")
+    await test_cache.flush()
+
+    def failing_dump(*args, **kwargs):
+        raise pickle.PicklingError("boom")
+
+    monkeypatch.setattr(pickle, "dump", failing_dump)
+    await test_cache.set("key", "second")
+    assert await test_cache.flush() is False
+
+    assert os.listdir(tmp_path) == ["cache.snapshot"]
+    assert (await test_cache.get_stats())["backend"]["snapshot"]["errors"] == 1
+
+    monkeypatch.undo()
+    restored = SimpleCache(persist_path=path)
+    await restored.load()
+    assert await restored.get("key") == "first"
+
+
+@pytest.mark.asyncio
+async def test_unreadable_snapshot_starts_empty(tmp_path):
+    """Test a corrupt snapshot is ignored"""
+    path = tmp_path / "cache.snapshot"
+    path.write_bytes(b"not a pickle")
+
+    test_cache = SimpleCache(persist_path=str(path))
+    assert await test_cache.load() == 0
+    assert (await test_cache.get_stats())["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_snapshot_round_trips_cached_representation(tmp_path):
+    """Test pre-encoded representations survive a restart byte for byte"""
+    from api.representation import CachedRepresentation
+    from models.fear_greed import FearGreedResponse
+    from tests.test_api_endpoints import SAMPLE_DATA
+
+    path = str(tmp_path / "cache.snapshot")
+    representation = CachedRepresentation.from_model(FearGreedResponse(**SAMPLE_DATA), ttl=60)
+    writer = SimpleCache(persist_path=path)
+    await writer.set("index", representation, ttl=60)
+    representation.stale_variant()
+    await writer.flush()
+
+    restored = SimpleCache(persist_path=path)
+    await restored.load()
+    loaded = await restored.get("index")
+    assert loaded.body == representation.body
+    assert loaded.etag == representation.etag
+    assert loaded.stale_variant().data["stale"] is True
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_least_recently_used():
+    """Test the entry and byte bounds evict the least recently used entries"""
+    from utils.cache_backends import MemoryBackend
+
+    test_cache = SimpleCache(backend=MemoryBackend(max_entries=3))
+    for key in ("a", "b", "c"):
+        await test_cache.set(key, key)
+    await test_cache.get("a")
+    await test_cache.set("d", "d")
+    assert await test_cache.get("b") is None
+    assert [await test_cache.get(key) for key in ("a", "c", "d")] == ["a", "c", "d"]
+
+    backend = MemoryBackend(max_bytes=10_000)
+    sized_cache = SimpleCache(backend=backend)
+    await sized_cache.set("small", "x")
+    small = backend.bytes
+    await sized_cache.set("large", b"x" * 6000)
+    assert backend.bytes > small + 6000
+    await sized_cache.set("larger", b"x" * 6000)
+    # Over the byte budget: the least recently used entries go first
+    assert await sized_cache.get("small") is None and await sized_cache.get("large") is None
+    assert await sized_cache.get("larger") is not None
+
+    stats = await sized_cache.get_stats()
+    assert stats["evictions"] == 2
+    assert stats["memory_bytes"] == backend.bytes
+    await sized_cache.invalidate("larger")
+    assert backend.bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_bound_counts_memoized_variants():
+    """Test lookback variants memoized after an entry is cached count against the byte bound"""
+    from api.representation import CachedRepresentation
+    from tests.test_api_endpoints import SAMPLE_DATA
+    from utils.cache_backends import MemoryBackend
+
+    now = time.time()
+    representation = CachedRepresentation(SAMPLE_DATA, now, now + 60)
+    backend = MemoryBackend(max_bytes=60_000)
+    sized_cache = SimpleCache(backend=backend)
+    await sized_cache.set("index", representation)
+    base = backend._entries["index"].size
+    await sized_cache.set("other", b"x" * 10_000)
+
+    cached = await sized_cache.get("index")
+    for days in range(1, 33):
+        lookbacks = {f"{d}d": {"value": d, "status": "Fear"} for d in range(1, days + 20)}
+        cached.variant(days, lambda: {"lookbacks": lookbacks})
+    assert representation.memoized_bytes > 50_000
+
+    # Re-counted on the next access: the bound holds and the older entry is evicted
+    await sized_cache.get("index")
+    assert await sized_cache.get("other") is None
+    assert backend.bytes == base + representation.memoized_bytes
+    assert (await sized_cache.get_stats())["memory_bytes"] == backend.bytes
+    assert backend.evictions == 1
+
+    await sized_cache.invalidate("index")
+    assert backend.bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_sweep_removes_entries_past_stale_window():
+    """Test the sweeper drops expired entries without a get() for their keys"""
+    test_cache = SimpleCache(default_ttl=60, default_stale_ttl=60)
+    await test_cache.set("stale", 1)
+    await test_cache.set("gone", 2)
+    await test_cache.set("fresh", 3)
+    test_cache.backend._entries["stale"].expiry = time.time() - 1
+    test_cache.backend._entries["gone"].stale_until = time.time() - 1
+
+    assert await test_cache.sweep() == 1
+    assert (await test_cache.get_stats())["entries"] == 2
+    assert (await test_cache.get_stats())["swept"] == 1
+    assert await test_cache.get_with_staleness("stale") == (1, True)
+
+    # clear() resets the sweep count with the other counters
+    await test_cache.clear()
+    stats = await test_cache.get_stats()
+    assert stats["swept"] == stats["hits"] == stats["stale_hits"] == 0
@@ -0,0 +1,306 @@
+"""
+Tests for cache storage backends and the cross-worker refresh lock
+"""
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+
+from tests.resp_stub import StubRedis
+from utils.cache import SimpleCache
+from utils.cache_backends import CacheEntry, MemoryBackend, RedisBackend, SQLiteBackend
+
+
+@pytest.fixture
+def redis_server():
+    """Local RESP stand-in server"""
+    with StubRedis() as server:
+        yield server
+
+
+@pytest_asyncio.fixture(params=["memory", "sqlite", "redis"])
+async def backend_pair(request, tmp_path):
+    """Two backend instances sharing storage, as two worker processes would"""
+    if request.param == "memory":
+        backend = MemoryBackend()
+        yield backend, backend
+    elif request.param == "sqlite":
+        path = str(tmp_path / "cache.db")
+        first, second = SQLiteBackend(path), SQLiteBackend(path)
+        yield first, second
+        await first.close()
+        await second.close()
+    else:
+        with StubRedis() as server:
+            first, second = RedisBackend(server.url), RedisBackend(server.url)
+            yield first, second
+            await first.close()
+            await second.close()
+
+
+@pytest.mark.asyncio
+async def test_backend_shares_entries(backend_pair):
+    """Test an entry written by one worker is read by the other"""
+    first, second = backend_pair
+    a, b = SimpleCache(default_ttl=60, backend=first), SimpleCache(default_ttl=60, backend=second)
+
+    await a.set("key", {"value": 42})
+    assert await b.get("key") == {"value": 42}
+    assert (await b.get_stats())["entries"] == 1
+
+    await b.invalidate("key")
+    assert await a.get("key") is None
+
+    await a.set("one", 1)
+    await a.set("two", 2)
+    await b.clear()
+    assert (await a.get_stats())["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_backend_keeps_stale_window(backend_pair):
+    """Test shared backends keep entries until the end of their stale window"""
+    first, second = backend_pair
+    await SimpleCache(backend=first).set("key", "value", ttl=1, stale_ttl=60)
+    entry = await second.get("key")
+    assert entry.stale_until - entry.expiry == pytest.approx(60)
+
+
+@pytest.mark.asyncio
+async def test_shared_entry_decoded_once_per_write(backend_pair):
+    """Test unchanged entries come back as the same object, keeping memoized variants"""
+    from api.representation import CachedRepresentation
+    from models.fear_greed import FearGreedResponse
+    from tests.test_api_endpoints import SAMPLE_DATA
+
+    first, second = backend_pair
+    writer, reader = SimpleCache(backend=first), SimpleCache(backend=second)
+    representation = CachedRepresentation.from_model(FearGreedResponse(**SAMPLE_DATA), ttl=60)
+
+    await writer.set("index", representation, ttl=60)
+    loaded = await reader.get("index")
+    assert await reader.get("index") is loaded
+    assert (await reader.get("index")).stale_variant() is loaded.stale_variant()
+
+    # A new write, even of equal data, is decoded again
+    await writer.set("index", representation, ttl=60)
+    reloaded = await reader.get("index")
+    assert reloaded.etag == loaded.etag
+    assert (reloaded is loaded) == isinstance(second, MemoryBackend)
+
+
+@pytest.mark.asyncio
+async def test_shared_values_round_trip_without_pickle(backend_pair):
+    """Test representations and series are rebuilt exactly from their explicit encoding"""
+    from api.representation import CachedRepresentation
+    from utils.timeseries import TimeSeries
+
+    first, second = backend_pair
+    writer, reader = SimpleCache(backend=first), SimpleCache(backend=second)
+    now = time.time()
+    lookbacks = {f"{days}d": {"value": days % 100, "status": "Fear"} for days in range(1, 200)}
+    representation = CachedRepresentation({"lookbacks": lookbacks}, now, now + 60)
+    series = {"fear_and_greed": TimeSeries([1.0, 2.5], [40.0, 41.25]), "vix": TimeSeries()}
+
+    await writer.set("index", representation, ttl=60)
+    await writer.set("index:series", series, ttl=60)
+    loaded = await reader.get("index")
+    assert (loaded.body, loaded.etag, loaded.encoded, loaded.data) == (
+        representation.body, representation.etag, representation.encoded, representation.data
+    )
+    assert (loaded.last_modified, loaded.modified_at, loaded.expires_at) == (
+        representation.last_modified, representation.modified_at, representation.expires_at
+    )
+    loaded_series = await reader.get("index:series")
+    assert list(loaded_series["fear_and_greed"].values) == [40.0, 41.25]
+    assert len(loaded_series["vix"]) == 0
+
+    # Values without a registered encoding are refused rather than pickled
+    if not isinstance(first, MemoryBackend):
+        await writer.set("object", object())
+        assert (await writer.get_stats())["errors"] == 1
+
+
+class _Exploit:
+    """Pickle payload that runs code when loaded"""
+    loaded = False
+
+    def __reduce__(self):
+        return _mark_loaded, ()
+
+
+def _mark_loaded():
+    _Exploit.loaded = True
+
+
+@pytest.mark.asyncio
+async def test_shared_backend_never_unpickles(backend_pair):
+    """Test pickled payloads planted in shared storage are misses, not code execution"""
+    import pickle
+    import struct
+
+    first, second = backend_pair
+    if isinstance(first, MemoryBackend):
+        pytest.skip("the in-memory backend stores objects, not payloads")
+
+    expires = time.time() + 60
+    planted = {
+        # Layout of earlier releases: expiry times and write id, then a pickle
+        "legacy": struct.pack("!dd8s", expires, expires, b"12345678") + pickle.dumps(_Exploit()),
+        # Current header in front of a pickle
+        "current": first._HEADER.pack(first.PAYLOAD_VERSION, expires, expires, b"12345678") + pickle.dumps(_Exploit())
+    }
+    for key, payload in planted.items():
+        first._encode = lambda entry, payload=payload: payload
+        await first.set(key, CacheEntry(None, expires, expires))
+
+    reader = SimpleCache(backend=second)
+    assert await reader.get("legacy") is None
+    assert await reader.get("current") is None
+    assert not _Exploit.loaded
+    assert (await reader.get_stats())["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lock_excludes_other_workers(backend_pair):
+    """Test only one holder gets the lock until it is released or expires"""
+    first, second = backend_pair
+
+    token = await first.acquire_lock("refresh", ttl=5)
+    assert token is not None
+    assert await second.acquire_lock("refresh", ttl=5) is None
+
+    # Releasing with the wrong token is a no-op
+    await second.release_lock("refresh", "not-the-owner")
+    assert await second.acquire_lock("refresh", ttl=5) is None
+
+    await first.release_lock("refresh", token)
+    assert await second.acquire_lock("refresh", ttl=0.05) is not None
+    await asyncio.sleep(0.1)
+    assert await first.acquire_lock("refresh", ttl=5) is not None
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_reconnects(redis_server):
+    """Test the client reconnects after the server drops its connection"""
+    backend = RedisBackend(redis_server.url)
+    await backend.set("key", CacheEntry(1, time.time() + 30, time.time() + 60))
+    redis_server.drop_clients()
+    assert (await backend.get("key")).value == 1
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_backend_degrades_to_miss():
+    """Test a shared backend outage turns into misses instead of errors"""
+    test_cache = SimpleCache(backend=RedisBackend("redis://127.0.0.1:1/0"))
+
+    await test_cache.set("key", "value")
+    assert await test_cache.get("key") is None
+    stats = await test_cache.get_stats()
+    assert stats["errors"] == 2
+    assert stats["entries"] is None
+
+
+@pytest.mark.asyncio
+async def test_failed_invalidate_degrades_gracefully():
+    """Test a backend outage during invalidate is counted instead of raised"""
+    test_cache = SimpleCache(backend=RedisBackend("redis://127.0.0.1:1/0"))
+
+    await test_cache.invalidate("key")
+    assert (await test_cache.get_stats())["errors"] == 1
+
+
+def test_backend_interface_is_enforced_at_construction():
+    """Test a backend missing an abstract method cannot be instantiated"""
+    from utils.cache_backends import CacheBackend
+
+    class Incomplete(CacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_redis_stats_report_url_scheme():
+    """Test the reported URL keeps the configured scheme"""
+    assert RedisBackend("rediss://cache.example:6380/2").get_stats()["url"] == "rediss://cache.example:6380/2"
+    assert RedisBackend("redis://localhost").get_stats()["url"] == "redis://localhost:6379/0"
+
+
+@pytest.mark.asyncio
+async def test_failed_expiry_delete_degrades_to_miss():
+    """Test a backend error while dropping an entry past its stale window is a miss, not an error"""
+    class FailingDelete(MemoryBackend):
+        async def delete(self, key):
+            raise ConnectionError("backend down")
+
+    test_cache = SimpleCache(backend=FailingDelete())
+    await test_cache.set("key", "value", ttl=60, stale_ttl=0)
+    test_cache.backend._entries["key"].stale_until = time.time() - 1
+
+    assert await test_cache.get_with_staleness("key") == (None, False)
+    stats = await test_cache.get_stats()
+    assert stats["errors"] == 1
+    assert stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_waits_for_worker_holding_lock(monkeypatch):
+    """Test a worker that loses the refresh lock reuses the holder's result"""
+    from api import fear_greed
+    from api.representation import CachedRepresentation
+    from models.fear_greed import FearGreedResponse
+    from tests.test_api_endpoints import SAMPLE_DATA, _test_source
+    from utils.cache import cache
+
+    await cache.clear()
+    calls = 0
+
+    async def fetcher():
+        nonlocal calls
+        calls += 1
+        return SAMPLE_DATA
+
+    source = _test_source("test_peer_refresh", fetcher)
+    token = await cache.acquire_lock(source.cache_key, ttl=5)
+
+    async def peer_refresh():
+        await asyncio.sleep(0.15)
+        representation = CachedRepresentation.from_model(FearGreedResponse(**SAMPLE_DATA), ttl=60)
+        await cache.set(source.cache_key, representation, ttl=60)
+        await cache.release_lock(source.cache_key, token)
+
+    monkeypatch.setattr(fear_greed, "PEER_POLL_INTERVAL", 0.01)
+    peer = asyncio.create_task(peer_refresh())
+    representation = await fear_greed.refresh_index(source)
+    await peer
+
+    assert calls == 0
+    assert representation.data["current"]["value"] == 42
+    await cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_refresh_fetches_when_lock_holder_stalls(monkeypatch):
+    """Test a worker fetches itself if the lock holder never delivers"""
+    from api import fear_greed
+    from tests.test_api_endpoints import SAMPLE_DATA, _test_source
+    from utils.cache import cache
+
+    await cache.clear()
+
+    async def fetcher():
+        return SAMPLE_DATA
+
+    source = _test_source("test_peer_stall", fetcher)
+    source.timeout = 0.05
+    await cache.acquire_lock(source.cache_key, ttl=5)
+
+    monkeypatch.setattr(fear_greed, "PEER_POLL_INTERVAL", 0.01)
+    representation = await fear_greed.refresh_index(source)
+
+    assert representation.data["current"]["value"] == 42
+    await cache.clear()
@@ -0,0 +1,169 @@
+"""
+Tests for circuit breakers and upstream retries
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from utils.cache import cache
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, circuit_breakers
+from utils.retry import RetryBudget, is_retryable, retry_with_backoff
+
+client = TestClient(app)
+
+
+def _unavailable() -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://example.com")
+    return httpx.HTTPStatusError("down", request=request, response=httpx.Response(503, request=request))
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_after_threshold_and_fails_fast():
+    """Test consecutive upstream failures open the breaker and later calls are rejected"""
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        raise _unavailable()
+
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            await breaker.call(failing)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError) as exc_info:
+        await breaker.call(failing)
+    assert calls == 2
+    assert 0 < exc_info.value.retry_after <= 60
+    assert breaker.get_status()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_closes_or_reopens():
+    """Test one trial call is let through after the reset timeout"""
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+
+    async def failing():
+        raise httpx.ConnectError("refused")
+
+    async def healthy():
+        return "ok"
+
+    with pytest.raises(httpx.ConnectError):
+        await breaker.call(failing)
+    assert breaker.state == HALF_OPEN
+
+    # Failed trial opens the breaker again
+    with pytest.raises(httpx.ConnectError):
+        await breaker.call(failing)
+    assert breaker.get_status()["times_opened"] == 2
+
+    assert await breaker.call(healthy) == "ok"
+    assert breaker.state == CLOSED
+    assert breaker.consecutive_failures == 0
+
+
+@pytest.mark.asyncio
+async def test_parse_errors_do_not_open_breaker():
+    """Test failures the upstream is not responsible for are not counted"""
+    breaker = CircuitBreaker("test", failure_threshold=1)
+
+    async def bad_payload():
+        raise ValueError("unexpected payload")
+
+    with pytest.raises(ValueError):
+        await breaker.call(bad_payload)
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_retry_only_transient_errors():
+    """Test transient errors are retried and other errors are raised at once"""
+    attempts = 0
+
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise _unavailable()
+        return "ok"
+
+    assert await retry_with_backoff(flaky, 3, 0, 0, retry_on=is_retryable) == "ok"
+    assert attempts == 3
+
+    attempts = 0
+
+    async def not_found():
+        nonlocal attempts
+        attempts += 1
+        request = httpx.Request("GET", "https://example.com")
+        raise httpx.HTTPStatusError("missing", request=request, response=httpx.Response(404, request=request))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await retry_with_backoff(not_found, 3, 0, 0, retry_on=is_retryable)
+    assert attempts == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_limits_retries():
+    """Test retries stop once the budget is spent"""
+    budget = RetryBudget(ratio=0.0, max_tokens=1)
+    attempts = 0
+
+    async def failing():
+        nonlocal attempts
+        attempts += 1
+        raise httpx.ReadTimeout("slow")
+
+    with pytest.raises(httpx.ReadTimeout):
+        await retry_with_backoff(failing, 5, 0, 0, budget=budget)
+    assert attempts == 2  # first attempt plus the one budgeted retry
+    assert budget.get_stats() == {"tokens": 0, "retries": 1, "denied": 1}
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_returns_503_with_retry_after():
+    """Test requests fail fast with Retry-After while the upstream's breaker is open"""
+    await cache.clear()
+    breaker = circuit_breakers.get("crypto")
+    try:
+        breaker.opened_at = time.monotonic()
+        response = client.get("/api/v1/fear-greed/crypto")
+        assert response.status_code == 503
+        assert int(response.headers["retry-after"]) > 0
+
+        health = client.get("/health").json()
+        assert health["circuit_breakers"]["crypto"]["state"] == OPEN
+        assert health["circuit_breakers"]["stock"]["state"] == CLOSED
+    finally:
+        breaker.reset()
+        await cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_retry_stops_at_deadline():
+    """Test attempts are cut off at the deadline and no retry starts that could not finish"""
+    async def hanging():
+        await asyncio.sleep(60)
+
+    start = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        await retry_with_backoff(hanging, 3, 0, 0, retry_on=is_retryable, deadline=start + 0.1)
+    assert time.monotonic() - start < 0.3
+
+    calls = 0
+
+    async def unavailable():
+        nonlocal calls
+        calls += 1
+        raise httpx.ConnectError("refused")
+
+    with pytest.raises(httpx.ConnectError):
+        await retry_with_backoff(unavailable, 5, 10, 10, jitter=False, deadline=time.monotonic() + 1)
+    assert calls == 1
@@ -0,0 +1,62 @@
+"""
+Tests for the persistent index history store and history endpoint
+"""
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from utils.history_store import HistoryStore, choose_resolution, history_store
+
+client = TestClient(app)
+
+DAY = 86400
+
+
+def test_append_ignores_duplicate_timestamps():
+    """Test points are keyed by (source, timestamp)"""
+    store = HistoryStore(":memory:")
+    assert store.append("stock", 1000, 40) is True
+    assert store.append("stock", 1000, 41) is False
+    assert store.append("crypto", 1000, 70) is True
+    assert store.latest("stock") == (1000, 40)
+    assert store.get_stats()["duplicates"] == 1
+
+
+def test_query_downsamples_from_rollups():
+    """Test day buckets hold mean, min and max of their points"""
+    store = HistoryStore(":memory:")
+    store.append_many("stock", [(DAY * 10 + h * 3600, 40 + h) for h in range(24)])
+    store.append_many("stock", [(DAY * 11, 90)])
+
+    raw = store.query("stock", DAY * 10, DAY * 11, resolution="raw")
+    assert len(raw["timestamps"]) == 25
+
+    daily = store.query("stock", DAY * 10, DAY * 11, resolution="day")
+    assert daily["timestamps"] == [DAY * 10, DAY * 11]
+    assert daily["values"] == [51.5, 90]
+    assert daily["mins"][0] == 40 and daily["maxs"][0] == 63
+
+    with pytest.raises(ValueError):
+        store.query("stock", 0, DAY, resolution="minute")
+
+
+def test_choose_resolution():
+    """Test auto resolution keeps long ranges coarse"""
+    assert choose_resolution(0, DAY) == "raw"
+    assert choose_resolution(0, 30 * DAY) == "hour"
+    assert choose_resolution(0, 365 * DAY) == "day"
+    assert choose_resolution(0, 5 * 365 * DAY) == "week"
+
+
+def test_history_endpoint():
+    """Test history endpoint serves stored points and validates input"""
+    history_store.append_many("crypto", [(DAY * 100 + i * DAY, 50 + i) for i in range(3)])
+
+    response = client.get(f"/api/v1/fear-greed/crypto/history?from={DAY * 100}&to={DAY * 102}&resolution=raw")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["source"] == "crypto"
+    assert data["values"] == [50, 51, 52]
+
+    assert client.get("/api/v1/fear-greed/unknown/history").status_code == 404
+    assert client.get(f"/api/v1/fear-greed/crypto/history?from={DAY * 2}&to={DAY}").status_code == 400
+    assert client.get("/api/v1/fear-greed/crypto/history?resolution=minute").status_code == 400
@@ -0,0 +1,32 @@
+"""
+Tests for shared pooled upstream HTTP clients
+"""
+import pytest
+from utils.http_client import UpstreamClients
+
+
+@pytest.mark.asyncio
+async def test_one_client_per_host():
+    """Test clients are shared per host and separate across hosts"""
+    clients = UpstreamClients()
+    try:
+        a = clients.get_client("https://production.dataviz.cnn.io/index/fearandgreed/graphdata")
+        b = clients.get_client("https://production.dataviz.cnn.io/other")
+        c = clients.get_client("https://api.alternative.me/fng/")
+        assert a is b
+        assert a is not c
+        assert set(clients.get_stats()["hosts"]) == {"production.dataviz.cnn.io", "api.alternative.me"}
+    finally:
+        await clients.aclose()
+
+    assert a.is_closed and c.is_closed
+
+
+@pytest.mark.asyncio
+async def test_http2_falls_back_without_h2(monkeypatch):
+    """Test HTTP/2 is disabled when the optional h2 package is missing"""
+    import utils.http_client as http_client
+
+    monkeypatch.setattr(http_client, "http2_available", lambda: False)
+    clients = http_client.UpstreamClients(http2=True)
+    assert clients.http2 is False
@@ -0,0 +1,83 @@
+"""
+Tests for incremental JSON reading of upstream payloads
+"""
+import json
+
+import httpx
+import pytest
+
+from benchmarks.stub_upstream import make_cnn_payload, make_crypto_payload
+from scrapers.cnn_scraper import parse_indicator_series, read_cnn_payload
+from scrapers.crypto_scraper import parse_crypto_series, read_crypto_payload
+from utils.json_stream import JSONStream, PayloadTooLargeError
+
+
+async def _chunks(body: bytes, size: int):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+def stream(data, size: int = 7, max_bytes: int = 10 ** 7) -> JSONStream:
+    body = data if isinstance(data, bytes) else json.dumps(data).encode()
+    return JSONStream(_chunks(body, size), max_bytes=max_bytes)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 7, 4096])
+async def test_values_split_across_chunks(size):
+    """Test numbers, strings and nested values survive any chunk boundary"""
+    data = {"n": 12345.678, "s": "café \"q\"", "l": [1, [2, {"x": None}], True], "e": {}, "a": []}
+    reader = stream(data, size)
+    result = {}
+    async for key in reader.items():
+        result[key] = await reader.value()
+    assert result == data
+
+
+@pytest.mark.asyncio
+async def test_skip_consumes_values():
+    """Test skipped values leave the reader at the next key"""
+    reader = stream({"big": [{"a": [1, 2, 3]}] * 50, "keep": 7, "tail": "x"}, size=5)
+    kept = {}
+    async for key in reader.items():
+        if key == "keep":
+            kept[key] = await reader.value()
+        else:
+            await reader.skip()
+    assert kept == {"keep": 7}
+
+
+@pytest.mark.asyncio
+async def test_streamed_payloads_match_full_parse():
+    """Test the streaming readers produce the same series as decoding the whole body"""
+    cnn = make_cnn_payload(days=60)
+    streamed = parse_indicator_series(await read_cnn_payload(stream(cnn, size=100)))
+    parsed = parse_indicator_series(cnn)
+    assert set(streamed) == set(parsed)
+    for name in parsed:
+        assert list(streamed[name].timestamps) == list(parsed[name].timestamps)
+        assert list(streamed[name].values) == list(parsed[name].values)
+
+    crypto = make_crypto_payload(days=60)
+    streamed = await read_crypto_payload(stream(crypto, size=100))
+    assert streamed["data"] == crypto["data"][:1]
+    assert list(streamed["series"].values) == list(parse_crypto_series(crypto["data"]).values)
+
+
+@pytest.mark.asyncio
+async def test_payload_size_limit():
+    """Test oversized bodies are rejected while streaming and by Content-Length"""
+    with pytest.raises(PayloadTooLargeError):
+        await read_crypto_payload(stream(make_crypto_payload(days=60), size=256, max_bytes=1024))
+
+    response = httpx.Response(200, headers={"Content-Length": "2048"}, content=b"{}")
+    with pytest.raises(PayloadTooLargeError):
+        JSONStream.from_response(response, max_bytes=1024)
+
+
+@pytest.mark.asyncio
+async def test_invalid_json_raises_value_error():
+    """Test truncated and malformed bodies fail as parse errors"""
+    for body in (b'{"data": [{"value": "1"', b'{"data" 1}', b'{"data": [1 2]}'):
+        with pytest.raises(ValueError):
+            await read_crypto_payload(stream(body, size=4))
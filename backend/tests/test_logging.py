@@ -0,0 +1,77 @@
+"""
+Tests for queued logging and hot-path sampling
+"""
+import json
+import logging
+import logging.handlers
+
+from utils.logging_config import JSONFormatter, LogSampler, configure_logging, stop_listener
+
+
+def test_sampler_limits_messages_per_key(monkeypatch, caplog):
+    """Test each key logs up to the limit per interval and reports suppressed messages"""
+    now = [100.0]
+    monkeypatch.setattr("utils.logging_config.time.monotonic", lambda: now[0])
+    sampler = LogSampler(limit=2, interval=10)
+    logger = logging.getLogger("test.sampler")
+
+    with caplog.at_level(logging.INFO, logger="test.sampler"):
+        logged = [sampler.log(logger, logging.INFO, "hit", "Hit %s", i) for i in range(5)]
+        assert logged == [True, True, False, False, False]
+        # Keys have separate budgets
+        assert sampler.log(logger, logging.INFO, "miss", "Miss")
+        # Disabled levels are neither logged nor counted
+        assert not sampler.log(logger, logging.DEBUG, "hit", "Debug")
+
+        now[0] += 10
+        assert sampler.log(logger, logging.INFO, "hit", "Hit %s", 5)
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages == ["Hit 0", "Hit 1", "Miss", "Hit 5 (3 similar messages suppressed)"]
+
+
+def test_sampler_bounds_tracked_keys(caplog):
+    """Test the least recently used keys are forgotten beyond max_keys"""
+    sampler = LogSampler(limit=1, interval=60, max_keys=3)
+    logger = logging.getLogger("test.sampler")
+
+    with caplog.at_level(logging.INFO, logger="test.sampler"):
+        for i in range(100):
+            sampler.log(logger, logging.INFO, ("upstream", i), "Request %s", i)
+        assert list(sampler._windows) == [("upstream", 97), ("upstream", 98), ("upstream", 99)]
+
+        # A key in use stays tracked (and suppressed) while others come and go
+        assert not sampler.log(logger, logging.INFO, ("upstream", 97), "Request 97")
+        sampler.log(logger, logging.INFO, ("upstream", 100), "Request 100")
+        assert ("upstream", 97) in sampler._windows
+        assert ("upstream", 98) not in sampler._windows
+
+
+def test_queued_logging_writes_rotated_json_lines(tmp_path):
+    """Test records reach the file through the listener thread as JSON lines, rotated by size"""
+    path = tmp_path / "backend.log"
+    handler = logging.handlers.RotatingFileHandler(path, maxBytes=2000, backupCount=10)
+    handler.setFormatter(JSONFormatter())
+    logger = logging.getLogger("test.queued")
+    logger.propagate = False
+
+    listener = configure_logging("INFO", handlers=[handler], logger=logger)
+    try:
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            logger.exception("Failed")
+        for i in range(50):
+            logger.info("Message %d", i)
+        logger.debug("Not written")
+    finally:
+        stop_listener(listener)
+        logger.handlers.clear()
+
+    rotated = sorted(tmp_path.glob("backend.log.*"), key=lambda f: -int(f.suffix[1:]))
+    assert rotated
+    entries = [json.loads(line) for f in rotated + [path] for line in f.read_text().splitlines()]
+    assert [entry["message"] for entry in entries] == ["Failed"] + [f"Message {i}" for i in range(50)]
+    assert entries[0]["level"] == "ERROR"
+    assert "RuntimeError: boom" in entries[0]["exception"]
+    assert entries[-1]["logger"] == "test.queued"
@@ -0,0 +1,98 @@
+"""
+Tests for the NYSE calendar and market-hours freshness
+"""
+import types
+from datetime import date, datetime
+
+import pytest
+
+from scrapers.freshness import FreshnessPolicy, MarketHoursPolicy
+from utils import market_calendar
+from utils.market_calendar import EASTERN
+
+
+def eastern(*args) -> float:
+    """Unix timestamp of a US/Eastern wall-clock time"""
+    return datetime(*args, tzinfo=EASTERN).timestamp()
+
+
+def test_holidays_and_early_closes():
+    """Test observed holidays, Good Friday and early closes"""
+    assert market_calendar.holidays(2025) == {
+        date(2025, 1, 1), date(2025, 1, 20), date(2025, 2, 17), date(2025, 4, 18),
+        date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4), date(2025, 9, 1),
+        date(2025, 11, 27), date(2025, 12, 25)
+    }
+    # Independence Day on a Saturday is observed on Friday
+    assert date(2026, 7, 3) in market_calendar.holidays(2026)
+    # A Saturday New Year's Day is not observed
+    assert date(2021, 12, 31) not in market_calendar.holidays(2022)
+
+    assert market_calendar.close_time(date(2025, 11, 28)).hour == 13
+    assert market_calendar.close_time(date(2025, 12, 24)).hour == 13
+    assert market_calendar.close_time(date(2025, 12, 23)).hour == 16
+
+
+def test_session_phases():
+    """Test pre-market, regular, post-market and closed phases (DST-aware)"""
+    assert market_calendar.phase(eastern(2025, 3, 10, 3, 59)) == market_calendar.CLOSED
+    assert market_calendar.phase(eastern(2025, 3, 10, 9, 0)) == market_calendar.PRE_MARKET
+    assert market_calendar.phase(eastern(2025, 3, 10, 9, 30)) == market_calendar.REGULAR
+    assert market_calendar.phase(eastern(2025, 3, 10, 16, 30)) == market_calendar.POST_MARKET
+    assert market_calendar.phase(eastern(2025, 3, 10, 20, 0)) == market_calendar.CLOSED
+    assert market_calendar.phase(eastern(2025, 3, 1, 12, 0)) == market_calendar.CLOSED
+    # Early close: post-market ends at 17:00
+    assert market_calendar.phase(eastern(2025, 11, 28, 14, 0)) == market_calendar.POST_MARKET
+    assert market_calendar.phase(eastern(2025, 11, 28, 17, 0)) == market_calendar.CLOSED
+
+    assert market_calendar.phase_end(eastern(2025, 3, 10, 9, 29)) == eastern(2025, 3, 10, 9, 30)
+    assert market_calendar.phase_end(eastern(2025, 3, 10, 19, 59)) == eastern(2025, 3, 10, 20, 0)
+    assert market_calendar.phase_end(eastern(2025, 3, 1, 12, 0)) is None
+
+    # Over a holiday weekend the next session is Tuesday's
+    assert market_calendar.next_session_open(eastern(2025, 8, 29, 21, 0)) == eastern(2025, 9, 2, 4, 0)
+
+
+def test_market_hours_policy_ttl():
+    """Test TTLs per phase, and that closed-market TTLs run until the next session"""
+    policy = MarketHoursPolicy(ttl=1800, extended_ttl=3600, max_closed_ttl=96 * 3600)
+
+    assert policy.ttl_at(eastern(2025, 3, 10, 11, 0)) == 1800
+    assert policy.ttl_at(eastern(2025, 3, 10, 18, 0)) == 3600
+    # Saturday noon until Monday 04:00
+    assert policy.ttl_at(eastern(2025, 3, 1, 12, 0)) == 40 * 3600
+    # Never shorter than the base TTL, never longer than the cap
+    assert policy.ttl_at(eastern(2025, 3, 10, 3, 55)) == 1800
+    # Extended-hours TTLs end at the regular open / post-market close, but not below the base TTL
+    assert policy.ttl_at(eastern(2025, 3, 10, 8, 0)) == 3600
+    assert policy.ttl_at(eastern(2025, 3, 10, 9, 0)) == 1800
+    assert policy.ttl_at(eastern(2025, 3, 10, 9, 29)) == 1800
+    assert policy.ttl_at(eastern(2025, 3, 10, 19, 15)) == 2700
+    assert policy.ttl_at(eastern(2025, 3, 10, 19, 59)) == 1800
+    assert MarketHoursPolicy(ttl=1800, max_closed_ttl=12 * 3600).ttl_at(eastern(2025, 3, 1, 12, 0)) == 12 * 3600
+
+    assert FreshnessPolicy(1800).ttl_at(eastern(2025, 3, 1, 12, 0)) == 1800
+
+
+@pytest.mark.asyncio
+async def test_closed_market_ttl_reaches_cache_control_and_scheduler(monkeypatch):
+    """Test data scraped on a weekend stays fresh until Monday and is refreshed just before"""
+    from api.fear_greed import get_index_data, refresh_interval
+    from scrapers import freshness
+    from tests.test_api_endpoints import SAMPLE_DATA, _test_source
+
+    saturday = eastern(2025, 3, 1, 12, 0)
+    monkeypatch.setattr(freshness, "time", types.SimpleNamespace(time=lambda: saturday))
+
+    async def fetcher():
+        return dict(SAMPLE_DATA)
+
+    source = _test_source("test_market_hours", fetcher)
+    source.freshness = MarketHoursPolicy(source.ttl)
+
+    representation = await get_index_data(source)
+    assert representation.max_age() >= 40 * 3600 - 60
+    assert refresh_interval(source) == 40 * 3600 - source.ttl * 0.2
+
+    source.freshness = FreshnessPolicy(source.ttl)
+    assert refresh_interval(source) == source.ttl * 0.8
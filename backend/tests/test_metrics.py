@@ -0,0 +1,98 @@
+"""
+Tests for the metrics registry and /metrics endpoint
+"""
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from utils.cache import cache
+from utils.metrics import MetricsRegistry
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test histogram buckets are cumulative with _sum and _count"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5.0, "/a")
+
+    text = registry.render().decode()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'latency_seconds_sum{route="/a"} 5.55' in text
+    assert 'latency_seconds_count{route="/a"} 3' in text
+
+
+def test_disabled_registry_records_nothing():
+    """Test METRICS_ENABLED=false turns recording into no-ops"""
+    registry = MetricsRegistry(enabled=False)
+    counter = registry.counter("events_total", "Events", ("kind",))
+    counter.inc("a")
+    assert counter.value("a") == 0
+    with pytest.raises(ValueError):
+        registry.counter("events_total", "Duplicate")
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_routes_and_cache():
+    """Test requests are timed by route template and cache results are counted"""
+    from api.fear_greed import CACHE_KEY_CRYPTO
+    from tests.test_api_endpoints import _cache_sample
+
+    await cache.clear()
+    await _cache_sample(CACHE_KEY_CRYPTO)
+    client.get("/api/v1/fear-greed/crypto")
+    client.get("/api/v1/fear-greed/unknown")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/fear-greed/{source}",status="200"}' in text
+    assert 'route="/api/v1/fear-greed/{source}",status="404"' in text
+    assert f'cache_requests_total{{key="{CACHE_KEY_CRYPTO}",result="hit"}}' in text
+    assert "http_requests_in_flight 1" in text  # the /metrics request itself
+    assert "stream_subscribers 0" in text
+    await cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_upstream_fetch_records_status():
+    """Test upstream fetches are timed with their HTTP status or failure kind"""
+    from tests.test_api_endpoints import _test_source
+    from utils.metrics import upstream_fetch_duration
+
+    async def unavailable():
+        request = httpx.Request("GET", "https://example.com")
+        raise httpx.HTTPStatusError("down", request=request, response=httpx.Response(503, request=request))
+
+    async def timeout():
+        raise httpx.ReadTimeout("slow")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await _test_source("metrics_503", unavailable).fetch()
+    with pytest.raises(httpx.TimeoutException):
+        await _test_source("metrics_timeout", timeout).fetch()
+
+    assert upstream_fetch_duration.count("metrics_503", "503") == 1
+    assert upstream_fetch_duration.count("metrics_timeout", "timeout") == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_failures_counted():
+    """Test failed scheduled refreshes increment refresh_errors_total"""
+    from utils.metrics import refresh_errors
+    from utils.scheduler import RefreshJob
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    job = RefreshJob("metrics_job", failing, interval=60)
+    await job.run_once()
+    assert refresh_errors.value("metrics_job", "scheduled") == 1
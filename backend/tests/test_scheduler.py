@@ -0,0 +1,74 @@
+"""
+Tests for the background refresh scheduler
+"""
+import asyncio
+import pytest
+from utils.scheduler import RefreshJob, RefreshScheduler
+
+
+@pytest.mark.asyncio
+async def test_scheduler_runs_jobs_periodically():
+    """Test registered jobs run on their interval until stopped"""
+    scheduler = RefreshScheduler()
+    calls = 0
+
+    async def refresh():
+        nonlocal calls
+        calls += 1
+
+    scheduler.register("test", refresh, interval=0.02, jitter=0)
+    await scheduler.start()
+    await asyncio.sleep(0.1)
+    await scheduler.stop()
+
+    assert calls >= 3
+    status = scheduler.get_status()
+    assert status["running"] is False
+    assert status["jobs"]["test"]["last_outcome"] == "success"
+    assert status["jobs"]["test"]["last_run"] is not None
+
+
+@pytest.mark.asyncio
+async def test_failed_run_applies_backoff():
+    """Test failures are recorded and back off up to the interval"""
+    async def failing():
+        raise RuntimeError("upstream down")
+
+    job = RefreshJob("test", failing, interval=100, jitter=0, retry_delay=10)
+    assert job.next_delay() == 100
+
+    await job.run_once()
+    assert job.last_outcome == "error"
+    assert job.last_error == "upstream down"
+    assert job.next_delay() == 10
+
+    await job.run_once()
+    await job.run_once()
+    assert job.next_delay() == 40
+
+    for _ in range(5):
+        await job.run_once()
+    assert job.next_delay() == 100
+
+
+@pytest.mark.asyncio
+async def test_scheduler_skips_tick_while_running():
+    """Test a slow refresh causes later ticks to be skipped, not overlapped"""
+    scheduler = RefreshScheduler()
+    concurrent = 0
+    max_concurrent = 0
+
+    async def slow_refresh():
+        nonlocal concurrent, max_concurrent
+        concurrent += 1
+        max_concurrent = max(max_concurrent, concurrent)
+        await asyncio.sleep(0.2)
+        concurrent -= 1
+
+    job = scheduler.register("slow", slow_refresh, interval=0.02, jitter=0)
+    await scheduler.start()
+    await asyncio.sleep(0.15)
+    await scheduler.stop()
+
+    assert max_concurrent == 1
+    assert job.skipped >= 1
@@ -2,12 +2,7 @@
 Tests for CNN Fear & Greed Index Scraper
 """
 import pytest
-from bs4 import BeautifulSoup
-from scrapers.cnn_scraper import (
-    get_status_from_value,
-    extract_current_value,
-    extract_historical_values
-)
+from scrapers.cnn_scraper import get_status_from_value
 
 
 def test_get_status_from_value():
@@ -24,82 +19,6 @@ def test_get_status_from_value():
     assert get_status_from_value(100) == "Extreme Greed"
 
 
-def test_extract_current_value_with_valid_html():
-    """Test extracting current value from valid HTML"""
-    html = """
-    <div class="market-fng-gauge__dial-number">75</div>
-    """
-    soup = BeautifulSoup(html, 'html.parser')
-    value = extract_current_value(soup)
-    assert value == 75
-    assert 0 <= value <= 100
-
-
-def test_extract_current_value_with_alternative_selector():
-    """Test extracting value with fallback selector"""
-    html = """
-    <div class="gauge-container">
-        <span>Fear & Greed Index: 42</span>
-    </div>
-    """
-    soup = BeautifulSoup(html, 'html.parser')
-    value = extract_current_value(soup)
-    assert value == 42
-
-
-def test_extract_current_value_validates_range():
-    """Test that extracted values are validated to be 0-100"""
-    # Value too high should be skipped
-    html = """
-    <div class="market-fng-gauge__dial-number">150</div>
-    <div class="gauge-container">Valid: 65</div>
-    """
-    soup = BeautifulSoup(html, 'html.parser')
-    value = extract_current_value(soup)
-    assert value == 65  # Should find the valid value
-
-
-def test_extract_current_value_raises_on_missing():
-    """Test that extraction raises error when value not found"""
-    html = "<div>No gauge data here</div>"
-    soup = BeautifulSoup(html, 'html.parser')
-
-    with pytest.raises(ValueError, match="Could not extract current value"):
-        extract_current_value(soup)
-
-
-def test_extract_historical_values():
-    """Test extracting historical values from HTML"""
-    html = """
-    <div class="historical-data">
-        <div>Previous close: 72</div>
-        <div>One week ago: 60</div>
-        <div>One month ago: 45</div>
-        <div>One year ago: 30</div>
-    </div>
-    """
-    soup = BeautifulSoup(html, 'html.parser')
-    historical = extract_historical_values(soup)
-
-    assert historical['previous_close'] == 72
-    assert historical['one_week_ago'] == 60
-    assert historical['one_month_ago'] == 45
-    assert historical['one_year_ago'] == 30
-
-
-def test_extract_historical_values_with_defaults():
-    """Test that historical extraction provides defaults when data missing"""
-    html = "<div>No historical data</div>"
-    soup = BeautifulSoup(html, 'html.parser')
-    historical = extract_historical_values(soup)
-
-    # Should return defaults
-    assert historical['previous_close'] == 50
-    assert historical['one_week_ago'] == 50
-    assert historical['one_month_ago'] == 50
-    assert historical['one_year_ago'] == 50
-
-
 @pytest.mark.asyncio
 async def test_scrape_fear_greed_index_network_error():
     """Test scraper handles network errors gracefully"""
@@ -110,3 +29,61 @@ async def test_scrape_fear_greed_index_network_error():
     # In a real test, we'd use a mocking library like pytest-httpx
     # For now, just verify the function exists and is async
     assert hasattr(scrape_fear_greed_index, '__call__')
+
+
+def test_incremental_history_merges_and_detects_gaps():
+    """Test full and incremental merges, scheduled resyncs and gap detection"""
+    from utils.timeseries import IncrementalHistory, TimeSeries
+
+    day = 86400
+    history = IncrementalHistory("fear_and_greed", retention=10 * day, resync_interval=day)
+    assert history.plan_fetch(now=0) is None
+    history.merge({"fear_and_greed": TimeSeries([d * day for d in range(12)], range(12))}, now=0)
+    # Only the retention window is kept
+    assert list(history.series["fear_and_greed"].timestamps)[0] == day
+
+    assert history.plan_fetch(now=3600) == 11 * day
+    # The overlapping newest point is replaced, later points appended
+    merged = history.merge({"fear_and_greed": TimeSeries([11 * day, 12 * day], [50, 60])}, now=3600)
+    assert list(merged["fear_and_greed"].values)[-3:] == [10, 50, 60]
+    assert not history.resync_needed
+
+    # A delta that does not reach back to the newest point leaves a gap
+    assert history.plan_fetch(now=7200) == 12 * day
+    history.merge({"fear_and_greed": TimeSeries([15 * day], [70])}, now=7200)
+    assert history.resync_needed
+    assert history.plan_fetch(now=7300) is None
+
+    # Scheduled resync
+    history.merge({"fear_and_greed": TimeSeries([15 * day], [70])}, now=7300)
+    assert history.plan_fetch(now=7300 + 3600) == 15 * day
+    assert history.plan_fetch(now=7300 + day) is None
+
+
+@pytest.mark.asyncio
+async def test_refreshes_fetch_only_new_points(monkeypatch):
+    """Test refreshes after the first request a small delta and keep the full series"""
+    from benchmarks.stub_upstream import CNN_PATH, CRYPTO_PATH, StubUpstream
+    from scrapers import cnn_scraper, crypto_scraper
+
+    with StubUpstream() as stub:
+        monkeypatch.setattr(cnn_scraper, "CNN_API_URL", stub.base_url + CNN_PATH)
+        monkeypatch.setattr(crypto_scraper, "CRYPTO_API_URL", stub.base_url + CRYPTO_PATH)
+        for scraper in (cnn_scraper, crypto_scraper):
+            scraper.HISTORY.reset()
+            try:
+                full = await scraper.SOURCE.scrape()
+                full_bytes = stub.bytes_sent
+
+                delta = await scraper.SOURCE.scrape()
+                delta_bytes = stub.bytes_sent - full_bytes
+
+                assert delta_bytes * 20 < full_bytes
+                assert delta["historical"] == full["historical"]
+                full_series = full["series"]["fear_and_greed"]
+                delta_series = delta["series"]["fear_and_greed"]
+                assert list(delta_series.timestamps) == list(full_series.timestamps)
+                assert not scraper.HISTORY.resync_needed
+            finally:
+                scraper.HISTORY.reset()
+            stub.bytes_sent = 0
@@ -0,0 +1,166 @@
+"""
+Tests for static snapshot publishing
+"""
+import gzip
+import os
+import threading
+
+import brotli
+import pytest
+
+from api.static_snapshots import StaticPublisher
+
+
+def _representation(value: int):
+    from api.representation import CachedRepresentation
+    from models.fear_greed import FearGreedResponse
+    from tests.test_api_endpoints import SAMPLE_DATA
+
+    data = {**SAMPLE_DATA, "current": {**SAMPLE_DATA["current"], "value": value}}
+    return CachedRepresentation.from_model(FearGreedResponse(**data), ttl=60)
+
+
+def test_publish_switches_versions_atomically(tmp_path):
+    """Test each publish writes plain and compressed files and repoints the live version"""
+    publisher = StaticPublisher(str(tmp_path), keep=2)
+    first = _representation(10)
+    version = publisher.publish({"/api/v1/fear-greed/stock": first})
+
+    live = tmp_path / "current" / "api" / "v1" / "fear-greed" / "stock.json"
+    assert os.readlink(tmp_path / "current") == os.path.join("versions", version)
+    assert live.read_bytes() == first.body
+    assert gzip.decompress(live.with_name("stock.json.gz").read_bytes()) == first.body
+    assert brotli.decompress(live.with_name("stock.json.br").read_bytes()) == first.body
+    assert int(live.stat().st_mtime) == int(first.modified_at)
+
+    for value in (20, 30):
+        latest = _representation(value)
+        publisher.publish({"/api/v1/fear-greed/stock": latest})
+    assert live.read_bytes() == latest.body
+    # Older versions are pruned, leaving no temporary links behind
+    assert len(os.listdir(tmp_path / "versions")) == 2
+    assert sorted(os.listdir(tmp_path)) == ["current", "versions"]
+
+    config = publisher.write_nginx_config("/api/v1/fear-greed", max_age=30)
+    text = open(config).read()
+    assert f"root {tmp_path / 'current'};" in text
+    assert "try_files $uri.json @fear_greed_api;" in text
+    assert "expires 30s;" in text
+
+
+@pytest.mark.asyncio
+async def test_refresh_publishes_snapshots(tmp_path, monkeypatch):
+    """Test a refresh publishes every fresh index, including the default-source path"""
+    from api import fear_greed
+    from scrapers.registry import source_registry
+    from utils.cache import cache
+
+    publisher = StaticPublisher(str(tmp_path))
+    monkeypatch.setattr(fear_greed, "static_publisher", publisher)
+    stock = source_registry.get("stock")
+    await cache.set(stock.cache_key, _representation(42), ttl=60)
+    await cache.invalidate(source_registry.get("crypto").cache_key)
+
+    await fear_greed.publish_static_snapshots()
+
+    root = tmp_path / "current" / "api" / "v1"
+    assert (root / "fear-greed.json").read_bytes() == (root / "fear-greed" / "stock.json").read_bytes()
+    assert not (root / "fear-greed" / "crypto.json").exists()
+    await fear_greed.stop_static_snapshots()
+    await cache.invalidate(stock.cache_key)
+
+
+@pytest.mark.asyncio
+async def test_stale_snapshots_fall_back_to_api(tmp_path, monkeypatch):
+    """Test a document not refreshed before its TTL ends is withdrawn from the snapshots"""
+    import asyncio
+    import time
+    from api import fear_greed
+    from api.representation import CachedRepresentation
+    from scrapers.registry import source_registry
+    from tests.test_api_endpoints import SAMPLE_DATA
+    from utils.cache import cache
+
+    publisher = StaticPublisher(str(tmp_path))
+    monkeypatch.setattr(fear_greed, "static_publisher", publisher)
+    monkeypatch.setattr(fear_greed, "STATIC_EXPIRY_GRACE", 0.05)
+    stock = source_registry.get("stock")
+    await cache.invalidate(source_registry.get("crypto").cache_key)
+
+    now = time.time()
+    await cache.set(stock.cache_key, CachedRepresentation(SAMPLE_DATA, now, now + 0.2), ttl=0.2, stale_ttl=60)
+    await fear_greed.publish_static_snapshots()
+    live = tmp_path / "current" / "api" / "v1" / "fear-greed" / "stock.json"
+    assert live.exists()
+
+    await asyncio.sleep(0.4)
+    assert not live.exists()
+    # Still served by the API, marked stale
+    representation, is_stale = await cache.get_with_staleness(stock.cache_key)
+    assert is_stale and representation.stale_variant().data["stale"] is True
+
+    await fear_greed.stop_static_snapshots()
+    await cache.invalidate(stock.cache_key)
+
+
+def test_workers_sharing_a_directory_keep_their_versions(tmp_path, monkeypatch):
+    """Test versions are named per worker and each worker prunes only its own"""
+    first, second = StaticPublisher(str(tmp_path), keep=1), StaticPublisher(str(tmp_path), keep=1)
+    document = {"/api/v1/fear-greed/stock": _representation(10)}
+
+    monkeypatch.setattr("api.static_snapshots.os.getpid", lambda: 101)
+    first.publish(document)
+    monkeypatch.setattr("api.static_snapshots.os.getpid", lambda: 202)
+    newest = second.publish(document)
+    monkeypatch.setattr("api.static_snapshots.os.getpid", lambda: 101)
+    first.publish(document)
+
+    versions = sorted(os.listdir(tmp_path / "versions"))
+    assert newest in versions
+    assert [name.split("-")[1] for name in versions] == ["202", "101"]
+
+
+def test_older_publish_is_skipped(tmp_path):
+    """Test a publish of older documents never replaces a newer one"""
+    publisher = StaticPublisher(str(tmp_path))
+    newer, older = _representation(20), _representation(10)
+
+    assert publisher.publish({"/api/v1/fear-greed/stock": newer}, generation=2) is not None
+    assert publisher.publish({"/api/v1/fear-greed/stock": older}, generation=1) is None
+    assert (tmp_path / "current" / "api" / "v1" / "fear-greed" / "stock.json").read_bytes() == newer.body
+
+
+@pytest.mark.asyncio
+async def test_refresh_does_not_wait_for_or_fail_on_publishing(tmp_path, monkeypatch):
+    """Test a refresh returns before the snapshots are written, and publish failures are only logged"""
+    import asyncio
+    from api import fear_greed
+    from tests.test_api_endpoints import SAMPLE_DATA, _test_source
+    from utils.cache import cache
+
+    publisher = StaticPublisher(str(tmp_path))
+    release = threading.Event()
+
+    def failing_publish(documents, generation=None):
+        # Slow, then broken: the refresh must neither wait for it nor fail with it
+        release.wait(5)
+        raise RuntimeError("disk on fire")
+
+    monkeypatch.setattr(publisher, "publish", failing_publish)
+    monkeypatch.setattr(fear_greed, "static_publisher", publisher)
+
+    async def fetcher():
+        return SAMPLE_DATA
+
+    source = _test_source("test_publish_background", fetcher)
+    representation = await asyncio.wait_for(fear_greed.refresh_index(source), 1)
+    assert representation.data["current"]["value"] == 42
+
+    release.set()
+    for _ in range(100):
+        if publisher.errors:
+            break
+        await asyncio.sleep(0.01)
+    assert publisher.errors == 1
+    await fear_greed.stop_static_snapshots()
+    await cache.invalidate(source.cache_key)
@@ -0,0 +1,124 @@
+"""
+Tests for the index update broadcaster and SSE endpoint
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from utils.broadcaster import HEARTBEAT, IndexBroadcaster
+
+client = TestClient(app)
+
+
+def _event_ids(chunks):
+    return [int(c.split(b"\n")[0][4:]) for c in chunks if c.startswith(b"id: ")]
+
+
+def test_publish_only_on_change():
+    """Test unchanged values do not produce events"""
+    broadcaster = IndexBroadcaster()
+    assert broadcaster.publish("stock", 42.0, "Fear", "t1") is not None
+    assert broadcaster.publish("stock", 42.0, "Fear", "t2") is None
+    assert broadcaster.publish("stock", 43.0, "Fear", "t3") is not None
+    assert broadcaster.get_stats()["published"] == 2
+    assert broadcaster.get_stats()["unchanged"] == 1
+
+
+def test_events_after_replays_and_snapshots():
+    """Test Last-Event-ID replay and the latest-per-source fallback"""
+    broadcaster = IndexBroadcaster(buffer_size=3)
+    first = broadcaster.publish("stock", 40.0, "Fear", "t1")
+    second = broadcaster.publish("crypto", 60.0, "Greed", "t1")
+    third = broadcaster.publish("stock", 41.0, "Fear", "t2")
+
+    # New client: latest value of each source
+    assert [e.id for e in broadcaster.events_after(None)] == [second.id, third.id]
+    # Resume: only what was missed
+    assert [e.id for e in broadcaster.events_after(first.id)] == [second.id, third.id]
+    assert broadcaster.events_after(third.id) == []
+    assert [e.source for e in broadcaster.events_after(None, {"crypto"})] == ["crypto"]
+
+    # Resume from before evicted events falls back to the latest values
+    broadcaster.publish("stock", 42.0, "Fear", "t3")
+    broadcaster.publish("stock", 43.0, "Fear", "t4")
+    events = broadcaster.events_after(first.id)
+    assert [e.payload["value"] for e in events] == [60.0, 43.0]
+
+
+@pytest.mark.asyncio
+async def test_thousands_of_subscribers_share_one_wakeup():
+    """Test many idle subscribers wait on one future and all receive a publish"""
+    broadcaster = IndexBroadcaster()
+    broadcaster.publish("stock", 40.0, "Fear", "t1")
+    received = []
+
+    async def consume():
+        stream = broadcaster.subscribe()
+        chunks = [await stream.__anext__() for _ in range(3)]  # retry, snapshot, update
+        received.append(chunks[-1])
+        await stream.aclose()
+
+    tasks = [asyncio.create_task(consume()) for _ in range(2000)]
+    await asyncio.sleep(0.05)
+    assert broadcaster.get_stats()["subscribers"] == 2000
+
+    event = broadcaster.publish("stock", 41.0, "Fear", "t2")
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=10)
+
+    assert received == [event.encoded] * 2000
+    assert broadcaster.get_stats()["subscribers"] == 0
+
+
+@pytest.mark.asyncio
+async def test_idle_subscriber_gets_heartbeat():
+    """Test the shared heartbeat task wakes idle streams"""
+    broadcaster = IndexBroadcaster(heartbeat_interval=0.01)
+    await broadcaster.start()
+    stream = broadcaster.subscribe()
+    assert (await stream.__anext__()).startswith(b"retry:")
+    assert await asyncio.wait_for(stream.__anext__(), timeout=1) == HEARTBEAT
+    await stream.aclose()
+    await broadcaster.stop()
+
+
+def test_stream_endpoint_resumes_from_last_event_id(monkeypatch):
+    """Test the SSE endpoint replays missed events and ends when the broadcaster closes"""
+    from api import fear_greed
+
+    broadcaster = IndexBroadcaster()
+    first = broadcaster.publish("stock", 40.0, "Fear", "t1")
+    second = broadcaster.publish("crypto", 60.0, "Greed", "t1")
+    third = broadcaster.publish("stock", 41.0, "Fear", "t2")
+    broadcaster._closed = True
+    monkeypatch.setattr(fear_greed, "broadcaster", broadcaster)
+
+    response = client.get("/api/v1/fear-greed/stream", headers={"Last-Event-ID": str(first.id)})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    chunks = response.content.split(b"\n\n")
+    assert _event_ids([c + b"\n" for c in chunks]) == [second.id, third.id]
+
+    response = client.get("/api/v1/fear-greed/stream?sources=crypto")
+    assert b'"source":"crypto"' in response.content
+    assert b'"source":"stock"' not in response.content
+
+    assert client.get("/api/v1/fear-greed/stream?sources=unknown").status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_stream_seeds_from_cache(monkeypatch):
+    """Test a new stream gets cached values even before any refresh published them"""
+    from api import fear_greed
+    from tests.test_api_endpoints import _cache_sample
+    from utils.cache import cache
+
+    broadcaster = IndexBroadcaster()
+    broadcaster._closed = True
+    monkeypatch.setattr(fear_greed, "broadcaster", broadcaster)
+    await _cache_sample(fear_greed.CACHE_KEY_CNN)
+
+    response = client.get("/api/v1/fear-greed/stream?sources=stock")
+    assert b'"value":42' in response.content
+    await cache.clear()
@@ -0,0 +1,221 @@
+"""
+Tests for array-backed time series and CNN series parsing
+"""
+import pytest
+from dataclasses import replace
+from fastapi.testclient import TestClient
+from main import app
+from scrapers.cnn_scraper import parse_indicator_series
+from utils.timeseries import TimeSeries, series_store
+
+client = TestClient(app)
+
+CNN_PAYLOAD = {
+    "fear_and_greed": {"score": 42.5, "rating": "fear", "previous_close": 40.1},
+    "fear_and_greed_historical": {
+        "score": 42.5,
+        "data": [
+            {"x": 1700000000000.0, "y": 30.2, "rating": "fear"},
+            {"x": 1700086400000.0, "y": 35.7, "rating": "fear"},
+            {"x": 1700172800000.0, "y": 42.5, "rating": "fear"}
+        ]
+    },
+    "junk_bond_demand": {
+        "score": 60.0,
+        "data": [
+            {"x": 1700086400000.0, "y": 0.5},
+            {"x": 1700000000000.0, "y": 0.4}
+        ]
+    }
+}
+
+
+def test_slice_uses_inclusive_bounds():
+    """Test slicing a series by time range"""
+    ts = TimeSeries([10, 20, 30, 40], [1, 2, 3, 4])
+    assert list(ts.slice(20, 30).values) == [2, 3]
+    assert list(ts.slice(None, 15).values) == [1]
+    assert len(ts.slice(50, None)) == 0
+    assert ts.latest() == (40, 4)
+
+
+def test_parse_indicator_series():
+    """Test every historical section of the payload becomes a series"""
+    series = parse_indicator_series(CNN_PAYLOAD)
+
+    assert set(series) == {"fear_and_greed", "junk_bond_demand"}
+    assert list(series["fear_and_greed"].timestamps) == [1700000000, 1700086400, 1700172800]
+    assert list(series["fear_and_greed"].values) == [30.2, 35.7, 42.5]
+    # Out-of-order points are sorted
+    assert list(series["junk_bond_demand"].values) == [0.4, 0.5]
+
+
+@pytest.mark.asyncio
+async def test_series_endpoint():
+    """Test series endpoint serves cached series with filters"""
+    from api.fear_greed import CACHE_KEY_CNN
+    from api.representation import CachedRepresentation
+    from models.fear_greed import FearGreedResponse
+    from tests.test_api_endpoints import SAMPLE_DATA
+    from utils.cache import cache
+
+    await cache.set(CACHE_KEY_CNN, CachedRepresentation.from_model(FearGreedResponse(**SAMPLE_DATA), ttl=60), ttl=60)
+    series_store.set("stock", parse_indicator_series(CNN_PAYLOAD))
+
+    data = client.get("/api/v1/fear-greed/stock/series").json()
+    assert set(data["indicators"]) == {"fear_and_greed", "junk_bond_demand"}
+
+    data = client.get("/api/v1/fear-greed/stock/series?indicator=fear_and_greed&from=1700086400").json()
+    assert data["indicators"]["fear_and_greed"] == {"timestamps": [1700086400, 1700172800], "values": [35.7, 42.5]}
+
+    assert client.get("/api/v1/fear-greed/stock/series?indicator=nope").status_code == 404
+    await cache.clear()
+    series_store.clear()
+
+
+@pytest.mark.asyncio
+async def test_refresh_stores_series_and_backfills_history():
+    """Test a refresh keeps the parsed series and backfills the history store"""
+    from api.fear_greed import fetch_and_cache
+    from scrapers.cnn_scraper import SOURCE
+    from tests.test_api_endpoints import SAMPLE_DATA
+    from utils.cache import cache
+    from utils.history_store import history_store
+
+    async def scraper():
+        return {**SAMPLE_DATA, "series": parse_indicator_series(CNN_PAYLOAD)}
+
+    representation = await fetch_and_cache(replace(SOURCE, fetcher=scraper, parser=dict))
+
+    assert "series" not in representation.data
+    assert len(series_store.get("stock")["fear_and_greed"]) == 3
+    stored = history_store.query("stock", 1700000000, 1700172800, resolution="raw")
+    assert stored["values"] == [30.2, 35.7, 42.5]
+    await cache.clear()
+    series_store.clear()
+
+
+def test_value_at_nearest_and_linear():
+    """Test binary-search lookups with tolerance"""
+    from utils.timeseries import DEFAULT_TOLERANCE
+
+    day = 86400
+    ts = TimeSeries([0, day, 3 * day], [10, 20, 40])
+    assert ts.value_at(day) == (day, 20)
+    assert ts.value_at(2 * day + 3600) == (3 * day, 40)
+    assert ts.value_at(2 * day, method="linear") == (2 * day, 30)
+    assert ts.value_at(3 * day + DEFAULT_TOLERANCE + 1) is None
+
+
+def test_lookback_targets_use_calendar_units():
+    """Test month/year lookbacks follow the calendar and clamp the day"""
+    from datetime import datetime, timezone
+    import pytest
+    from utils.timeseries import lookback_target, parse_lookbacks
+
+    ref = datetime(2024, 3, 31, tzinfo=timezone.utc).timestamp()
+    assert lookback_target(ref, "1M") == datetime(2024, 2, 29, tzinfo=timezone.utc).timestamp()
+    assert lookback_target(ref, "1y") == datetime(2023, 3, 31, tzinfo=timezone.utc).timestamp()
+    assert lookback_target(ref, "12h") == ref - 12 * 3600
+    assert parse_lookbacks("1d, 7d,1d") == ["1d", "7d"]
+    with pytest.raises(ValueError):
+        parse_lookbacks("7days")
+
+
+def test_crypto_lookbacks_handle_gaps():
+    """Test missing days resolve by timestamp, not by array position"""
+    from scrapers.crypto_scraper import HISTORICAL_LOOKBACKS, get_historical_value, parse_crypto_series
+
+    day = 86400
+    now = 1700000000
+    # Newest first; days 2-9 are missing
+    data = [{"value": str(v), "timestamp": str(now - d * day)} for d, v in [(0, 50), (1, 45), (10, 80), (30, 20)]]
+    series = parse_crypto_series(data)
+
+    assert list(series.values) == [20, 80, 45, 50]
+    assert get_historical_value(series, "1d") == {"value": 45, "status": "Fear"}
+    # No point near 7 days ago: reported as missing instead of a default 50
+    assert get_historical_value(series, "7d") is None
+    assert get_historical_value(series, "10d") == {"value": 80, "status": "Extreme Greed"}
+    assert get_historical_value(series, HISTORICAL_LOOKBACKS["one_year_ago"]) is None
+
+
+@pytest.mark.asyncio
+async def test_lookback_query_parameter():
+    """Test ?lookback= resolves arbitrary lookbacks on the index endpoint"""
+    from api.fear_greed import CACHE_KEY_CRYPTO
+    from api.representation import CachedRepresentation
+    from models.fear_greed import FearGreedResponse
+    from tests.test_api_endpoints import SAMPLE_DATA
+    from utils.cache import cache
+
+    day = 86400
+    await cache.set(CACHE_KEY_CRYPTO, CachedRepresentation.from_model(FearGreedResponse(**SAMPLE_DATA), ttl=60), ttl=60)
+    series_store.set("crypto", {"fear_and_greed": TimeSeries([0, day, 2 * day], [10, 30, 90])})
+
+    response = client.get("/api/v1/fear-greed/crypto?lookback=1d,36h&method=linear")
+    assert response.status_code == 200
+    lookbacks = response.json()["lookbacks"]
+    assert lookbacks["1d"] == {"value": 30, "status": "Fear", "timestamp": day}
+    assert lookbacks["36h"]["value"] == 20
+
+    assert client.get("/api/v1/fear-greed/crypto?lookback=soon").status_code == 400
+    assert client.get("/api/v1/fear-greed/crypto?lookback=1d&method=cubic").status_code == 400
+    await cache.clear()
+    series_store.clear()
+
+
+def test_values_at_matches_value_at():
+    """Test the single-pass batch lookup agrees with per-target binary search"""
+    import random
+
+    day = 86400
+    ts = TimeSeries([d * day for d in range(0, 60, 3)], [float(d) for d in range(0, 60, 3)])
+    targets = [random.uniform(-5 * day, 70 * day) for _ in range(200)] + [9 * day, 9 * day]
+    for method in ("nearest", "linear"):
+        assert ts.values_at(targets, method) == [ts.value_at(t, method) for t in targets]
+    assert TimeSeries().values_at([0, 1]) == [None, None]
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_resolves_points_in_query_order():
+    """Test the batch endpoint returns columns aligned with the queries"""
+    from api.fear_greed import CACHE_KEY_CNN, CACHE_KEY_CRYPTO
+    from api.representation import CachedRepresentation
+    from models.fear_greed import FearGreedResponse
+    from tests.test_api_endpoints import SAMPLE_DATA
+    from utils.cache import cache
+
+    day = 86400
+    representation = CachedRepresentation.from_model(FearGreedResponse(**SAMPLE_DATA), ttl=60)
+    await cache.set(CACHE_KEY_CNN, representation, ttl=60)
+    await cache.set(CACHE_KEY_CRYPTO, representation, ttl=60)
+    series_store.set("stock", {"fear_and_greed": TimeSeries([0, day, 2 * day], [10, 30, 90])})
+    series_store.set("crypto", {"fear_and_greed": TimeSeries([0, day], [80, 60])})
+
+    response = client.post("/api/v1/fear-greed/batch", json={"queries": [
+        {"source": "stock", "offset": "1d"},
+        {"source": "crypto", "timestamp": 0},
+        {"source": "stock", "timestamp": "1970-01-02T12:00:00Z"},
+        {"source": "stock", "timestamp": 30 * day}
+    ], "method": "linear"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["sources"] == ["stock", "crypto", "stock", "stock"]
+    assert data["targets"] == [day, 0, day + day // 2, 30 * day]
+    assert data["values"] == [30, 80, 60, None]
+    assert data["statuses"] == ["Fear", "Extreme Greed", "Greed", None]
+    assert data["timestamps"][3] is None
+    assert data["errors"] == {}
+
+    bad_requests = [
+        {"queries": [{"source": "stock", "offset": "soon"}]},
+        {"queries": [{"source": "stock", "offset": "1d"}], "method": "cubic"}
+    ]
+    for body in bad_requests:
+        assert client.post("/api/v1/fear-greed/batch", json=body).status_code == 400
+    assert client.post("/api/v1/fear-greed/batch", json={"queries": [{"source": "nope", "offset": "1d"}]}).status_code == 404
+    # Exactly one of timestamp/offset
+    assert client.post("/api/v1/fear-greed/batch", json={"queries": [{"source": "stock"}]}).status_code == 422
+    await cache.clear()
+    series_store.clear()
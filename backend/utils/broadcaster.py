@@ -0,0 +1,244 @@
+"""
+Change-only index update events for Server-Sent Events streams
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds between heartbeat comments on idle streams
+HEARTBEAT_INTERVAL = 15.0
+
+# Events kept for Last-Event-ID replay
+REPLAY_BUFFER_SIZE = 256
+
+# Client reconnect delay suggested to EventSource clients (milliseconds)
+RETRY_MS = 5000
+
+HEARTBEAT = b": ping\n\n"
+
+
+class IndexEvent:
+    """One pre-encoded SSE event, shared by every subscriber"""
+
+    __slots__ = ("id", "source", "payload", "encoded")
+
+    def __init__(self, event_id: int, source: str, payload: Dict[str, Any]):
+        """
+        Initialize event
+
+        Args:
+            event_id: Monotonic event id (milliseconds since the epoch)
+            source: Index source name
+            payload: Compact event data
+        """
+        self.id = event_id
+        self.source = source
+        self.payload = payload
+        data = json.dumps(payload, separators=(",", ":"))
+        self.encoded = f"id: {event_id}\nevent: index\ndata: {data}\n\n".encode("utf-8")
+
+
+class IndexBroadcaster:
+    """
+    Fan out index changes to any number of stream subscribers
+
+    Subscribers do not poll or run their own timers: they all await one
+    shared future that is resolved when an event is published or the single
+    heartbeat task ticks, then replaced. Events live in a ring buffer, so a
+    subscriber that was busy writing catches up from the buffer and a client
+    reconnecting with Last-Event-ID gets the events it missed.
+    """
+
+    def __init__(self, heartbeat_interval: float = HEARTBEAT_INTERVAL, buffer_size: int = REPLAY_BUFFER_SIZE):
+        """
+        Initialize broadcaster
+
+        Args:
+            heartbeat_interval: Seconds between heartbeat wake-ups
+            buffer_size: Number of events kept for replay
+        """
+        self.heartbeat_interval = heartbeat_interval
+        self._events: deque = deque(maxlen=buffer_size)
+        self._latest: Dict[str, IndexEvent] = {}
+        self._last_id = 0
+        self._wakeup: Optional[asyncio.Future] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.subscribers = 0
+        self.published = 0
+        self.unchanged = 0
+
+    def _future(self) -> asyncio.Future:
+        """Get the shared wake-up future for the running loop"""
+        loop = asyncio.get_running_loop()
+        if self._wakeup is None or self._wakeup.done() or self._wakeup.get_loop() is not loop:
+            self._wakeup = loop.create_future()
+        return self._wakeup
+
+    def _wake(self) -> None:
+        """Resolve the shared future so every subscriber runs once"""
+        if self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+        self._wakeup = None
+
+    def publish(self, source: str, value: float, status: str, timestamp: str) -> Optional[IndexEvent]:
+        """
+        Record the current value of a source and notify subscribers if it changed
+
+        Args:
+            source: Index source name
+            value: Current index value
+            status: Current status label
+            timestamp: ISO timestamp of the value
+
+        Returns:
+            The new event, or None if value and status are unchanged
+        """
+        previous = self._latest.get(source)
+        if previous is not None and previous.payload["value"] == value and previous.payload["status"] == status:
+            self.unchanged += 1
+            return None
+
+        self._last_id = max(self._last_id + 1, int(time.time() * 1000))
+        event = IndexEvent(
+            self._last_id,
+            source,
+            {"source": source, "value": value, "status": status, "timestamp": timestamp}
+        )
+        self._events.append(event)
+        self._latest[source] = event
+        self.published += 1
+        self._wake()
+        return event
+
+    def latest(self, source: str) -> Optional[IndexEvent]:
+        """
+        Get the newest event of a source
+
+        Args:
+            source: Index source name
+
+        Returns:
+            IndexEvent or None if nothing was published for the source
+        """
+        return self._latest.get(source)
+
+    def events_after(self, last_id: Optional[int], sources: Optional[Iterable[str]] = None) -> List[IndexEvent]:
+        """
+        Get the events a subscriber has not seen yet
+
+        Without a usable last id (new client, or an id older than the replay
+        buffer) the latest event of each source is returned instead, so the
+        client always ends up with the current values.
+
+        Args:
+            last_id: Last event id the client received
+            sources: Restrict to these sources (None for all)
+
+        Returns:
+            Events in id order
+        """
+        # Events may have been evicted between last_id and the oldest buffered one
+        evicted = (
+            len(self._events) == self._events.maxlen
+            and last_id is not None
+            and last_id < self._events[0].id
+        )
+        if last_id is None or evicted:
+            events = sorted(
+                (e for e in self._latest.values() if last_id is None or e.id > last_id),
+                key=lambda e: e.id
+            )
+        else:
+            events = []
+            for event in reversed(self._events):
+                if event.id <= last_id:
+                    break
+                events.append(event)
+            events.reverse()
+
+        if sources is not None:
+            events = [e for e in events if e.source in sources]
+        return events
+
+    async def subscribe(
+        self,
+        last_id: Optional[int] = None,
+        sources: Optional[Iterable[str]] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield encoded SSE chunks for one client until the broadcaster closes
+
+        Args:
+            last_id: Value of the client's Last-Event-ID header
+            sources: Restrict to these sources (None for all)
+
+        Yields:
+            Encoded events, or a heartbeat comment when woken without news
+        """
+        sources = set(sources) if sources is not None else None
+        self.subscribers += 1
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode("utf-8")
+            while True:
+                events = self.events_after(last_id, sources)
+                for event in events:
+                    yield event.encoded
+                if events:
+                    last_id = events[-1].id
+                if self._closed:
+                    return
+
+                await asyncio.shield(self._future())
+                if not self._closed and not self.events_after(last_id, sources):
+                    yield HEARTBEAT
+        finally:
+            self.subscribers -= 1
+
+    async def _heartbeat(self) -> None:
+        """Wake every subscriber periodically so idle streams send a heartbeat"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            self._wake()
+
+    async def start(self) -> None:
+        """Start the shared heartbeat task"""
+        self._closed = False
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and end every open stream"""
+        self._closed = True
+        self._wake()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get broadcaster statistics
+
+        Returns:
+            Dictionary with subscriber and event counters
+        """
+        return {
+            'subscribers': self.subscribers,
+            'published': self.published,
+            'unchanged': self.unchanged,
+            'buffered': len(self._events),
+            'last_event_id': self._last_id
+        }
+
+
+# Global broadcaster instance
+broadcaster = IndexBroadcaster()
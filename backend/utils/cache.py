@@ -1,30 +1,70 @@
 """
-In-memory caching utility with TTL support
+Caching utility with TTL support over pluggable storage backends
 """
+import asyncio
+import os
 import time
 import logging
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Tuple
+
+from utils.cache_backends import CACHE_BACKEND, CacheBackend, CacheEntry, MemoryBackend, create_backend
+from utils.logging_config import hot_path_log
+from utils.metrics import cache_requests
 
 logger = logging.getLogger(__name__)
 
+# Snapshot file for the in-memory backend (optional; "" disables persistence)
+CACHE_SNAPSHOT_PATH = os.getenv("CACHE_SNAPSHOT_PATH", "")
+# Seconds between snapshot writes (only if entries changed; also written at shutdown)
+CACHE_SNAPSHOT_INTERVAL = float(os.getenv("CACHE_SNAPSHOT_INTERVAL", "60"))
+# Seconds between sweeps removing entries past their stale window
+CACHE_SWEEP_INTERVAL = float(os.getenv("CACHE_SWEEP_INTERVAL", "60"))
+
 
 class SimpleCache:
-    """Simple in-memory cache with TTL"""
+    """
+    Cache with a soft TTL and an optional stale window
 
-    def __init__(self, default_ttl: int = 1800):
+    Methods touching storage are coroutines: the in-memory backend answers
+    without suspending, shared backends await their I/O off the event loop.
+    """
+
+    def __init__(
+        self,
+        default_ttl: int = 1800,
+        default_stale_ttl: int = 0,
+        persist_path: Optional[str] = None,
+        backend: Optional[CacheBackend] = None
+    ):
         """
         Initialize cache
 
         Args:
             default_ttl: Default time-to-live in seconds (default: 30 minutes)
+            default_stale_ttl: Seconds past the TTL an entry may still be
+                served as stale (default: 0, no stale window)
+            persist_path: Snapshot file for the default in-memory backend,
+                written by flush() and read by load() (default: None)
+            backend: Entry storage (default: in-memory, per process)
         """
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        self.backend = backend or MemoryBackend(persist_path=persist_path)
         self.default_ttl = default_ttl
+        self.default_stale_ttl = default_stale_ttl
         self.hits = 0
         self.misses = 0
+        self.stale_hits = 0
+        self.errors = 0
+        self.swept = 0
+        self._sweeper: Optional[asyncio.Task] = None
+        self._flusher: Optional[asyncio.Task] = None
 
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None
+    ) -> None:
         """
         Set cache value with TTL
 
@@ -32,19 +72,25 @@ class SimpleCache:
             key: Cache key
             value: Value to cache
             ttl: Time-to-live in seconds (None uses default)
+            stale_ttl: Stale window after the TTL in seconds (None uses default)
         """
         ttl = ttl or self.default_ttl
+        stale_ttl = self.default_stale_ttl if stale_ttl is None else stale_ttl
         expiry = time.time() + ttl
 
-        self._cache[key] = {
-            'value': value,
-            'expiry': expiry,
-            'created_at': datetime.utcnow()
-        }
+        try:
+            await self.backend.set(key, CacheEntry(value, expiry, expiry + stale_ttl))
+        except Exception as e:
+            # A shared backend outage degrades to uncached responses, not errors
+            self.errors += 1
+            logger.warning(f"Cache set failed: key='{key}': {e}")
+            return
 
-        logger.info(f"Cache set: key='{key}', ttl={ttl}s")
+        hot_path_log.log(
+            logger, logging.INFO, ("set", key), "Cache set: key='%s', ttl=%ss, stale_ttl=%ss", key, ttl, stale_ttl
+        )
 
-    def get(self, key: str) -> Optional[Any]:
+    async def get(self, key: str) -> Optional[Any]:
         """
         Get value from cache
 
@@ -54,59 +100,244 @@ class SimpleCache:
         Returns:
             Cached value or None if expired/missing
         """
-        if key not in self._cache:
+        value, is_stale = await self.get_with_staleness(key, allow_stale=False)
+        return value
+
+    async def get_with_staleness(self, key: str, allow_stale: bool = True) -> Tuple[Optional[Any], bool]:
+        """
+        Get value from cache, optionally accepting entries past their TTL
+
+        Entries past the TTL but inside their stale window are kept so they
+        can be served while a refresh is in progress or upstream is failing.
+
+        Args:
+            key: Cache key
+            allow_stale: Return stale entries instead of treating them as misses
+
+        Returns:
+            Tuple of (cached value or None, whether the value is stale)
+        """
+        try:
+            entry = await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache get failed: key='{key}': {e}")
+            entry = None
+
+        if entry is None:
             self.misses += 1
-            logger.debug(f"Cache miss: key='{key}'")
-            return None
+            cache_requests.inc(key, "miss")
+            logger.debug("Cache miss: key='%s'", key)
+            return None, False
 
-        entry = self._cache[key]
+        now = time.time()
 
-        # Check if expired
-        if time.time() > entry['expiry']:
-            del self._cache[key]
+        # Past the stale window - drop the entry entirely
+        if now > entry.stale_until:
+            try:
+                await self.backend.delete(key)
+            except Exception as e:
+                # Shared backends also expire the entry on their own
+                self.errors += 1
+                logger.warning(f"Cache delete failed: key='{key}': {e}")
             self.misses += 1
+            cache_requests.inc(key, "expired")
             logger.info(f"Cache expired: key='{key}'")
-            return None
+            return None, False
+
+        # Past the TTL but still inside the stale window
+        if now > entry.expiry:
+            if not allow_stale:
+                self.misses += 1
+                cache_requests.inc(key, "miss")
+                logger.debug("Cache stale (ignored): key='%s'", key)
+                return None, False
+
+            self.stale_hits += 1
+            cache_requests.inc(key, "stale")
+            logger.debug("Cache stale hit: key='%s'", key)
+            return entry.value, True
 
         self.hits += 1
-        logger.debug(f"Cache hit: key='{key}'")
-        return entry['value']
+        cache_requests.inc(key, "hit")
+        logger.debug("Cache hit: key='%s'", key)
+        return entry.value, False
 
-    def invalidate(self, key: str) -> None:
+    async def invalidate(self, key: str) -> None:
         """
         Invalidate cache entry
 
         Args:
             key: Cache key to invalidate
         """
-        if key in self._cache:
-            del self._cache[key]
-            logger.info(f"Cache invalidated: key='{key}'")
+        try:
+            await self.backend.delete(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache invalidate failed: key='{key}': {e}")
+            return
+        logger.info(f"Cache invalidated: key='{key}'")
 
-    def clear(self) -> None:
+    async def clear(self) -> None:
         """Clear all cache entries"""
-        self._cache.clear()
+        await self.backend.clear()
         self.hits = 0
         self.misses = 0
+        self.stale_hits = 0
+        self.errors = 0
+        self.swept = 0
         logger.info("Cache cleared")
 
-    def get_stats(self) -> Dict[str, Any]:
+    async def sweep(self) -> int:
+        """
+        Remove entries past their stale window without waiting for a get()
+
+        Returns:
+            Number of entries removed
+        """
+        try:
+            removed = await self.backend.sweep()
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache sweep failed: {e}")
+            return 0
+        self.swept += removed
+        if removed:
+            logger.info(f"Cache sweep removed {removed} expired entries")
+        return removed
+
+    async def flush(self) -> bool:
+        """
+        Persist changes since the last flush (in-memory backend snapshots)
+
+        Returns:
+            True if a snapshot was written
+        """
+        try:
+            return await self.backend.flush()
+        except Exception as e:
+            logger.warning(f"Cache flush failed: {e}")
+            return False
+
+    async def _sweep_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.sweep()
+
+    async def _flush_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    async def start(
+        self,
+        interval: float = CACHE_SWEEP_INTERVAL,
+        snapshot_interval: float = CACHE_SNAPSHOT_INTERVAL
+    ) -> None:
+        """
+        Start the periodic expiry sweeper and snapshot writer
+
+        Args:
+            interval: Seconds between sweeps
+            snapshot_interval: Seconds between snapshot writes
+        """
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_loop(interval))
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop(snapshot_interval))
+
+    async def stop(self) -> None:
+        """Stop the background tasks and write a final snapshot"""
+        for task in (self._sweeper, self._flusher):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._sweeper = None
+        self._flusher = None
+        await self.flush()
+
+    async def load(self) -> int:
+        """
+        Restore persisted entries (in-memory backend snapshots)
+
+        Entries keep their stored expiry times: entries past their TTL but
+        inside the stale window come back as stale fallbacks, entries past the
+        stale window are dropped.
+
+        Returns:
+            Number of entries restored
+        """
+        return await self.backend.load()
+
+    async def acquire_lock(self, name: str, ttl: float) -> Optional[str]:
+        """
+        Try to take a lock shared by every process using the same backend
+
+        Args:
+            name: Lock name (usually the cache key being refreshed)
+            ttl: Seconds after which the lock expires if never released
+
+        Returns:
+            Owner token, or None if another holder has the lock
+        """
+        return await self.backend.acquire_lock(name, ttl)
+
+    async def release_lock(self, name: str, token: str) -> None:
+        """
+        Release a lock taken with acquire_lock
+
+        Args:
+            name: Lock name
+            token: Token returned by acquire_lock
+        """
+        try:
+            await self.backend.release_lock(name, token)
+        except Exception as e:
+            # The lock expires on its own after its TTL
+            logger.warning(f"Failed to release lock '{name}': {e}")
+
+    async def close(self) -> None:
+        """Release backend resources"""
+        await self.backend.close()
+
+    async def get_stats(self) -> Dict[str, Any]:
         """
         Get cache statistics
 
         Returns:
             Dictionary with cache stats
         """
-        total_requests = self.hits + self.misses
+        try:
+            entries = await self.backend.count()
+        except Exception as e:
+            logger.warning(f"Cache backend unavailable for stats: {e}")
+            entries = None
+
+        total_requests = self.hits + self.stale_hits + self.misses
         hit_rate = (self.hits / total_requests * 100) if total_requests > 0 else 0
+        backend_stats = self.backend.get_stats()
 
         return {
-            'entries': len(self._cache),
+            'entries': entries,
             'hits': self.hits,
+            'stale_hits': self.stale_hits,
             'misses': self.misses,
-            'hit_rate': round(hit_rate, 2)
+            'errors': self.errors,
+            'hit_rate': round(hit_rate, 2),
+            'swept': self.swept,
+            # Only process-local backends bound and account their entries
+            'evictions': backend_stats.get('evictions'),
+            'memory_bytes': backend_stats.get('bytes'),
+            'backend': backend_stats
         }
 
 
 # Global cache instance
-cache = SimpleCache(default_ttl=1800)  # 30 minutes default
+cache = SimpleCache(
+    default_ttl=1800,  # 30 minutes fresh
+    default_stale_ttl=21600,  # 6 hours stale
+    backend=create_backend(CACHE_BACKEND, persist_path=CACHE_SNAPSHOT_PATH)
+)
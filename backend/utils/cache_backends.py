@@ -0,0 +1,774 @@
+"""
+Storage backends for SimpleCache: in-process memory, shared SQLite and Redis
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+import os
+import pickle
+import sqlite3
+import struct
+import sys
+import tempfile
+import threading
+import time
+import types
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import redis.asyncio as redis
+from redis.asyncio.retry import Retry
+from redis.backoff import NoBackoff
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+
+from utils import cache_codec
+
+logger = logging.getLogger(__name__)
+
+# Backend selection for the global cache: "memory", "sqlite" or "redis"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "data/cache.db")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+# Seconds a Redis command may take before the request treats it as a miss
+CACHE_REDIS_TIMEOUT = float(os.getenv("CACHE_REDIS_TIMEOUT", "2"))
+# Bounds of the in-memory backend; least recently used entries are evicted first
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Bumped whenever the snapshot layout changes; other versions are ignored on load
+SNAPSHOT_VERSION = 5
+
+
+class CacheEntry:
+    """Stored value with its expiry times and (in memory) its estimated size"""
+
+    __slots__ = ("value", "expiry", "stale_until", "size", "memoized")
+
+    def __init__(self, value: Any, expiry: float, stale_until: float, size: int = 0):
+        """
+        Initialize entry
+
+        Args:
+            value: Cached value
+            expiry: Unix time the value stops being fresh
+            stale_until: Unix time the value may no longer be served at all
+            size: Estimated memory footprint in bytes (set by MemoryBackend)
+        """
+        self.value = value
+        self.expiry = expiry
+        self.stale_until = stale_until
+        self.size = size
+        # Memoized bytes of the value already counted in size (see memoized_bytes)
+        self.memoized = 0
+
+
+# Objects counted by their own size only: scalars, buffers and anything shared
+# program-wide (classes, modules, functions) that a cache entry merely refers to
+_LEAF_TYPES = (
+    str, bytes, bytearray, int, float, bool, type(None),
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType
+)
+
+
+def memoized_bytes(value: Any) -> int:
+    """
+    Bytes a value has memoized since it was built (e.g. a representation's variants)
+
+    Values that grow after they are cached expose a memoized_bytes attribute;
+    MemoryBackend re-counts it on access so the growth stays within its bounds.
+
+    Args:
+        value: Cached value
+
+    Returns:
+        Memoized bytes (0 for values that never grow)
+    """
+    return getattr(value, "memoized_bytes", 0)
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the memory held by a value
+
+    Sums sys.getsizeof over the value and everything reachable through
+    containers, instance __dict__ and __slots__, counting shared objects
+    once. Arrays and bytes report their buffers, so pre-encoded bodies and
+    typed series are counted in full.
+
+    Args:
+        value: Any object
+
+    Returns:
+        Approximate size in bytes
+    """
+    seen = set()
+    stack = [value]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+
+        if isinstance(obj, _LEAF_TYPES):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            attrs = getattr(obj, "__dict__", None)
+            if attrs is not None:
+                stack.append(attrs)
+            for cls in type(obj).__mro__:
+                for name in getattr(cls, "__slots__", ()):
+                    attr = getattr(obj, name, None)
+                    if attr is not None:
+                        stack.append(attr)
+    return total
+
+
+# Fixed cost of an entry besides its value: the entry itself and its dict slot and key
+_ENTRY_OVERHEAD = sys.getsizeof(CacheEntry(None, 0.0, 0.0)) + 2 * sys.getsizeof(0.0) + 100
+
+
+class CacheBackend(ABC):
+    """
+    Key -> entry storage behind SimpleCache
+
+    SimpleCache owns the TTL semantics; backends only store CacheEntry
+    objects until their stale window ends and provide a lock so one worker
+    refreshes a key. Methods are coroutines so shared backends never block
+    the event loop on I/O. Backends must implement every abstract method;
+    the others have defaults.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Get an entry
+
+        Args:
+            key: Cache key
+
+        Returns:
+            CacheEntry or None if missing
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        """
+        Store an entry until its stale_until time
+
+        Args:
+            key: Cache key
+            entry: CacheEntry
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """
+        Remove an entry
+
+        Args:
+            key: Cache key
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Remove all entries"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Number of stored entries"""
+        raise NotImplementedError
+
+    async def sweep(self) -> int:
+        """
+        Remove entries past their stale window
+
+        Backends whose storage expires entries on its own keep the default.
+
+        Returns:
+            Number of entries removed
+        """
+        return 0
+
+    @abstractmethod
+    async def acquire_lock(self, name: str, ttl: float) -> Optional[str]:
+        """
+        Try to take a lock without waiting
+
+        Args:
+            name: Lock name
+            ttl: Seconds after which the lock is released automatically
+
+        Returns:
+            Owner token to pass to release_lock, or None if the lock is held
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def release_lock(self, name: str, token: str) -> None:
+        """
+        Release a lock if it is still held with this token
+
+        Args:
+            name: Lock name
+            token: Token returned by acquire_lock
+        """
+        raise NotImplementedError
+
+    async def load(self) -> int:
+        """
+        Restore persisted entries (only needed by process-local backends)
+
+        Returns:
+            Number of entries restored
+        """
+        return 0
+
+    async def flush(self) -> bool:
+        """
+        Persist changes made since the last flush (only needed by process-local backends)
+
+        Returns:
+            True if anything was written
+        """
+        return False
+
+    async def close(self) -> None:
+        """Release backend resources"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get backend statistics
+
+        Returns:
+            Dictionary with the backend name
+        """
+        return {'name': self.name}
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Process-local LRU map, optionally snapshotted to disk
+
+    Changes only mark the map dirty; flush() writes the snapshot in a worker
+    thread, so SimpleCache calls it periodically and at shutdown instead of
+    pickling every entry on each change.
+
+    The map is bounded by entry count and by the estimated size of the
+    stored values; once either bound is exceeded, least recently used
+    entries are evicted. Sizes are estimated when an entry is set; bytes a
+    value memoizes afterwards (a representation's stale and lookback
+    variants) are added on its next access, evicting other entries if needed.
+    """
+
+    name = "memory"
+
+    def __init__(
+        self,
+        persist_path: Optional[str] = None,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES
+    ):
+        """
+        Initialize backend
+
+        Args:
+            persist_path: Snapshot file written by flush() and read by load()
+                (default: None, memory only)
+            max_entries: Maximum number of entries
+            max_bytes: Maximum estimated size of all entries in bytes
+        """
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._locks: Dict[str, tuple] = {}
+        self.persist_path = persist_path or None
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self.expired = 0
+        self.snapshot_writes = 0
+        self.snapshot_errors = 0
+        self._dirty = False
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            memoized = memoized_bytes(entry.value)
+            if memoized != entry.memoized:
+                # The value grew (or dropped memoized data) since it was last counted
+                self.bytes += memoized - entry.memoized
+                entry.size += memoized - entry.memoized
+                entry.memoized = memoized
+                self._evict()
+        return entry
+
+    def _store(self, key: str, entry: CacheEntry) -> None:
+        """Insert or replace an entry as the most recently used, then enforce the bounds"""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous.size
+        entry.size = _ENTRY_OVERHEAD + sys.getsizeof(key) + estimate_size(entry.value)
+        entry.memoized = memoized_bytes(entry.value)
+        self._entries[key] = entry
+        self.bytes += entry.size
+        self._evict()
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until the bounds hold"""
+        # The most recently used entry is kept even if it alone exceeds max_bytes
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self.bytes > self.max_bytes
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evictions += 1
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        self._store(key, entry)
+        self._dirty = True
+
+    async def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+            self._dirty = True
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+        self._dirty = True
+
+    async def count(self) -> int:
+        return len(self._entries)
+
+    async def sweep(self) -> int:
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if entry.stale_until < now]
+        for key in expired:
+            self.bytes -= self._entries.pop(key).size
+        if expired:
+            self.expired += len(expired)
+            self._dirty = True
+        return len(expired)
+
+    async def acquire_lock(self, name: str, ttl: float) -> Optional[str]:
+        now = time.time()
+        held = self._locks.get(name)
+        if held is not None and held[1] > now:
+            return None
+        token = uuid.uuid4().hex
+        self._locks[name] = (token, now + ttl)
+        return token
+
+    async def release_lock(self, name: str, token: str) -> None:
+        held = self._locks.get(name)
+        if held is not None and held[0] == token:
+            del self._locks[name]
+
+    async def flush(self) -> bool:
+        """
+        Write the snapshot if entries changed since the last write
+
+        The map is copied on the event loop (entries and their values are
+        never modified once stored); pickling and the fsync run in a thread.
+
+        Returns:
+            True if a snapshot was written
+        """
+        if not self.persist_path or not self._dirty:
+            return False
+        self._dirty = False
+        written = await asyncio.to_thread(self._snapshot, OrderedDict(self._entries))
+        if not written:
+            # Retried on the next flush
+            self._dirty = True
+        return written
+
+    def _snapshot(self, entries: Optional["OrderedDict[str, CacheEntry]"] = None) -> bool:
+        """
+        Write entries to the snapshot file atomically
+
+        The snapshot is written to a temporary file in the same directory and
+        renamed over the previous one, so a crash mid-write never leaves a
+        truncated snapshot behind. Failures are logged, never raised.
+
+        Args:
+            entries: Entries to write (default: the current map)
+
+        Returns:
+            True if the snapshot was written
+        """
+        if not self.persist_path:
+            return False
+        entries = self._entries if entries is None else entries
+
+        directory = os.path.dirname(self.persist_path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".cache-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(
+                        {'version': SNAPSHOT_VERSION, 'entries': entries},
+                        f,
+                        protocol=pickle.HIGHEST_PROTOCOL
+                    )
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.persist_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self.snapshot_writes += 1
+            return True
+        except Exception as e:
+            self.snapshot_errors += 1
+            logger.warning(f"Failed to write cache snapshot to {self.persist_path}: {e}")
+            return False
+
+    async def load(self) -> int:
+        """
+        Restore entries from the snapshot file
+
+        Entries keep their stored expiry times: entries past their TTL but
+        inside the stale window come back as stale fallbacks, entries past the
+        stale window are dropped. A missing or unreadable snapshot leaves the
+        cache empty.
+
+        Returns:
+            Number of entries restored
+        """
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return 0
+
+        try:
+            with open(self.persist_path, "rb") as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache snapshot {self.persist_path}: {e}")
+            return 0
+
+        if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+            logger.warning(f"Ignoring cache snapshot {self.persist_path} with unknown format")
+            return 0
+
+        now = time.time()
+        restored = 0
+        for key, entry in snapshot['entries'].items():
+            if now > entry.stale_until:
+                continue
+            self._store(key, entry)
+            restored += 1
+
+        logger.info(f"Restored {restored} cache entries from {self.persist_path}")
+        return restored
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'bytes': self.bytes,
+            'evictions': self.evictions,
+            'expired': self.expired,
+            'snapshot': {
+                'path': self.persist_path,
+                'writes': self.snapshot_writes,
+                'errors': self.snapshot_errors
+            }
+        }
+
+
+class SharedBackend(CacheBackend):
+    """
+    Base for backends storing serialized entries outside the process
+
+    Entries are stored as a small header (format version, expiry times and
+    a random write id) followed by the value in cache_codec's explicit
+    format: shared storage may be writable by other hosts, so nothing read
+    from it is unpickled. The last decoded entry per key is kept in
+    process: while the stored header is unchanged, get() returns that same
+    entry instead of decoding a new copy, so values keep their memoized
+    state (e.g. a representation's stale and lookback variants).
+    """
+
+    # Bumped whenever the payload layout changes; other versions read as misses
+    PAYLOAD_VERSION = 2
+    # format version, expiry, stale_until, write id
+    _HEADER = struct.Struct("!Bdd8s")
+    # Keys whose decoded entry is kept (least recently used are dropped)
+    _DECODED_MAX = 256
+
+    def __init__(self):
+        self._decoded: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _encode(self, entry: CacheEntry) -> bytes:
+        """Serialize an entry with a fresh write id"""
+        header = self._HEADER.pack(self.PAYLOAD_VERSION, entry.expiry, entry.stale_until, os.urandom(8))
+        return header + cache_codec.dumps(entry.value)
+
+    def _decode(self, key: str, payload: bytes) -> Optional[CacheEntry]:
+        """Deserialize an entry, reusing the previous decode if the write is the same"""
+        header = bytes(payload[:self._HEADER.size])
+        decoded = self._decoded.get(key)
+        if decoded is not None and decoded[0] == header:
+            self._decoded.move_to_end(key)
+            return decoded[1]
+
+        if len(header) < self._HEADER.size or header[0] != self.PAYLOAD_VERSION:
+            # Written by another release (or not by us at all)
+            logger.warning(f"Ignoring cache entry in an unknown format: key='{key}'")
+            return None
+        _, expiry, stale_until, _ = self._HEADER.unpack(header)
+        entry = CacheEntry(cache_codec.loads(payload[self._HEADER.size:]), expiry, stale_until)
+        self._decoded[key] = (header, entry)
+        self._decoded.move_to_end(key)
+        if len(self._decoded) > self._DECODED_MAX:
+            self._decoded.popitem(last=False)
+        return entry
+
+    def _forget(self, key: Optional[str] = None) -> None:
+        """Drop decoded entries (all of them if no key is given)"""
+        if key is None:
+            self._decoded.clear()
+        else:
+            self._decoded.pop(key, None)
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    stale_until REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS cache_locks (
+    name TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteBackend(SharedBackend):
+    """
+    Entries shared by every worker process on one host through a WAL-mode SQLite file
+
+    Queries run in worker threads (asyncio.to_thread), so a busy database
+    delays only the requests waiting on it, not the event loop.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = CACHE_SQLITE_PATH):
+        """
+        Initialize backend (the database is opened on first use)
+
+        Args:
+            path: SQLite database path on storage shared by the workers
+        """
+        super().__init__()
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SQLITE_SCHEMA)
+            self._conn = conn
+            logger.info(f"Opened shared cache: {self.path}")
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> tuple:
+        """Run one statement (in a worker thread); returns (first row, affected row count)"""
+        with self._lock:
+            cursor = self._connect().execute(sql, params)
+            return cursor.fetchone(), cursor.rowcount
+
+    async def _run(self, sql: str, params: tuple = ()) -> tuple:
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        row, _ = await self._run(
+            "SELECT payload FROM cache_entries WHERE key = ? AND stale_until >= ?", (key, time.time())
+        )
+        return self._decode(key, row[0]) if row else None
+
+    def _replace(self, key: str, payload: bytes, stale_until: float) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, payload, stale_until) VALUES (?, ?, ?)",
+                (key, payload, stale_until)
+            )
+            # Entries past their stale window are never read again
+            conn.execute("DELETE FROM cache_entries WHERE stale_until < ?", (time.time(),))
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        await asyncio.to_thread(self._replace, key, self._encode(entry), entry.stale_until)
+
+    async def delete(self, key: str) -> None:
+        self._forget(key)
+        await self._run("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    async def clear(self) -> None:
+        self._forget()
+        await self._run("DELETE FROM cache_entries")
+
+    async def count(self) -> int:
+        row, _ = await self._run("SELECT COUNT(*) FROM cache_entries WHERE stale_until >= ?", (time.time(),))
+        return row[0]
+
+    async def sweep(self) -> int:
+        _, removed = await self._run("DELETE FROM cache_entries WHERE stale_until < ?", (time.time(),))
+        return removed
+
+    async def acquire_lock(self, name: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        now = time.time()
+        _, inserted = await self._run(
+            "INSERT INTO cache_locks (name, token, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at "
+            "WHERE cache_locks.expires_at < ?",
+            (name, token, now + ttl, now)
+        )
+        return token if inserted == 1 else None
+
+    async def release_lock(self, name: str, token: str) -> None:
+        await self._run("DELETE FROM cache_locks WHERE name = ? AND token = ?", (name, token))
+
+    def _close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._close)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'name': self.name, 'path': self.path}
+
+
+# Deletes the lock only if it still holds our token
+_RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+
+class RedisBackend(SharedBackend):
+    """Entries shared by every worker and replica through a Redis server (redis-py asyncio client)"""
+
+    name = "redis"
+
+    def __init__(self, url: str = CACHE_REDIS_URL, prefix: str = "fear-greed:", timeout: float = CACHE_REDIS_TIMEOUT):
+        """
+        Initialize backend (connections are opened on first use)
+
+        Args:
+            url: redis://[:password@]host[:port][/db] (rediss:// for TLS)
+            prefix: Namespace for keys and locks
+            timeout: Connect and command timeout in seconds
+        """
+        super().__init__()
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", "rediss"):
+            raise ValueError(f"Unsupported cache URL scheme: {parsed.scheme}")
+        self.url = url
+        self.scheme = parsed.scheme
+        self.prefix = prefix
+        # A dropped pooled connection is retried once on a fresh one
+        self._client = redis.Redis.from_url(
+            url,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+            retry=Retry(NoBackoff(), 1),
+            retry_on_error=[RedisConnectionError, RedisTimeoutError]
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}cache:{key}"
+
+    async def _keys(self) -> list:
+        """Collect all cache keys with SCAN"""
+        return [key async for key in self._client.scan_iter(match=f"{self.prefix}cache:*", count=100)]
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        payload = await self._client.get(self._key(key))
+        return self._decode(key, payload) if payload is not None else None
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        ttl_ms = max(1, int((entry.stale_until - time.time()) * 1000))
+        await self._client.set(self._key(key), self._encode(entry), px=ttl_ms)
+
+    async def delete(self, key: str) -> None:
+        self._forget(key)
+        await self._client.delete(self._key(key))
+
+    async def clear(self) -> None:
+        self._forget()
+        keys = await self._keys()
+        if keys:
+            await self._client.delete(*keys)
+
+    async def count(self) -> int:
+        return len(await self._keys())
+
+    async def acquire_lock(self, name: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        acquired = await self._client.set(f"{self.prefix}lock:{name}", token, nx=True, px=max(1, int(ttl * 1000)))
+        return token if acquired else None
+
+    async def release_lock(self, name: str, token: str) -> None:
+        await self._client.eval(_RELEASE_SCRIPT, 1, f"{self.prefix}lock:{name}", token)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        kwargs = self._client.connection_pool.connection_kwargs
+        return {
+            'name': self.name,
+            'url': f"{self.scheme}://{kwargs.get('host')}:{kwargs.get('port', 6379)}/{kwargs.get('db', 0)}"
+        }
+
+
+def create_backend(name: str = CACHE_BACKEND, persist_path: Optional[str] = None) -> CacheBackend:
+    """
+    Build a cache backend by name
+
+    Args:
+        name: "memory", "sqlite" or "redis"
+        persist_path: Snapshot file for the memory backend
+
+    Returns:
+        CacheBackend
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if name == "memory":
+        return MemoryBackend(persist_path=persist_path)
+    if name == "sqlite":
+        return SQLiteBackend()
+    if name == "redis":
+        return RedisBackend()
+    raise ValueError(f"Unknown cache backend '{name}': expected memory, sqlite or redis")
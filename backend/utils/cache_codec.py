@@ -0,0 +1,106 @@
+"""
+Explicit serialization of values stored in shared cache backends
+
+Shared backends (SQLite, Redis) can be written by anything with access to
+the file or server, so their values are never unpickled. A value is stored
+as JSON describing it plus raw binary blobs (response bodies, float
+arrays), and only registered types can be rebuilt from it:
+
+    4 bytes   length of the JSON document (big-endian)
+    JSON      {"type": <tag>, "value": <JSON value>, "blobs": [<blob length>, ...]}
+    blobs     concatenated, in order
+
+Plain JSON values (dicts, lists, strings, numbers) need no registration.
+Modules owning a cacheable type register an encoder and decoder for it.
+"""
+import struct
+from typing import Any, Callable, Dict, List, Tuple
+
+import orjson
+
+# Tag of plain JSON values
+JSON_TYPE = "json"
+
+_LENGTH = struct.Struct("!I")
+
+# tag -> (predicate selecting values, encoder, decoder)
+_codecs: Dict[str, Tuple[Callable[[Any], bool], Callable[[Any], Tuple[Any, List[bytes]]], Callable]] = {}
+
+
+def register(
+    tag: str,
+    matches: Callable[[Any], bool],
+    encode: Callable[[Any], Tuple[Any, List[bytes]]],
+    decode: Callable[[Any, List[bytes]], Any]
+) -> None:
+    """
+    Register a cacheable type
+
+    Args:
+        tag: Name stored with encoded values
+        matches: Predicate selecting the values this codec encodes
+        encode: Function returning (JSON-compatible value, list of blobs)
+        decode: Function rebuilding the value from the JSON value and blobs
+    """
+    if tag == JSON_TYPE:
+        raise ValueError(f"Codec tag '{tag}' is reserved")
+    _codecs[tag] = (matches, encode, decode)
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Serialize a value
+
+    Args:
+        value: Registered type or plain JSON value
+
+    Returns:
+        Encoded bytes
+
+    Raises:
+        TypeError: If the value is neither registered nor JSON-compatible
+    """
+    tag, json_value, blobs = JSON_TYPE, value, []
+    for candidate, (matches, encode, _) in _codecs.items():
+        if matches(value):
+            tag = candidate
+            json_value, blobs = encode(value)
+            break
+    document = orjson.dumps({"type": tag, "value": json_value, "blobs": [len(blob) for blob in blobs]})
+    return b"".join([_LENGTH.pack(len(document)), document, *blobs])
+
+
+def loads(payload: bytes) -> Any:
+    """
+    Deserialize a value written by dumps()
+
+    Args:
+        payload: Encoded bytes
+
+    Returns:
+        Rebuilt value
+
+    Raises:
+        ValueError: If the payload is malformed or its type is not registered
+    """
+    try:
+        (length,) = _LENGTH.unpack_from(payload)
+        document = orjson.loads(payload[_LENGTH.size:_LENGTH.size + length])
+        tag, json_value, sizes = document["type"], document["value"], document["blobs"]
+    except (struct.error, orjson.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError(f"Malformed cache payload: {e}") from e
+
+    blobs = []
+    offset = _LENGTH.size + length
+    for size in sizes:
+        blobs.append(bytes(payload[offset:offset + size]))
+        offset += size
+    if offset != len(payload):
+        raise ValueError("Malformed cache payload: blob lengths do not match")
+
+    if tag == JSON_TYPE:
+        return json_value
+    codec = _codecs.get(tag)
+    if codec is None:
+        raise ValueError(f"Unknown cache payload type '{tag}'")
+    return codec[2](json_value, blobs)
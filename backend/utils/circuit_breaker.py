@@ -0,0 +1,239 @@
+"""
+Per-upstream circuit breakers so a failing upstream fails fast
+"""
+import functools
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.retry import is_retryable
+
+logger = logging.getLogger(__name__)
+
+# Consecutive upstream failures that open a breaker
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+# Seconds an open breaker rejects calls before letting a trial call through
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        """
+        Initialize error
+
+        Args:
+            name: Breaker name
+            retry_after: Seconds until the breaker lets a trial call through
+        """
+        super().__init__(f"Circuit breaker '{name}' is open, retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker
+
+    Closed: calls go through; consecutive failures are counted.
+    Open: calls fail immediately with CircuitOpenError for reset_timeout.
+    Half-open: one trial call goes through; success closes the breaker,
+    failure opens it again.
+
+    Only failures the upstream is responsible for (see is_failure) count;
+    a parse error means the upstream answered.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+        is_failure: Callable[[BaseException], bool] = is_retryable
+    ):
+        """
+        Initialize breaker
+
+        Args:
+            name: Breaker name (the upstream source)
+            failure_threshold: Consecutive failures that open the breaker
+            reset_timeout: Seconds to stay open before a trial call
+            is_failure: Predicate selecting exceptions that count as failures
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.is_failure = is_failure
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once reset_timeout has passed"""
+        if self.opened_at is None:
+            return CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    def before_call(self) -> None:
+        """
+        Admit or reject a call
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with a
+                trial call already in flight
+        """
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and not self.trial_in_flight:
+            self.trial_in_flight = True
+            logger.info(f"Circuit breaker '{self.name}' half-open, sending trial call")
+            return
+
+        self.rejected += 1
+        retry_after = max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful call"""
+        if self.opened_at is not None:
+            logger.info(f"Circuit breaker '{self.name}' closed")
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the breaker at the threshold or on a failed trial"""
+        self.consecutive_failures += 1
+        if self.trial_in_flight or self.consecutive_failures >= self.failure_threshold:
+            if self.opened_at is None or self.trial_in_flight:
+                self.times_opened += 1
+                logger.warning(
+                    f"Circuit breaker '{self.name}' opened after {self.consecutive_failures} "
+                    f"consecutive failures, rejecting calls for {self.reset_timeout:.0f}s"
+                )
+            self.opened_at = time.monotonic()
+        self.trial_in_flight = False
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Call func through the breaker
+
+        Args:
+            func: Async function to call
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Result of func
+
+        Raises:
+            CircuitOpenError: If the call was rejected
+            Whatever func raised
+        """
+        self.before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            if isinstance(e, Exception) and self.is_failure(e):
+                self.record_failure()
+            else:
+                # The upstream answered (or the caller went away): not its fault
+                self.trial_in_flight = False
+            raise
+        self.record_success()
+        return result
+
+    def wrap(self, func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        """
+        Wrap an async function so every call goes through the breaker
+
+        Args:
+            func: Async function to wrap
+
+        Returns:
+            Async function with the same name
+        """
+        @functools.wraps(func)
+        async def guarded(*args, **kwargs):
+            return await self.call(func, *args, **kwargs)
+        return guarded
+
+    def reset(self) -> None:
+        """Close the breaker and clear its counters"""
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get breaker status
+
+        Returns:
+            Dictionary with state, failure count and rejection statistics
+        """
+        state = self.state
+        retry_after = None
+        if state == OPEN:
+            retry_after = round(self.opened_at + self.reset_timeout - time.monotonic(), 1)
+        return {
+            'state': state,
+            'consecutive_failures': self.consecutive_failures,
+            'failure_threshold': self.failure_threshold,
+            'reset_timeout': self.reset_timeout,
+            'retry_after': retry_after,
+            'times_opened': self.times_opened,
+            'rejected': self.rejected
+        }
+
+
+class CircuitBreakerRegistry:
+    """Circuit breakers by upstream name, created on first use"""
+
+    def __init__(self):
+        """Initialize registry"""
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        """
+        Get the breaker for an upstream, creating it with the configured defaults
+
+        Args:
+            name: Upstream (source) name
+
+        Returns:
+            CircuitBreaker
+        """
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers[name] = CircuitBreaker(name)
+        return breaker
+
+    def reset(self) -> None:
+        """Close every breaker"""
+        for breaker in self._breakers.values():
+            breaker.reset()
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the status of every breaker
+
+        Returns:
+            Mapping of upstream name to breaker status
+        """
+        return {name: breaker.get_status() for name, breaker in self._breakers.items()}
+
+
+# Global breakers for the index upstreams
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,51 @@
+"""
+Body compression for pre-encoded responses and published snapshots
+"""
+import gzip
+import os
+from typing import Dict
+
+import brotli
+
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "9"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "11"))
+
+# Content codings produced, most preferred first
+ENCODINGS = ("br", "gzip")
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Compress a body with one content coding
+
+    Output is deterministic (no gzip timestamp), so the same body always
+    compresses to the same bytes.
+
+    Args:
+        body: Uncompressed bytes
+        encoding: "gzip" or "br"
+
+    Returns:
+        Compressed bytes
+
+    Raises:
+        ValueError: If the encoding is not supported
+    """
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    raise ValueError(f"Unsupported content coding '{encoding}'")
+
+
+def compress_all(body: bytes) -> Dict[str, bytes]:
+    """
+    Compress a body with every available content coding
+
+    Args:
+        body: Uncompressed bytes
+
+    Returns:
+        Mapping of content coding to compressed bytes
+    """
+    return {encoding: compress(body, encoding) for encoding in ENCODINGS}
@@ -0,0 +1,249 @@
+"""
+Persistent time-series store of scraped index values (SQLite)
+"""
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", "data/history.db")
+
+# Pre-aggregated resolutions: name -> bucket size in seconds
+ROLLUP_RESOLUTIONS = {
+    "hour": 3600,
+    "day": 86400,
+    "week": 604800,
+}
+RESOLUTIONS = ("raw",) + tuple(ROLLUP_RESOLUTIONS)
+
+# Upper bound on points returned by a single query
+MAX_POINTS = 10000
+
+# Target series length when the resolution is chosen automatically
+AUTO_TARGET_POINTS = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS index_history (
+    source TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (source, ts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS index_rollup (
+    source TEXT NOT NULL,
+    resolution TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    total REAL NOT NULL,
+    count INTEGER NOT NULL,
+    min_value REAL NOT NULL,
+    max_value REAL NOT NULL,
+    PRIMARY KEY (source, resolution, bucket)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_ROLLUP = """
+INSERT INTO index_rollup (source, resolution, bucket, total, count, min_value, max_value)
+VALUES (?, ?, ?, ?, 1, ?, ?)
+ON CONFLICT (source, resolution, bucket) DO UPDATE SET
+    total = total + excluded.total,
+    count = count + 1,
+    min_value = MIN(min_value, excluded.min_value),
+    max_value = MAX(max_value, excluded.max_value)
+"""
+
+
+def choose_resolution(start: int, end: int) -> str:
+    """
+    Pick the finest resolution that keeps a range near AUTO_TARGET_POINTS
+
+    Args:
+        start: Range start (unix seconds)
+        end: Range end (unix seconds)
+
+    Returns:
+        Resolution name
+    """
+    span = max(0, end - start)
+    if span <= 2 * 86400:
+        return "raw"
+    for name, bucket in ROLLUP_RESOLUTIONS.items():
+        if span / bucket <= AUTO_TARGET_POINTS:
+            return name
+    return "week"
+
+
+class HistoryStore:
+    """Append-only (source, timestamp) -> value store with hour/day/week rollups"""
+
+    def __init__(self, path: str = HISTORY_DB_PATH):
+        """
+        Initialize store (the database is opened on first use)
+
+        Args:
+            path: SQLite database path, or ":memory:"
+        """
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.inserted = 0
+        self.duplicates = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed"""
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            logger.info(f"Opened history store: {self.path}")
+        return self._conn
+
+    def append(self, source: str, ts: int, value: float) -> bool:
+        """
+        Append a single point
+
+        Args:
+            source: Index source name (e.g. "stock", "crypto")
+            ts: Point timestamp (unix seconds)
+            value: Index value
+
+        Returns:
+            True if the point was new, False if (source, ts) already existed
+        """
+        return self.append_many(source, [(ts, value)]) == 1
+
+    def append_many(self, source: str, points: Iterable[Tuple[int, float]]) -> int:
+        """
+        Append points, ignoring timestamps already stored for the source
+
+        Args:
+            source: Index source name
+            points: Iterable of (unix seconds, value)
+
+        Returns:
+            Number of new points stored
+        """
+        inserted = 0
+        duplicates = 0
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                for ts, value in points:
+                    ts = int(ts)
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO index_history (source, ts, value) VALUES (?, ?, ?)",
+                        (source, ts, value)
+                    )
+                    if cursor.rowcount != 1:
+                        duplicates += 1
+                        continue
+
+                    inserted += 1
+                    for name, bucket in ROLLUP_RESOLUTIONS.items():
+                        conn.execute(_UPSERT_ROLLUP, (source, name, ts - ts % bucket, value, value, value))
+
+        self.inserted += inserted
+        self.duplicates += duplicates
+        return inserted
+
+    def query(
+        self,
+        source: str,
+        start: int,
+        end: int,
+        resolution: str = "auto"
+    ) -> Dict[str, Any]:
+        """
+        Query a (downsampled) series for a time range
+
+        Args:
+            source: Index source name
+            start: Range start, inclusive (unix seconds)
+            end: Range end, inclusive (unix seconds)
+            resolution: "auto", "raw", "hour", "day" or "week"
+
+        Returns:
+            Dictionary with the resolution used and columnar timestamps,
+            values (bucket means), mins and maxs
+
+        Raises:
+            ValueError: If the resolution is unknown
+        """
+        if resolution == "auto":
+            resolution = choose_resolution(start, end)
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Resolution must be one of {('auto',) + RESOLUTIONS}")
+
+        with self._lock:
+            conn = self._connect()
+            if resolution == "raw":
+                rows = conn.execute(
+                    "SELECT ts, value, value, value FROM index_history "
+                    "WHERE source = ? AND ts BETWEEN ? AND ? ORDER BY ts LIMIT ?",
+                    (source, start, end, MAX_POINTS)
+                ).fetchall()
+            else:
+                bucket = ROLLUP_RESOLUTIONS[resolution]
+                rows = conn.execute(
+                    "SELECT bucket, total / count, min_value, max_value FROM index_rollup "
+                    "WHERE source = ? AND resolution = ? AND bucket BETWEEN ? AND ? "
+                    "ORDER BY bucket LIMIT ?",
+                    (source, resolution, start - start % bucket, end, MAX_POINTS)
+                ).fetchall()
+
+        return {
+            "resolution": resolution,
+            "timestamps": [row[0] for row in rows],
+            "values": [round(row[1], 4) for row in rows],
+            "mins": [row[2] for row in rows],
+            "maxs": [row[3] for row in rows],
+        }
+
+    def latest(self, source: str) -> Optional[Tuple[int, float]]:
+        """
+        Get the newest stored point for a source
+
+        Args:
+            source: Index source name
+
+        Returns:
+            (unix seconds, value) or None if the source has no points
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT ts, value FROM index_history WHERE source = ? ORDER BY ts DESC LIMIT 1",
+                (source,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics
+
+        Returns:
+            Dictionary with path and insert counters
+        """
+        return {
+            'path': self.path,
+            'open': self._conn is not None,
+            'inserted': self.inserted,
+            'duplicates': self.duplicates
+        }
+
+
+# Global history store instance
+history_store = HistoryStore()
@@ -0,0 +1,176 @@
+"""
+Shared pooled HTTP clients for upstream scrapers
+"""
+import asyncio
+import importlib.util
+import logging
+import os
+import weakref
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Connection pool configuration (per upstream host)
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "10"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "5"))
+KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "120"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+DEFAULT_TIMEOUT = 15.0
+
+
+def http2_available() -> bool:
+    """
+    Check whether HTTP/2 support (the optional h2 package) is installed
+
+    Returns:
+        True if httpx can negotiate HTTP/2
+    """
+    return importlib.util.find_spec("h2") is not None
+
+
+class _PoolStats:
+    """Request and connection reuse counters for one client"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self._seen_streams = weakref.WeakSet()
+
+    async def on_response(self, response: httpx.Response) -> None:
+        """Event hook: count whether the response used a pooled connection"""
+        self.requests += 1
+        stream = response.extensions.get("network_stream")
+        if stream is None:
+            return
+        try:
+            if stream in self._seen_streams:
+                self.reused_connections += 1
+            else:
+                self._seen_streams.add(stream)
+                self.new_connections += 1
+        except TypeError:
+            # Stream type does not support weak references
+            pass
+
+
+class UpstreamClients:
+    """One keep-alive httpx.AsyncClient per upstream host, owned by the app lifespan"""
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = KEEPALIVE_EXPIRY,
+        http2: bool = HTTP2_ENABLED
+    ):
+        """
+        Initialize client registry
+
+        Args:
+            max_connections: Maximum connections per host
+            max_keepalive_connections: Maximum idle keep-alive connections per host
+            keepalive_expiry: Seconds an idle connection is kept open
+            http2: Negotiate HTTP/2 when the h2 package is installed
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+
+        if http2 and not http2_available():
+            logger.warning("HTTP2_ENABLED is set but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._loops: Dict[str, asyncio.AbstractEventLoop] = {}
+        self._stats: Dict[str, _PoolStats] = {}
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        """
+        Get the shared client for the host of url, creating it on first use
+
+        Per-source timeouts are passed per request, so sources sharing a
+        host also share the connection pool.
+
+        Args:
+            url: Any URL on the upstream host
+
+        Returns:
+            Pooled httpx.AsyncClient for that host
+        """
+        host = urlsplit(url).netloc
+        client = self._clients.get(host)
+        loop = asyncio.get_running_loop()
+
+        # Pooled connections are bound to the loop that opened them
+        if client is not None and not client.is_closed and self._loops.get(host) is loop:
+            return client
+
+        stats = _PoolStats()
+        client = httpx.AsyncClient(
+            timeout=DEFAULT_TIMEOUT,
+            limits=self.limits,
+            http2=self.http2,
+            event_hooks={"response": [stats.on_response]}
+        )
+        self._clients[host] = client
+        self._loops[host] = loop
+        self._stats[host] = stats
+        logger.info(f"Created pooled HTTP client for {host} (http2={self.http2})")
+        return client
+
+    async def aclose(self) -> None:
+        """Close all clients and their pooled connections"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._loops.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing HTTP client: {e}")
+        logger.info("Closed pooled HTTP clients")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics per upstream host
+
+        Returns:
+            Dictionary with open/idle connections and reuse counters per host
+        """
+        hosts = {}
+        for host, stats in self._stats.items():
+            client: Optional[httpx.AsyncClient] = self._clients.get(host)
+            connections = _pool_connections(client)
+            hosts[host] = {
+                'open_connections': len(connections),
+                'idle_connections': sum(1 for c in connections if c.is_idle()),
+                'requests': stats.requests,
+                'new_connections': stats.new_connections,
+                'reused_connections': stats.reused_connections
+            }
+
+        return {
+            'http2': self.http2,
+            'max_connections': self.limits.max_connections,
+            'max_keepalive_connections': self.limits.max_keepalive_connections,
+            'hosts': hosts
+        }
+
+
+def _pool_connections(client: Optional[httpx.AsyncClient]) -> list:
+    """Return the httpcore connections of a client's pool (empty if unavailable)"""
+    if client is None or client.is_closed:
+        return []
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    return list(getattr(pool, "connections", []))
+
+
+# Global client registry shared by all scrapers
+http_clients = UpstreamClients()
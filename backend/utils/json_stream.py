@@ -0,0 +1,268 @@
+"""
+Incremental JSON reading of upstream response streams with a size limit
+"""
+import codecs
+import json
+import os
+import re
+from typing import Any, AsyncIterator
+
+import httpx
+
+# Largest upstream body read before giving up (bytes)
+MAX_PAYLOAD_BYTES = int(os.getenv("UPSTREAM_MAX_BYTES", str(5 * 1024 * 1024)))
+
+_decoder = json.JSONDecoder()
+# C scanner behind raw_decode; signals "no value here" with StopIteration
+_scan_once = _decoder.scan_once
+_whitespace = re.compile(r"[ \t\n\r]*")
+_spaces = " \t\n\r"
+_delimiters = ",]}" + _spaces
+
+
+class PayloadTooLargeError(ValueError):
+    """Raised when an upstream body exceeds the configured maximum size"""
+
+    def __init__(self, limit: int):
+        """
+        Initialize error
+
+        Args:
+            limit: Maximum size in bytes
+        """
+        super().__init__(f"Upstream payload exceeds {limit} bytes")
+        self.limit = limit
+
+
+class JSONStream:
+    """
+    Pull parser over a stream of JSON bytes
+
+    Callers walk objects and arrays with items() / elements() and decode the
+    values they need with value(), or skip() the rest; every value is
+    decoded by the standard library's C scanner. Only the unread part of
+    the body is buffered, so memory is bounded by the chunk size and the
+    largest single value decoded, not by the size of the payload.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], max_bytes: int = MAX_PAYLOAD_BYTES):
+        """
+        Initialize reader
+
+        Args:
+            chunks: Body chunks (e.g. httpx Response.aiter_bytes())
+            max_bytes: Maximum body size
+
+        Raises:
+            PayloadTooLargeError: (while reading) if the body exceeds max_bytes
+        """
+        self._chunks = chunks.__aiter__()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    @classmethod
+    def from_response(cls, response: httpx.Response, max_bytes: int = MAX_PAYLOAD_BYTES) -> "JSONStream":
+        """
+        Read a streamed httpx response, rejecting a declared oversized body before reading it
+
+        Args:
+            response: Response opened with client.stream()
+            max_bytes: Maximum body size
+
+        Returns:
+            JSONStream over the response body
+
+        Raises:
+            PayloadTooLargeError: If Content-Length exceeds max_bytes
+        """
+        length = response.headers.get("content-length")
+        if length is not None and length.isdigit() and int(length) > max_bytes:
+            raise PayloadTooLargeError(max_bytes)
+        return cls(response.aiter_bytes(), max_bytes)
+
+    async def _more(self) -> bool:
+        """Append the next chunk to the buffer, dropping what was already read; False at end of input"""
+        if self._eof:
+            return False
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            chunk = b""
+        else:
+            self.bytes_read += len(chunk)
+            if self.bytes_read > self.max_bytes:
+                raise PayloadTooLargeError(self.max_bytes)
+        self._buf = self._buf[self._pos:] + self._text.decode(chunk, final=self._eof)
+        self._pos = 0
+        return True
+
+    async def peek(self) -> str:
+        """
+        Get the next non-whitespace character without consuming it
+
+        Returns:
+            The character, or "" at the end of input
+        """
+        while True:
+            self._pos = _whitespace.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not await self._more():
+                return ""
+
+    async def _expect(self, char: str) -> None:
+        found = await self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found or 'end of input'}' in upstream JSON")
+        self._pos += 1
+
+    async def _separator(self, close: str) -> bool:
+        """Consume ',' (returns True) or the closing bracket (returns False)"""
+        found = await self.peek()
+        self._pos += 1
+        if found == ",":
+            return True
+        if found == close:
+            return False
+        raise ValueError(f"Expected ',' or '{close}' but found '{found or 'end of input'}' in upstream JSON")
+
+    async def value(self) -> Any:
+        """
+        Decode the next complete value
+
+        Returns:
+            Decoded value
+
+        Raises:
+            ValueError: If the input is not valid JSON
+        """
+        await self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                # Most likely the value continues in the next chunk
+                if await self._more():
+                    continue
+                raise ValueError(f"Invalid upstream JSON: {e}") from None
+            # A number not followed by a delimiter may continue in the next chunk ("12" of "12.5")
+            if type(value) in (int, float) and (end == len(self._buf) or self._buf[end] not in _delimiters):
+                if await self._more():
+                    continue
+            self._pos = end
+            return value
+
+    async def items(self):
+        """
+        Iterate the keys of the next object
+
+        The caller must read or skip the value after each key.
+
+        Yields:
+            Object keys in document order
+        """
+        await self._expect("{")
+        if await self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = await self.value()
+            if not isinstance(key, str):
+                raise ValueError("Expected an object key in upstream JSON")
+            await self._expect(":")
+            yield key
+            if not await self._separator("}"):
+                return
+
+    async def elements(self):
+        """
+        Iterate the elements of the next array
+
+        The caller must read or skip each element.
+
+        Yields:
+            None, once per element
+        """
+        await self._expect("[")
+        if await self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield
+            if not await self._separator("]"):
+                return
+
+    async def batches(self):
+        """
+        Decode the elements of the next array, a buffer at a time
+
+        Elements complete in the buffer are decoded in one synchronous loop;
+        only an element split across chunks goes through value(). Memory
+        stays bounded by the chunk size.
+
+        Yields:
+            Lists of decoded elements, in order
+        """
+        await self._expect("[")
+        if await self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            batch = []
+            append = batch.append
+            skip_whitespace = _whitespace.match
+            buf = self._buf
+            pos = skip_whitespace(buf, self._pos).end()
+            n = len(buf)
+            done = False
+            while True:
+                try:
+                    value, end = _scan_once(buf, pos)
+                except (StopIteration, json.JSONDecodeError):
+                    break
+                if end < n and buf[end] in _spaces:
+                    end = skip_whitespace(buf, end).end()
+                # Delimiter not in the buffer yet, or a number that may continue
+                if end >= n:
+                    break
+                char = buf[end]
+                if char == ",":
+                    append(value)
+                    pos = end + 1
+                    if pos < n and buf[pos] in _spaces:
+                        pos = skip_whitespace(buf, pos).end()
+                elif char == "]":
+                    append(value)
+                    pos = end + 1
+                    done = True
+                    break
+                else:
+                    break
+            self._pos = pos
+
+            if batch:
+                yield batch
+                if done:
+                    return
+                continue
+            # The next element is split across chunks
+            yield [await self.value()]
+            if not await self._separator("]"):
+                return
+
+    async def skip(self) -> None:
+        """Consume the next value without building containers"""
+        char = await self.peek()
+        if char == "{":
+            async for _ in self.items():
+                await self.skip()
+        elif char == "[":
+            async for _ in self.elements():
+                await self.skip()
+        else:
+            await self.value()
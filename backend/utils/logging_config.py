@@ -0,0 +1,246 @@
+"""
+Logging setup: records are queued on the calling thread and written as JSON
+lines (with size-based file rotation) by a background listener thread
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Hashable, List, Optional, Tuple
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.getenv("LOG_FILE", "logs/backend.log")
+# json (one object per line) or text
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+# Records waiting for the writer thread; further records are dropped
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Hot-path messages: at most LOG_SAMPLE_LIMIT per key every LOG_SAMPLE_INTERVAL seconds
+LOG_SAMPLE_LIMIT = int(os.getenv("LOG_SAMPLE_LIMIT", "10"))
+LOG_SAMPLE_INTERVAL = float(os.getenv("LOG_SAMPLE_INTERVAL", "60"))
+# Sampling keys tracked at once; the least recently used key is forgotten beyond this
+LOG_SAMPLE_MAX_KEYS = int(os.getenv("LOG_SAMPLE_MAX_KEYS", "1024"))
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as single-line JSON objects"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Format a record
+
+        Args:
+            record: Log record
+
+        Returns:
+            JSON object with timestamp, level, logger and message, plus the
+            formatted exception if the record has one
+        """
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that leaves formatting to the listener thread
+
+    The message is rendered on the calling thread (its arguments may change
+    afterwards); everything else, including exception formatting and the
+    write itself, happens on the listener thread. When the queue is full the
+    record is dropped and counted instead of blocking the caller.
+    """
+
+    def __init__(self, record_queue: queue.Queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogSampler:
+    """
+    Rate limit for messages logged on hot paths (e.g. every cached hit)
+
+    Each key may log `limit` messages per `interval` seconds; the rest are
+    suppressed, and the first message of the next interval reports how many
+    were. Nothing is formatted for suppressed messages. At most `max_keys`
+    keys are tracked (least recently used first out), so keys built from
+    request data cannot grow the sampler without bound.
+    """
+
+    def __init__(
+        self,
+        limit: int = LOG_SAMPLE_LIMIT,
+        interval: float = LOG_SAMPLE_INTERVAL,
+        max_keys: int = LOG_SAMPLE_MAX_KEYS
+    ):
+        """
+        Initialize sampler
+
+        Args:
+            limit: Messages per key per interval (0 suppresses hot-path messages,
+                a negative value disables sampling)
+            interval: Interval length in seconds
+            max_keys: Maximum number of keys tracked
+        """
+        self.limit = limit
+        self.interval = interval
+        self.max_keys = max(1, max_keys)
+        # key -> (interval start, messages logged, messages suppressed), least recently used first
+        self._windows: "OrderedDict[Hashable, Tuple[float, int, int]]" = OrderedDict()
+
+    def log(self, logger: logging.Logger, level: int, key: Hashable, msg: str, *args) -> bool:
+        """
+        Log a message unless its key is over the limit
+
+        Args:
+            logger: Logger to use
+            level: Logging level
+            key: Sampling key (one budget per key)
+            msg: Message, %-style
+            *args: Message arguments
+
+        Returns:
+            True if the message was logged
+        """
+        if not logger.isEnabledFor(level):
+            return False
+        if self.limit < 0:
+            logger.log(level, msg, *args)
+            return True
+
+        now = time.monotonic()
+        start, logged, suppressed = self._windows.get(key, (now, 0, 0))
+        if now - start >= self.interval:
+            start, logged = now, 0
+        if logged >= self.limit:
+            self._remember(key, (start, logged, suppressed + 1))
+            return False
+
+        self._remember(key, (start, logged + 1, 0))
+        if suppressed:
+            logger.log(level, msg + " (%d similar messages suppressed)", *args, suppressed)
+        else:
+            logger.log(level, msg, *args)
+        return True
+
+    def _remember(self, key: Hashable, window: Tuple[float, int, int]) -> None:
+        """Store a key's window as most recently used, forgetting the oldest key if over the bound"""
+        self._windows[key] = window
+        self._windows.move_to_end(key)
+        if len(self._windows) > self.max_keys:
+            self._windows.popitem(last=False)
+
+    def reset(self) -> None:
+        """Forget all keys"""
+        self._windows.clear()
+
+
+def build_handlers(path: Optional[str] = LOG_FILE, fmt: str = LOG_FORMAT) -> List[logging.Handler]:
+    """
+    Create the handlers run by the listener thread
+
+    Args:
+        path: Log file (rotated by size), or None/empty for the console only
+        fmt: "json" or "text"
+
+    Returns:
+        List of handlers
+    """
+    formatter = JSONFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers: List[logging.Handler] = [logging.StreamHandler(sys.stderr)]
+    if path:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    handlers: Optional[List[logging.Handler]] = None,
+    logger: Optional[logging.Logger] = None,
+    queue_size: int = LOG_QUEUE_SIZE
+) -> logging.handlers.QueueListener:
+    """
+    Route a logger through a queue drained by a background writer thread
+
+    Replaces the logger's handlers with a single QueueHandler; the listener
+    is stopped (and the queue flushed) at interpreter exit.
+
+    Args:
+        level: Level name (e.g. "INFO")
+        handlers: Handlers run by the listener (default: build_handlers())
+        logger: Logger to configure (default: root logger)
+        queue_size: Maximum queued records
+
+    Returns:
+        The started QueueListener
+    """
+    logger = logger if logger is not None else logging.getLogger()
+    if handlers is None:
+        handlers = build_handlers()
+
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        listener = getattr(handler, "listener", None)
+        if listener is not None:
+            stop_listener(listener)
+
+    handler = QueueHandler(queue.Queue(queue_size))
+    listener = logging.handlers.QueueListener(handler.queue, *handlers, respect_handler_level=True)
+    handler.listener = listener
+    logger.addHandler(handler)
+    logger.setLevel(getattr(logging, level, logging.INFO))
+    listener.start()
+    atexit.register(stop_listener, listener)
+    return listener
+
+
+def stop_listener(listener: logging.handlers.QueueListener) -> None:
+    """
+    Write out queued records and stop the writer thread (no-op if already stopped)
+
+    Args:
+        listener: Listener returned by configure_logging()
+    """
+    if listener._thread is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+# Global sampler for hot-path messages
+hot_path_log = LogSampler()
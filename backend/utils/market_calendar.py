@@ -0,0 +1,204 @@
+"""
+NYSE trading calendar: sessions, holidays, early closes and extended hours
+"""
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from functools import lru_cache
+from typing import FrozenSet, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+EASTERN = ZoneInfo("America/New_York")
+
+PRE_MARKET_OPEN = dtime(4, 0)
+REGULAR_OPEN = dtime(9, 30)
+REGULAR_CLOSE = dtime(16, 0)
+EARLY_CLOSE = dtime(13, 0)
+POST_MARKET_CLOSE = dtime(20, 0)
+
+# Session phases
+CLOSED = "closed"
+PRE_MARKET = "pre_market"
+REGULAR = "regular"
+POST_MARKET = "post_market"
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th given weekday (Monday=0) of a month; n=-1 for the last"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """Saturday holidays are observed on Friday, Sunday holidays on Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=16)
+def holidays(year: int) -> FrozenSet[date]:
+    """
+    NYSE full-day holidays of a year
+
+    Args:
+        year: Calendar year
+
+    Returns:
+        Set of dates the exchange is closed on (besides weekends)
+    """
+    days = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),  # Independence Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    }
+    # A Saturday New Year's Day is not observed on the Friday before
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(days)
+
+
+def is_trading_day(day: date) -> bool:
+    """
+    Whether the exchange opens on a date
+
+    Args:
+        day: Date in US/Eastern
+
+    Returns:
+        True on weekdays that are not holidays
+    """
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def close_time(day: date) -> dtime:
+    """
+    Regular close of a trading day: 13:00 before Independence Day, after
+    Thanksgiving and on Christmas Eve, 16:00 otherwise
+
+    Args:
+        day: Trading day in US/Eastern
+
+    Returns:
+        Close time in US/Eastern
+    """
+    early = {
+        _nth_weekday(day.year, 11, 3, 4) + timedelta(days=1),
+        date(day.year, 7, 3),
+        date(day.year, 12, 24),
+    }
+    return EARLY_CLOSE if day in early and is_trading_day(day) else REGULAR_CLOSE
+
+
+def session(day: date) -> Optional[Tuple[datetime, datetime, datetime, datetime]]:
+    """
+    Session boundaries of a date
+
+    Args:
+        day: Date in US/Eastern
+
+    Returns:
+        (pre-market open, regular open, regular close, post-market close) as
+        aware datetimes, or None if the exchange is closed all day
+    """
+    if not is_trading_day(day):
+        return None
+    close = close_time(day)
+    # Extended hours end four hours after the close (17:00 on early-close days)
+    post_close = POST_MARKET_CLOSE if close == REGULAR_CLOSE else dtime(close.hour + 4, close.minute)
+    return tuple(
+        datetime.combine(day, at, EASTERN)
+        for at in (PRE_MARKET_OPEN, REGULAR_OPEN, close, post_close)
+    )
+
+
+def phase(now: float) -> str:
+    """
+    Session phase at a point in time
+
+    Args:
+        now: Unix timestamp in seconds
+
+    Returns:
+        "pre_market", "regular", "post_market" or "closed"
+    """
+    moment = datetime.fromtimestamp(now, timezone.utc).astimezone(EASTERN)
+    bounds = session(moment.date())
+    if bounds is None:
+        return CLOSED
+    pre_open, regular_open, regular_close, post_close = bounds
+    if moment < pre_open or moment >= post_close:
+        return CLOSED
+    if moment < regular_open:
+        return PRE_MARKET
+    if moment < regular_close:
+        return REGULAR
+    return POST_MARKET
+
+
+def phase_end(now: float) -> Optional[float]:
+    """
+    End of the session phase a point in time falls in
+
+    Args:
+        now: Unix timestamp in seconds
+
+    Returns:
+        Unix timestamp of the regular open (pre-market), regular close
+        (regular hours) or post-market close (post-market), or None while
+        the exchange is closed
+    """
+    moment = datetime.fromtimestamp(now, timezone.utc).astimezone(EASTERN)
+    bounds = session(moment.date())
+    if bounds is None or moment < bounds[0] or moment >= bounds[3]:
+        return None
+    for boundary in bounds[1:]:
+        if moment < boundary:
+            return boundary.timestamp()
+    return None
+
+
+def next_session_open(now: float, max_days: int = 14) -> Optional[float]:
+    """
+    Start of the next pre-market session after a point in time
+
+    Args:
+        now: Unix timestamp in seconds
+        max_days: Days to look ahead
+
+    Returns:
+        Unix timestamp of the next pre-market open, or None if there is none
+        within max_days
+    """
+    day = datetime.fromtimestamp(now, timezone.utc).astimezone(EASTERN).date()
+    for offset in range(max_days + 1):
+        bounds = session(day + timedelta(days=offset))
+        if bounds is not None and bounds[0].timestamp() > now:
+            return bounds[0].timestamp()
+    return None
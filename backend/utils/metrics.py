@@ -0,0 +1,333 @@
+"""
+Prometheus text-format metrics: counters, gauges, histograms and a timed API route class
+"""
+import bisect
+import os
+import time
+from typing import Any, Callable, Coroutine, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+
+# Set METRICS_ENABLED=false to turn all recording into no-ops
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Latency buckets in seconds, from cached hits (sub-millisecond) to slow upstreams
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    """Render a {name="value",...} label set"""
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value"""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base class: a named metric with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self._registry = registry
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter per label set"""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """
+        Increment the counter
+
+        Args:
+            *labels: Label values in labelnames order
+            amount: Increment (default: 1)
+        """
+        if self._registry.enabled:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        """Current value for a label set"""
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, set directly or read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, *args, callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def set(self, value: float, *labels: str) -> None:
+        """Set the gauge for a label set"""
+        if self._registry.enabled:
+            self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Increase the gauge for a label set"""
+        if self._registry.enabled:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        """Decrease the gauge for a label set"""
+        if self._registry.enabled:
+            self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def value(self, *labels: str) -> float:
+        """Current value for a label set"""
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        values = self._callback() if self._callback is not None else self._values
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Bucketed distribution per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Iterable[float] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last)..., sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def labels(self, *labels: str) -> "_HistogramSeries":
+        """
+        Get the series for a label set, for callers that record to it repeatedly
+
+        Args:
+            *labels: Label values in labelnames order
+
+        Returns:
+            Series with its own observe(value)
+        """
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        return _HistogramSeries(self, series)
+
+    def observe(self, value: float, *labels: str) -> None:
+        """
+        Record one observation
+
+        Bucket counts are stored per bucket and only made cumulative when
+        rendered, so recording is one bisect and two increments.
+
+        Args:
+            value: Observed value (seconds for latencies)
+            *labels: Label values in labelnames order
+        """
+        if not self._registry.enabled:
+            return
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        """Number of observations for a label set"""
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class _HistogramSeries:
+    """Pre-resolved histogram series for one label set"""
+
+    __slots__ = ("_buckets", "_counts")
+
+    def __init__(self, histogram: Histogram, counts: List[float]):
+        self._buckets = histogram.buckets
+        self._counts = counts
+
+    def observe(self, value: float) -> None:
+        """Record one observation (callers check that metrics are enabled)"""
+        counts = self._counts
+        counts[bisect.bisect_left(self._buckets, value)] += 1
+        counts[-1] += value
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together
+
+    Recording is lock-free: every update is a plain dict/list operation made
+    from the event loop thread, so there is nothing to contend on.
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        Initialize registry
+
+        Args:
+            enabled: Whether recording is active
+        """
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        """Create and register a counter"""
+        return self._register(Counter(self, name, help_text, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+    ) -> Gauge:
+        """Create and register a gauge (optionally read from a callback at scrape time)"""
+        return self._register(Gauge(self, name, help_text, labelnames, callback=callback))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        """Create and register a histogram"""
+        return self._register(Histogram(self, name, help_text, labelnames, buckets=buckets))
+
+    def render(self) -> bytes:
+        """
+        Render every metric in the Prometheus text exposition format
+
+        Returns:
+            Encoded metrics page
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+# Global registry and the metrics recorded across the app
+metrics = MetricsRegistry(enabled=METRICS_ENABLED)
+
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+upstream_fetch_duration = metrics.histogram(
+    "upstream_fetch_duration_seconds", "Upstream fetch latency by index source", ("source", "status")
+)
+cache_requests = metrics.counter(
+    "cache_requests_total", "Cache lookups by key and result (hit, stale, miss, expired)", ("key", "result")
+)
+refresh_errors = metrics.counter(
+    "refresh_errors_total", "Failed index refreshes by source and trigger", ("source", "trigger")
+)
+http_requests_in_flight = metrics.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled"
+)
+
+
+class TimedRoute(APIRoute):
+    """
+    API route that times its handler into http_request_duration_seconds
+
+    Each handler is timed under its path template. Streaming responses are
+    timed until their headers are ready, which keeps long-lived streams out
+    of the latency histogram.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        route_path = self.path
+        # (method, status) -> histogram series, resolved once
+        series_by_key: Dict[Tuple[str, int], _HistogramSeries] = {}
+
+        async def timed_handler(request: Request) -> Response:
+            if not metrics.enabled:
+                return await handler(request)
+
+            status_code = 500
+            http_requests_in_flight.inc()
+            start = time.perf_counter()
+            try:
+                response = await handler(request)
+                status_code = response.status_code
+                return response
+            except HTTPException as e:
+                status_code = e.status_code
+                raise
+            except RequestValidationError:
+                status_code = 422
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                http_requests_in_flight.dec()
+                key = (request.method, status_code)
+                series = series_by_key.get(key)
+                if series is None:
+                    series = series_by_key[key] = http_request_duration.labels(
+                        request.method, route_path, str(status_code)
+                    )
+                series.observe(elapsed)
+
+        return timed_handler
+
@@ -1,15 +1,119 @@
 """
-Retry utility with exponential backoff
+Retry utility with jittered exponential backoff and a retry budget
 """
 import asyncio
 import logging
-from typing import Callable, Any, TypeVar, Optional
-from functools import wraps
+import os
+import random
+import time
+from typing import Callable, Any, Dict, TypeVar, Optional
+
+import httpx
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+# Upstream retry configuration
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "5.0"))
+# Retries earned per call: 0.2 allows at most one retry per five calls once the initial tokens are spent
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_MAX_TOKENS = float(os.getenv("RETRY_BUDGET_MAX_TOKENS", "10"))
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Check whether an upstream failure is worth retrying
+
+    Transport errors (connect failures, timeouts), 5xx responses and 429
+    are transient. Other 4xx responses and parse errors are not.
+
+    Args:
+        exc: Exception raised by the call
+
+    Returns:
+        True if the call may succeed when repeated
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        status_code = exc.response.status_code
+        return status_code >= 500 or status_code == 429
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError))
+
+
+def is_retryable_fast(exc: BaseException) -> bool:
+    """
+    Check whether a failure is worth retrying while a caller is waiting
+
+    Like is_retryable, but timeouts are final: another attempt would make
+    the caller wait out the timeout again.
+
+    Args:
+        exc: Exception raised by the call
+
+    Returns:
+        True if the call may succeed when repeated promptly
+    """
+    if isinstance(exc, (httpx.TimeoutException, asyncio.TimeoutError)):
+        return False
+    return is_retryable(exc)
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries to a fraction of calls
+
+    Every call deposits ratio tokens and every retry spends one, so a failing
+    upstream sees at most (1 + ratio) times its normal request rate instead
+    of (1 + max_retries) times.
+    """
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, max_tokens: float = RETRY_BUDGET_MAX_TOKENS):
+        """
+        Initialize budget
+
+        Args:
+            ratio: Tokens deposited per call
+            max_tokens: Bucket size (and initial tokens)
+        """
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.retries = 0
+        self.denied = 0
+
+    def record_call(self) -> None:
+        """Deposit the tokens earned by one call"""
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """
+        Take one token for a retry
+
+        Returns:
+            True if the retry may go ahead
+        """
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.retries += 1
+            return True
+        self.denied += 1
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get budget statistics
+
+        Returns:
+            Dictionary with remaining tokens, retries made and retries denied
+        """
+        return {
+            'tokens': round(self.tokens, 2),
+            'retries': self.retries,
+            'denied': self.denied
+        }
+
 
 async def retry_with_backoff(
     func: Callable[..., T],
@@ -17,6 +121,10 @@ async def retry_with_backoff(
     base_delay: float = 1.0,
     max_delay: float = 30.0,
     *args,
+    jitter: bool = True,
+    retry_on: Optional[Callable[[BaseException], bool]] = None,
+    budget: Optional[RetryBudget] = None,
+    deadline: Optional[float] = None,
     **kwargs
 ) -> T:
     """
@@ -28,31 +136,58 @@ async def retry_with_backoff(
         base_delay: Initial delay in seconds
         max_delay: Maximum delay in seconds
         *args: Positional arguments for func
+        jitter: Sleep a random time up to the backoff delay ("full jitter")
+            so callers that failed together do not retry together
+        retry_on: Predicate selecting retryable exceptions (default: all)
+        budget: Retry budget shared by all calls to the same upstream
+        deadline: time.monotonic() by which the last attempt must finish;
+            attempts are cut off there and no retry starts whose backoff
+            would end past it (default: no deadline)
         **kwargs: Keyword arguments for func
 
     Returns:
         Result of successful function call
 
     Raises:
-        Last exception if all retries fail
+        Last exception if all retries fail, the exception is not retryable,
+        or the retry budget is exhausted; asyncio.TimeoutError if the
+        deadline passes during an attempt
     """
+    if budget is not None:
+        budget.record_call()
+
     last_exception = None
 
     for attempt in range(max_retries + 1):
         try:
-            return await func(*args, **kwargs)
+            if deadline is None:
+                return await func(*args, **kwargs)
+            return await asyncio.wait_for(func(*args, **kwargs), deadline - time.monotonic())
         except Exception as e:
             last_exception = e
 
+            if retry_on is not None and not retry_on(e):
+                raise
+
             if attempt == max_retries:
-                logger.error(f"All {max_retries} retries failed for {func.__name__}")
+                if max_retries:
+                    logger.error(f"All {max_retries} retries failed for {func.__name__}")
+                raise
+
+            if budget is not None and not budget.try_spend():
+                logger.warning(f"Retry budget exhausted for {func.__name__}, not retrying: {e}")
                 raise
 
             # Calculate delay with exponential backoff
             delay = min(base_delay * (2 ** attempt), max_delay)
+            if jitter:
+                delay = random.uniform(0, delay)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                logger.warning(f"No time left to retry {func.__name__} before its deadline: {e}")
+                raise
             logger.warning(
                 f"Attempt {attempt + 1}/{max_retries + 1} failed for {func.__name__}: {e}. "
-                f"Retrying in {delay}s..."
+                f"Retrying in {delay:.2f}s..."
             )
             await asyncio.sleep(delay)
 
@@ -0,0 +1,227 @@
+"""
+Background scheduler that refreshes index caches before they expire
+"""
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.metrics import refresh_errors
+
+logger = logging.getLogger(__name__)
+
+
+def _format_time(ts: Optional[float]) -> Optional[str]:
+    """Format a unix timestamp as an ISO-8601 UTC string"""
+    if ts is None:
+        return None
+    return datetime.utcfromtimestamp(ts).isoformat() + "Z"
+
+
+class RefreshJob:
+    """Periodic refresh job for a single index"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        interval: float,
+        jitter: float = 0.1,
+        retry_delay: float = 30.0,
+        interval_func: Optional[Callable[[], float]] = None
+    ):
+        """
+        Initialize refresh job
+
+        Args:
+            name: Job name (e.g. the index source)
+            func: Async function performing one refresh
+            interval: Seconds between successful refreshes
+            jitter: Fraction of the interval to randomize by (+/-)
+            retry_delay: Initial delay in seconds after a failure, doubled per
+                consecutive failure and capped at the interval
+            interval_func: Computes the interval after each run instead of
+                using the fixed one (e.g. longer while a market is closed)
+        """
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.retry_delay = retry_delay
+        self.interval_func = interval_func
+
+        self.last_run: Optional[float] = None
+        self.last_success: Optional[float] = None
+        self.last_outcome: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_duration: Optional[float] = None
+        self.next_run: Optional[float] = None
+        self.consecutive_failures = 0
+        self.runs = 0
+        self.skipped = 0
+        self._current: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether a refresh is currently in progress"""
+        return self._current is not None and not self._current.done()
+
+    def current_interval(self) -> float:
+        """Seconds between successful refreshes as of now"""
+        return self.interval_func() if self.interval_func is not None else self.interval
+
+    def next_delay(self) -> float:
+        """
+        Compute the delay until the next run
+
+        Returns:
+            Delay in seconds, with jitter and failure backoff applied
+        """
+        if self.consecutive_failures:
+            delay = min(self.retry_delay * (2 ** (self.consecutive_failures - 1)), self.interval)
+        else:
+            delay = self.current_interval()
+
+        # Jitter scales with the base interval, so long computed intervals are not shifted by hours
+        spread = min(delay, self.interval) * self.jitter
+        return max(0.0, delay + random.uniform(-spread, spread))
+
+    async def run_once(self) -> None:
+        """Run a single refresh and record its outcome"""
+        start = time.time()
+        self.last_run = start
+        self.runs += 1
+
+        try:
+            await self.func()
+        except Exception as e:
+            self.consecutive_failures += 1
+            refresh_errors.inc(self.name, "scheduled")
+            self.last_outcome = "error"
+            self.last_error = str(e) or e.__class__.__name__
+            logger.warning(
+                f"Scheduled refresh failed for {self.name} "
+                f"({self.consecutive_failures} consecutive): {e}"
+            )
+        else:
+            self.consecutive_failures = 0
+            self.last_outcome = "success"
+            self.last_error = None
+            self.last_success = time.time()
+            logger.debug(f"Scheduled refresh succeeded for {self.name}")
+        finally:
+            self.last_duration = time.time() - start
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get job status
+
+        Returns:
+            Dictionary with last/next run times and outcome
+        """
+        return {
+            'interval_seconds': round(self.current_interval(), 1),
+            'running': self.running,
+            'last_run': _format_time(self.last_run),
+            'last_outcome': self.last_outcome,
+            'last_error': self.last_error,
+            'last_duration_ms': round(self.last_duration * 1000, 1) if self.last_duration is not None else None,
+            'last_success': _format_time(self.last_success),
+            'next_run': _format_time(self.next_run),
+            'consecutive_failures': self.consecutive_failures,
+            'runs': self.runs,
+            'skipped_runs': self.skipped
+        }
+
+
+class RefreshScheduler:
+    """Runs registered refresh jobs on their own jittered intervals"""
+
+    def __init__(self, initial_delay: float = 0.0):
+        """
+        Initialize scheduler
+
+        Args:
+            initial_delay: Maximum random delay in seconds before the first
+                run of each job (spreads startup warm-up)
+        """
+        self.initial_delay = initial_delay
+        self.jobs: Dict[str, RefreshJob] = {}
+        self._loops: Dict[str, asyncio.Task] = {}
+
+    def register(self, name: str, func: Callable[[], Awaitable[Any]], interval: float, **kwargs) -> RefreshJob:
+        """
+        Register a refresh job
+
+        Args:
+            name: Unique job name
+            func: Async function performing one refresh
+            interval: Seconds between successful refreshes
+            **kwargs: Extra RefreshJob options (jitter, retry_delay, interval_func)
+
+        Returns:
+            The registered job
+        """
+        job = RefreshJob(name, func, interval, **kwargs)
+        self.jobs[name] = job
+        return job
+
+    @property
+    def started(self) -> bool:
+        """Whether the job loops are running"""
+        return bool(self._loops)
+
+    async def start(self) -> None:
+        """Start a loop task for every registered job"""
+        for name, job in self.jobs.items():
+            if name not in self._loops:
+                self._loops[name] = asyncio.create_task(self._loop(job))
+        logger.info(f"Refresh scheduler started with jobs: {', '.join(self.jobs) or 'none'}")
+
+    async def stop(self) -> None:
+        """Cancel all job loops and in-progress refreshes"""
+        tasks = list(self._loops.values())
+        tasks += [job._current for job in self.jobs.values() if job.running]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loops.clear()
+        for job in self.jobs.values():
+            job.next_run = None
+        logger.info("Refresh scheduler stopped")
+
+    async def _loop(self, job: RefreshJob) -> None:
+        """Run a job forever, skipping ticks while a previous run is still going"""
+        delay = random.uniform(0, self.initial_delay)
+
+        while True:
+            job.next_run = time.time() + delay
+            await asyncio.sleep(delay)
+
+            if job.running:
+                job.skipped += 1
+                logger.warning(f"Skipping scheduled refresh for {job.name}: previous run still in progress")
+            else:
+                job._current = asyncio.create_task(job.run_once())
+                # Wait for the run, but never longer than one interval
+                await asyncio.wait({job._current}, timeout=job.interval)
+
+            delay = job.next_delay()
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get status of all jobs
+
+        Returns:
+            Dictionary with scheduler state and per-job status
+        """
+        return {
+            'running': self.started,
+            'jobs': {name: job.get_status() for name, job in self.jobs.items()}
+        }
+
+
+# Global scheduler instance
+scheduler = RefreshScheduler(initial_delay=5.0)
@@ -0,0 +1,97 @@
+"""
+Single-flight request coalescing for concurrent cache misses
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Run at most one in-flight call per key and share its result with all callers"""
+
+    def __init__(self):
+        """Initialize single-flight group"""
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    async def do(self, key: str, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Execute func once per key; concurrent callers await the same result
+
+        The call runs in its own task, so a cancelled caller (e.g. a client
+        disconnect) does not cancel the fetch for the other waiters.
+
+        Args:
+            key: Coalescing key (usually the cache key)
+            func: Async function to call on the first miss
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Result of the shared call
+
+        Raises:
+            Whatever exception the shared call raised, delivered to every waiter
+        """
+        task = self._in_flight.get(key)
+
+        if task is not None:
+            self.coalesced += 1
+            logger.debug(f"Single-flight join: key='{key}'")
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, t))
+            logger.debug(f"Single-flight start: key='{key}'")
+
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: str, task: asyncio.Task) -> None:
+        """Drop the finished call and record its outcome"""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+        # Retrieve the exception so it is never reported as unhandled
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def in_flight(self, key: str) -> bool:
+        """
+        Check whether a call is running for key
+
+        Args:
+            key: Coalescing key
+
+        Returns:
+            True if a shared call is in progress
+        """
+        return key in self._in_flight
+
+    def clear(self) -> None:
+        """Reset statistics (in-flight calls are left to finish)"""
+        self.leaders = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get single-flight statistics
+
+        Returns:
+            Dictionary with in-flight and coalescing counters
+        """
+        return {
+            'in_flight': len(self._in_flight),
+            'leaders': self.leaders,
+            'coalesced_waiters': self.coalesced,
+            'errors': self.errors
+        }
+
+
+# Global single-flight group shared by all index endpoints
+single_flight = SingleFlight()
@@ -0,0 +1,489 @@
+"""
+Compact array-backed time series for index and indicator history
+"""
+import bisect
+import calendar
+import re
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils import cache_codec
+
+# Lookback spec: <count><unit>, e.g. "12h", "7d", "2w", "3M", "1y"
+LOOKBACK_PATTERN = re.compile(r"^(\d+)([hdwMy])$")
+LOOKBACK_METHODS = ("nearest", "linear")
+
+# Maximum distance from the target for a point to count as a match
+DEFAULT_TOLERANCE = 2 * 86400
+
+
+class TimeSeries:
+    """Parallel arrays of unix-second timestamps and float values, sorted by time"""
+
+    __slots__ = ("timestamps", "values")
+
+    def __init__(self, timestamps: Optional[Iterable[float]] = None, values: Optional[Iterable[float]] = None):
+        """
+        Initialize series
+
+        Args:
+            timestamps: Unix timestamps in seconds (ascending)
+            values: Values matching the timestamps
+        """
+        self.timestamps = array("d", timestamps or ())
+        self.values = array("d", values or ())
+        if len(self.timestamps) != len(self.values):
+            raise ValueError("timestamps and values must have the same length")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def append(self, ts: float, value: float) -> None:
+        """
+        Append a point (callers keep timestamps ascending)
+
+        Args:
+            ts: Unix timestamp in seconds
+            value: Point value
+        """
+        self.timestamps.append(ts)
+        self.values.append(value)
+
+    def sort(self) -> "TimeSeries":
+        """
+        Sort points by timestamp in place if they are not already ascending
+
+        Returns:
+            self
+        """
+        ts = self.timestamps
+        if any(ts[i] > ts[i + 1] for i in range(len(ts) - 1)):
+            pairs = sorted(zip(self.timestamps, self.values))
+            self.timestamps = array("d", (p[0] for p in pairs))
+            self.values = array("d", (p[1] for p in pairs))
+        return self
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        """
+        Get the newest point
+
+        Returns:
+            (timestamp, value) or None if empty
+        """
+        if not self.timestamps:
+            return None
+        return self.timestamps[-1], self.values[-1]
+
+    def slice(self, start: Optional[float] = None, end: Optional[float] = None) -> "TimeSeries":
+        """
+        Get the points within [start, end] by binary search
+
+        Args:
+            start: Inclusive start timestamp (None for the beginning)
+            end: Inclusive end timestamp (None for the end)
+
+        Returns:
+            New TimeSeries with the selected points
+        """
+        lo = 0 if start is None else bisect.bisect_left(self.timestamps, start)
+        hi = len(self.timestamps) if end is None else bisect.bisect_right(self.timestamps, end)
+        result = TimeSeries()
+        result.timestamps = self.timestamps[lo:hi]
+        result.values = self.values[lo:hi]
+        return result
+
+    def value_at(
+        self,
+        ts: float,
+        method: str = "nearest",
+        tolerance: float = DEFAULT_TOLERANCE
+    ) -> Optional[Tuple[float, float]]:
+        """
+        Resolve the value at a timestamp by binary search
+
+        Args:
+            ts: Target unix timestamp in seconds
+            method: "nearest" (closest point) or "linear" (interpolate
+                between the surrounding points)
+            tolerance: Maximum seconds between the target and the point(s)
+                used; beyond it there is no data for the target
+
+        Returns:
+            (timestamp, value) of the match, or None if there is no data
+            within tolerance
+        """
+        if not self.timestamps:
+            return None
+        return self._match(bisect.bisect_left(self.timestamps, ts), ts, method, tolerance)
+
+    def values_at(
+        self,
+        targets: List[float],
+        method: str = "nearest",
+        tolerance: float = DEFAULT_TOLERANCE
+    ) -> List[Optional[Tuple[float, float]]]:
+        """
+        Resolve many timestamps in one merge pass over the series
+
+        Targets are visited in ascending order and each search starts at the
+        previous target's position, so the cursor only moves forward through
+        the series instead of searching it from the start for every target.
+
+        Args:
+            targets: Target unix timestamps in seconds (any order)
+            method: "nearest" or "linear" (see value_at)
+            tolerance: Maximum seconds between a target and the point(s) used
+
+        Returns:
+            (timestamp, value) or None per target, in the order of targets
+        """
+        results: List[Optional[Tuple[float, float]]] = [None] * len(targets)
+        timestamps = self.timestamps
+        if not timestamps:
+            return results
+
+        i = 0
+        for k in sorted(range(len(targets)), key=targets.__getitem__):
+            ts = targets[k]
+            i = bisect.bisect_left(timestamps, ts, i)
+            results[k] = self._match(i, ts, method, tolerance)
+        return results
+
+    def _match(self, i: int, ts: float, method: str, tolerance: float) -> Optional[Tuple[float, float]]:
+        """Resolve ts given its insertion point i in the (non-empty) timestamps"""
+        timestamps = self.timestamps
+        n = len(timestamps)
+        if i < n and timestamps[i] == ts:
+            return ts, self.values[i]
+
+        if method == "linear" and 0 < i < n:
+            t0, t1 = timestamps[i - 1], timestamps[i]
+            if ts - t0 > tolerance or t1 - ts > tolerance:
+                return None
+            v0, v1 = self.values[i - 1], self.values[i]
+            return ts, v0 + (v1 - v0) * (ts - t0) / (t1 - t0)
+
+        # Nearest neighbour (also the fallback at the series edges); ties go to the earlier point
+        if i == 0:
+            j = 0
+        elif i == n or ts - timestamps[i - 1] <= timestamps[i] - ts:
+            j = i - 1
+        else:
+            j = i
+        if abs(timestamps[j] - ts) > tolerance:
+            return None
+        return timestamps[j], self.values[j]
+
+    def to_dict(self) -> Dict[str, list]:
+        """
+        Convert to a columnar JSON-compatible dict
+
+        Returns:
+            Dictionary with "timestamps" (int seconds) and "values" lists
+        """
+        return {
+            "timestamps": [int(ts) for ts in self.timestamps],
+            "values": [round(v, 4) for v in self.values]
+        }
+
+
+def parse_lookback(spec: str) -> Tuple[int, str]:
+    """
+    Parse a lookback spec such as "7d" or "1M"
+
+    Units: h (hours), d (days), w (weeks), M (calendar months), y (calendar years)
+
+    Args:
+        spec: Lookback spec
+
+    Returns:
+        (count, unit)
+
+    Raises:
+        ValueError: If the spec is invalid
+    """
+    match = LOOKBACK_PATTERN.match(spec.strip())
+    if not match:
+        raise ValueError(f"Invalid lookback '{spec}': expected <count><unit> with unit h, d, w, M or y")
+    return int(match.group(1)), match.group(2)
+
+
+def parse_lookbacks(specs: str) -> List[str]:
+    """
+    Parse a comma-separated list of lookback specs
+
+    Args:
+        specs: e.g. "1d,7d,1M"
+
+    Returns:
+        Normalized specs in request order, without duplicates
+
+    Raises:
+        ValueError: If any spec is invalid
+    """
+    result = []
+    for spec in specs.split(","):
+        spec = spec.strip()
+        if not spec:
+            continue
+        parse_lookback(spec)
+        if spec not in result:
+            result.append(spec)
+    return result
+
+
+def lookback_target(reference: float, spec: str) -> float:
+    """
+    Compute the target timestamp of a lookback from a reference time
+
+    Calendar units clamp the day of month (e.g. 31 March - 1M = 28/29 Feb).
+
+    Args:
+        reference: Reference unix timestamp (usually the newest point)
+        spec: Lookback spec
+
+    Returns:
+        Target unix timestamp
+    """
+    count, unit = parse_lookback(spec)
+    if unit in ("h", "d", "w"):
+        seconds = {"h": 3600, "d": 86400, "w": 604800}[unit]
+        return reference - count * seconds
+
+    ref = datetime.fromtimestamp(reference, tz=timezone.utc)
+    months = count * (12 if unit == "y" else 1)
+    year, month = divmod(ref.month - 1 - months, 12)
+    year += ref.year
+    month += 1
+    day = min(ref.day, calendar.monthrange(year, month)[1])
+    return ref.replace(year=year, month=month, day=day).timestamp()
+
+
+def resolve_lookback(
+    series: TimeSeries,
+    spec: str,
+    method: str = "nearest",
+    tolerance: float = DEFAULT_TOLERANCE
+) -> Optional[Tuple[float, float]]:
+    """
+    Resolve a lookback relative to the newest point of a series
+
+    Args:
+        series: Series to search
+        spec: Lookback spec
+        method: "nearest" or "linear"
+        tolerance: Maximum distance in seconds from the target
+
+    Returns:
+        (timestamp, value) or None if there is no data near the target
+    """
+    latest = series.latest()
+    if latest is None:
+        return None
+    return series.value_at(lookback_target(latest[0], spec), method=method, tolerance=tolerance)
+
+
+class IncrementalHistory:
+    """
+    Upstream history kept between refreshes, so a refresh fetches only new points
+
+    A scraper asks plan_fetch() where to start: None means a full download
+    (first fetch, scheduled resync, or after a gap), otherwise the newest
+    ingested timestamp. The parsed series are then passed to merge(), which
+    splices them onto the stored history.
+    """
+
+    def __init__(self, primary: str, retention: float, resync_interval: float):
+        """
+        Initialize empty history
+
+        Args:
+            primary: Series whose newest point marks what has been ingested
+            retention: Seconds of history kept behind the newest point
+            resync_interval: Seconds between full downloads
+        """
+        self.primary = primary
+        self.retention = retention
+        self.resync_interval = resync_interval
+        self.series: Dict[str, TimeSeries] = {}
+        self.last_full_sync: Optional[float] = None
+        self.resync_needed = False
+        self.pending_full = True
+
+    def plan_fetch(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        Decide between a full and an incremental fetch
+
+        Args:
+            now: Current unix time (defaults to time.time())
+
+        Returns:
+            Newest ingested timestamp to fetch from, or None for a full fetch
+        """
+        now = time.time() if now is None else now
+        primary = self.series.get(self.primary)
+        full = (
+            self.resync_needed
+            or not primary
+            or self.last_full_sync is None
+            or now - self.last_full_sync >= self.resync_interval
+        )
+        self.pending_full = full
+        return None if full else primary.latest()[0]
+
+    def merge(self, fetched: Dict[str, TimeSeries], now: Optional[float] = None) -> Dict[str, TimeSeries]:
+        """
+        Merge freshly parsed series into the stored history
+
+        After a full fetch the fetched series replace the stored ones. After
+        an incremental fetch, fetched points replace stored points from the
+        first fetched timestamp on. If an incremental fetch does not reach
+        back to the newest stored point, the missing range is a gap and the
+        next fetch is a full one.
+
+        New TimeSeries objects are built, so series already handed out (to
+        the series store or the cache) are never modified.
+
+        Args:
+            fetched: Mapping of series name to parsed TimeSeries
+            now: Current unix time (defaults to time.time())
+
+        Returns:
+            Mapping of series name to merged TimeSeries
+        """
+        now = time.time() if now is None else now
+        if self.pending_full:
+            merged = dict(fetched)
+            self.last_full_sync = now
+            self.resync_needed = False
+        else:
+            merged = dict(self.series)
+            stored_primary = self.series.get(self.primary)
+            fetched_primary = fetched.get(self.primary)
+            if stored_primary and fetched_primary and fetched_primary.timestamps[0] > stored_primary.latest()[0]:
+                self.resync_needed = True
+            for name, ts in fetched.items():
+                stored = self.series.get(name)
+                if not ts:
+                    merged.setdefault(name, ts)
+                elif not stored:
+                    merged[name] = ts
+                else:
+                    # Stored points before the first fetched point, then the fetched points
+                    lo = bisect.bisect_left(stored.timestamps, ts.timestamps[0])
+                    merged[name] = TimeSeries(stored.timestamps[:lo] + ts.timestamps, stored.values[:lo] + ts.values)
+
+        for name, ts in merged.items():
+            if ts:
+                merged[name] = ts.slice(ts.latest()[0] - self.retention, None)
+        self.series = merged
+        return merged
+
+    def reset(self) -> None:
+        """Forget the stored history, so the next fetch is a full one"""
+        self.series = {}
+        self.last_full_sync = None
+        self.resync_needed = False
+        self.pending_full = True
+
+
+class SeriesStore:
+    """Latest parsed series per source and indicator"""
+
+    def __init__(self):
+        """Initialize empty store"""
+        self._series: Dict[str, Dict[str, TimeSeries]] = {}
+
+    def set(self, source: str, series: Dict[str, TimeSeries]) -> None:
+        """
+        Replace all series for a source
+
+        Args:
+            source: Index source name
+            series: Mapping of indicator name to TimeSeries
+        """
+        self._series[source] = series
+
+    def get(self, source: str) -> Dict[str, TimeSeries]:
+        """
+        Get all series for a source
+
+        Args:
+            source: Index source name
+
+        Returns:
+            Mapping of indicator name to TimeSeries (empty if unknown)
+        """
+        return self._series.get(source, {})
+
+    def clear(self) -> None:
+        """Remove all series"""
+        self._series.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics
+
+        Returns:
+            Dictionary with point counts per source and indicator
+        """
+        return {
+            source: {name: len(ts) for name, ts in series.items()}
+            for source, series in self._series.items()
+        }
+
+
+
+def _float_bytes(values: array) -> bytes:
+    """Little-endian float64 bytes of an array"""
+    if sys.byteorder == "little":
+        return values.tobytes()
+    swapped = array("d", values)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def _float_array(blob: bytes) -> array:
+    """Array of float64 values from little-endian bytes"""
+    values = array("d")
+    values.frombytes(blob)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _encode_series(series: Dict[str, TimeSeries]) -> Tuple[Dict[str, int], List[bytes]]:
+    """Shared-cache form of a source's series: point counts as JSON, arrays as blobs"""
+    blobs = []
+    for ts in series.values():
+        blobs.extend([_float_bytes(ts.timestamps), _float_bytes(ts.values)])
+    return {name: len(ts) for name, ts in series.items()}, blobs
+
+
+def _decode_series(counts: Dict[str, int], blobs: List[bytes]) -> Dict[str, TimeSeries]:
+    """Rebuild a source's series from its shared-cache form"""
+    if len(blobs) != 2 * len(counts):
+        raise ValueError("Series payload does not match its point counts")
+    series = {}
+    for i, (name, count) in enumerate(counts.items()):
+        ts = TimeSeries()
+        ts.timestamps, ts.values = _float_array(blobs[2 * i]), _float_array(blobs[2 * i + 1])
+        if len(ts.timestamps) != count or len(ts.values) != count:
+            raise ValueError(f"Series '{name}' does not have {count} points")
+        series[name] = ts
+    return series
+
+
+cache_codec.register(
+    "series",
+    lambda value: isinstance(value, dict) and bool(value) and all(isinstance(v, TimeSeries) for v in value.values()),
+    _encode_series,
+    _decode_series
+)
+
+
+# Global series store instance
+series_store = SeriesStore()
@@ -5,6 +5,12 @@
 
 const BACKEND_URL = process.env.VITE_BACKEND_URL || 'http://127.0.0.1:8000';
 const TIMEOUT = 10000; // 10 seconds
+const STREAM_RECONNECT_DELAY = 5000; // 5 seconds, overridden by the server's retry field
+const STREAM_MAX_FAILURES = 3; // consecutive stream failures before falling back to polling
+const STREAM_RETRY_INTERVAL = 5 * 60 * 1000; // retry streaming every 5 minutes while polling
+
+// Last validated response per index type, reused when the backend answers 304
+const lastResponses = new Map();
 
 /**
  * Validate Fear & Greed data structure
@@ -38,6 +44,7 @@ function validateFearGreedData(data) {
 
 /**
  * Fetch Fear & Greed Index data from backend
+ * Sends If-None-Match with the last ETag, so unchanged data costs a 304 with no body
  * @param {string} indexType - Type of index: 'stock' or 'crypto' (default: 'stock')
  * @returns {Promise<Object>} Fear & Greed data
  */
@@ -49,22 +56,38 @@ async function fetchFearGreedData(indexType = 'stock') {
     ? `${BACKEND_URL}/api/v1/fear-greed/crypto`
     : `${BACKEND_URL}/api/v1/fear-greed/stock`;
 
+  const previous = lastResponses.get(indexType);
+  const headers = {
+    'Accept': 'application/json',
+  };
+  if (previous) {
+    headers['If-None-Match'] = previous.etag;
+  }
+
   try {
     const response = await fetch(endpoint, {
       signal: controller.signal,
-      headers: {
-        'Content-Type': 'application/json',
-      },
+      headers,
     });
 
     clearTimeout(timeoutId);
 
+    if (response.status === 304 && previous) {
+      return previous.data;
+    }
+
     if (!response.ok) {
       throw new Error(`HTTP error! status: ${response.status}`);
     }
 
-    const data = await response.json();
-    return validateFearGreedData(data);
+    const data = validateFearGreedData(await response.json());
+
+    const etag = response.headers.get('etag');
+    if (etag) {
+      lastResponses.set(indexType, { etag, data });
+    }
+
+    return data;
   } catch (error) {
     clearTimeout(timeoutId);
 
@@ -104,7 +127,160 @@ async function fetchWithRetry(maxRetries = 3, indexType = 'stock') {
   throw lastError;
 }
 
+/**
+ * Parse one Server-Sent Events block into { id, event, data, retry }
+ * @param {string} block - Lines of one event, without the blank separator line
+ * @returns {Object} Parsed fields (comments such as heartbeats yield {})
+ */
+function parseSSEBlock(block) {
+  const fields = {};
+  const data = [];
+
+  for (const line of block.split('\n')) {
+    if (!line || line.startsWith(':')) {
+      continue;
+    }
+    const separator = line.indexOf(':');
+    const name = separator === -1 ? line : line.slice(0, separator);
+    const value = separator === -1 ? '' : line.slice(separator + 1).replace(/^ /, '');
+
+    if (name === 'data') {
+      data.push(value);
+    } else {
+      fields[name] = value;
+    }
+  }
+
+  if (data.length > 0) {
+    fields.data = data.join('\n');
+  }
+  return fields;
+}
+
+/**
+ * Subscribe to index updates over the backend's SSE stream, polling as fallback
+ *
+ * onUpdate receives { source, value, status, timestamp } for every change
+ * pushed by the server, or null when a poll tick (fallback mode) asks the
+ * caller to refresh. Reconnects resume with Last-Event-ID; after
+ * STREAM_MAX_FAILURES consecutive failures the subscriber polls every
+ * pollInterval and periodically tries to stream again.
+ *
+ * @param {Function} onUpdate - Called with an update event, or null to poll
+ * @param {Object} options - { pollInterval, sources }
+ * @returns {Object} Handle with stop() and mode() ('stream' or 'poll')
+ */
+function subscribeToUpdates(onUpdate, { pollInterval = 60 * 60 * 1000, sources = null } = {}) {
+  let stopped = false;
+  let currentMode = 'stream';
+  let lastEventId = null;
+  let reconnectDelay = STREAM_RECONNECT_DELAY;
+  let failures = 0;
+  let controller = null;
+  let pollTimer = null;
+  let retryTimer = null;
+
+  const endpoint = sources
+    ? `${BACKEND_URL}/api/v1/fear-greed/stream?sources=${encodeURIComponent(sources.join(','))}`
+    : `${BACKEND_URL}/api/v1/fear-greed/stream`;
+
+  function startPolling() {
+    if (stopped || pollTimer) {
+      return;
+    }
+    currentMode = 'poll';
+    console.log('Update stream unavailable, falling back to polling');
+    pollTimer = setInterval(() => onUpdate(null), pollInterval);
+    retryTimer = setTimeout(() => {
+      clearInterval(pollTimer);
+      pollTimer = null;
+      failures = 0;
+      connect();
+    }, STREAM_RETRY_INTERVAL);
+  }
+
+  function handleBlock(block) {
+    const message = parseSSEBlock(block);
+    if (message.retry) {
+      reconnectDelay = Number(message.retry) || reconnectDelay;
+    }
+    if (message.id) {
+      lastEventId = message.id;
+    }
+    if (message.event === 'index' && message.data) {
+      try {
+        onUpdate(JSON.parse(message.data));
+      } catch (error) {
+        console.error('Invalid stream event:', error);
+      }
+    }
+  }
+
+  async function connect() {
+    if (stopped) {
+      return;
+    }
+    currentMode = 'stream';
+    controller = new AbortController();
+
+    const headers = { 'Accept': 'text/event-stream' };
+    if (lastEventId) {
+      headers['Last-Event-ID'] = lastEventId;
+    }
+
+    try {
+      const response = await fetch(endpoint, { signal: controller.signal, headers });
+      if (!response.ok || !response.body) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+
+      const decoder = new TextDecoder();
+      let buffer = '';
+      for await (const chunk of response.body) {
+        failures = 0;
+        buffer += decoder.decode(chunk, { stream: true }).replace(/\r\n?/g, '\n');
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          handleBlock(buffer.slice(0, boundary));
+          buffer = buffer.slice(boundary + 2);
+        }
+      }
+    } catch (error) {
+      if (stopped) {
+        return;
+      }
+      failures += 1;
+      console.error('Update stream error:', error.message);
+    }
+
+    if (stopped) {
+      return;
+    }
+    if (failures >= STREAM_MAX_FAILURES) {
+      startPolling();
+    } else {
+      setTimeout(connect, reconnectDelay);
+    }
+  }
+
+  connect();
+
+  return {
+    stop() {
+      stopped = true;
+      if (controller) controller.abort();
+      if (pollTimer) clearInterval(pollTimer);
+      if (retryTimer) clearTimeout(retryTimer);
+    },
+    mode() {
+      return currentMode;
+    },
+  };
+}
+
 module.exports = {
   fetchFearGreedData,
   fetchWithRetry,
+  parseSSEBlock,
+  subscribeToUpdates,
 };
@@ -6,7 +6,7 @@
 const { app, Tray, BrowserWindow, Menu, ipcMain, shell, nativeImage, dialog } = require('electron');
 const path = require('path');
 const Store = require('electron-store');
-const { fetchWithRetry } = require('./api-client');
+const { fetchWithRetry, subscribeToUpdates } = require('./api-client');
 const { autoUpdater } = require('electron-updater');
 
 // Initialize electron-store for settings persistence
@@ -26,7 +26,7 @@ const CONFIG = {
 // Keep references to prevent garbage collection
 let tray = null;
 let mainWindow = null;
-let autoRefreshInterval = null;
+let updateSubscription = null;
 
 // Single instance lock
 const gotTheLock = app.requestSingleInstanceLock();
@@ -66,8 +66,8 @@ app.on('before-quit', () => {
   if (tray) {
     tray.destroy();
   }
-  if (autoRefreshInterval) {
-    clearInterval(autoRefreshInterval);
+  if (updateSubscription) {
+    updateSubscription.stop();
   }
 });
 
@@ -252,13 +252,18 @@ async function fetchAndUpdateData() {
 }
 
 /**
- * Start automatic refresh interval
+ * Start automatic refresh: pushed updates from the backend stream,
+ * falling back to polling every AUTO_REFRESH_INTERVAL
  */
 function startAutoRefresh() {
-  autoRefreshInterval = setInterval(() => {
-    console.log('Auto-refreshing data...');
+  updateSubscription = subscribeToUpdates((update) => {
+    // null means a poll tick; otherwise only refresh for the selected index
+    if (update && update.source !== store.get('indexType', 'stock')) {
+      return;
+    }
+    console.log(update ? `Index update pushed for ${update.source}` : 'Auto-refreshing data...');
     fetchAndUpdateData();
-  }, CONFIG.AUTO_REFRESH_INTERVAL);
+  }, { pollInterval: CONFIG.AUTO_REFRESH_INTERVAL });
 }
 
 /**